@@ -0,0 +1,111 @@
+"""Expected-score anomaly detection, per-game loop vs the columnar version.
+
+Usage: `python -m benchmarks.bench_anomalies [games] [players]`
+"""
+
+import random
+import sys
+import time
+
+import networkx as nx
+import numpy as np
+
+from dashapp.analytics import _detect_probability_anomalies
+from network import GameEdge, PlayerDetails, PlayerNode, add_edges_bulk, game_table
+from network.games import DRAWS
+
+RESULTS = [("win", "resigned"), ("checkmated", "win"), ("timeout", "win")]
+RESULTS += [(draw, draw) for draw in DRAWS]
+CHUNK = 100_000
+
+
+def build(count: int, players: int) -> nx.Graph:
+    """A graph of `count` random games between `players` players."""
+    rng = random.Random(0)
+    nodes = [
+        PlayerNode(uid=i, name="", username=f"player{i}", country="US", rating=1500)
+        for i in range(players)
+    ]
+    graph = nx.Graph()
+    for start in range(0, count, CHUNK):
+        edges = []
+        for _ in range(min(CHUNK, count - start)):
+            white, black = rng.sample(nodes, 2)
+            white_result, black_result = rng.choice(RESULTS)
+            game = GameEdge(
+                uuid="",
+                time_control="600",
+                time_class="rapid",
+                rules="chess",
+                accuracies={},
+                eco_code="",
+                white=PlayerDetails(
+                    uid="",
+                    username=white.username,
+                    rating=rng.randint(800, 2800),
+                    result=white_result,
+                ),
+                black=PlayerDetails(
+                    uid="",
+                    username=black.username,
+                    rating=rng.randint(800, 2800),
+                    result=black_result,
+                ),
+                start_time=0,
+                end_time=0,
+            )
+            edges.append((white, black, [game]))
+        add_edges_bulk(graph, edges)
+    return graph
+
+
+def loop_probability_anomalies(graph: nx.Graph) -> dict:
+    """The previous per-game loop, stalemate being its only draw."""
+
+    def calculate_win_probability(rating_a: int, rating_b: int) -> float:
+        return 1 / (1 + 10 ** ((rating_b - rating_a) / 400))
+
+    def get_player_result(result: str) -> float:
+        return {"win": 1, "stalemate": 0.5}.get(result, 0)
+
+    table = game_table(graph)
+    games = zip(
+        table.decode("white").tolist(),
+        table.decode("black").tolist(),
+        table.column("white_rating").tolist(),
+        table.column("black_rating").tolist(),
+        table.decode("white_result").tolist(),
+        table.decode("black_result").tolist(),
+    )
+    totals: dict = {}
+    for white, black, white_rating, black_rating, white_result, black_result in games:
+        white_score = get_player_result(white_result) - calculate_win_probability(
+            white_rating, black_rating
+        )
+        black_score = get_player_result(black_result) - calculate_win_probability(
+            black_rating, white_rating
+        )
+        totals[white] = totals.get(white, 0) + white_score
+        totals[black] = totals.get(black, 0) + black_score
+    percentile = np.percentile(list(totals.values()), 98)
+    return {player: total for player, total in totals.items() if total > percentile}
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    players = int(sys.argv[2]) if len(sys.argv) > 2 else 20_000
+    graph = build(count, players)
+    print(f"{count} games, {players} players")
+    print(f"{'method':<9} {'ms':>9} {'flagged':>8}")
+    for name, detect in (
+        ("loop", loop_probability_anomalies),
+        ("columnar", _detect_probability_anomalies),
+    ):
+        start = time.perf_counter()
+        flagged = detect(graph)
+        elapsed = time.perf_counter() - start
+        print(f"{name:<9} {elapsed * 1e3:>9.1f} {len(flagged):>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Fetching the full archive of a 120-month player, strategy by strategy.
+
+Usage: `python -m benchmarks.bench_archive_games [latency] [games_per_month]`
+"""
+
+import asyncio
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from benchmarks.stand_in import StandInServer, random_opponents
+from cache.backends import SQLiteBackend
+from cache.main import set_backend
+from extraction.api import get_player_game_archives, get_player_games_by_month
+from extraction.client import client
+from extraction.main import aiter_archive_games, fetch_archive_games, iter_archive_games
+from extraction.ratelimit import RateLimiter
+
+MONTHS = [(year, month) for year in range(2015, 2025) for month in range(1, 13)]
+
+
+def sequential_list(username: str) -> int:
+    """The original implementation: months one by one, into one list."""
+    games = []
+    for url in get_player_game_archives(username)["archives"]:
+        year = url.split("/")[-2]
+        month = url.split("/")[-1]
+        games += get_player_games_by_month(username, year, month)["games"]
+    return len(games)
+
+
+def generator(username: str) -> int:
+    return sum(1 for _ in iter_archive_games(username))
+
+
+def concurrent_stream(username: str) -> int:
+    async def count() -> int:
+        return sum([1 async for _ in aiter_archive_games(username)])
+
+    return asyncio.run(count())
+
+
+def concurrent_list(username: str) -> int:
+    return len(fetch_archive_games(username))
+
+
+def main():
+    latency = float(sys.argv[1]) if len(sys.argv) > 1 else 0.05
+    games = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+    client.rate_limiter = RateLimiter(rate=1e6)
+    server = StandInServer(
+        num_players=200,
+        months=list(MONTHS),
+        latency=latency,
+        opponents=random_opponents(200, games),
+    )
+    strategies = {
+        "sequential list": sequential_list,
+        "generator": generator,
+        "concurrent stream": concurrent_stream,
+        "concurrent list": concurrent_list,
+    }
+
+    with server, tempfile.TemporaryDirectory() as root:
+        client.base_url = server.url
+        print(f"{len(MONTHS)} months, {latency * 1e3:.0f} ms per request")
+        print(f"{'strategy':<18} {'games':>6} {'seconds':>8} {'peak MB':>8}")
+        for index, (name, strategy) in enumerate(strategies.items()):
+            set_backend(SQLiteBackend(Path(root) / f"{index}.sqlite3"))
+            start = time.perf_counter()
+            count = strategy("player0")
+            elapsed = time.perf_counter() - start
+
+            # Measured again on a cold cache, as tracing distorts the timings.
+            set_backend(SQLiteBackend(Path(root) / f"{index}-traced.sqlite3"))
+            tracemalloc.start()
+            strategy("player0")
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"{name:<18} {count:>6} {elapsed:>8.2f} {peak / 1e6:>8.1f}")
+
+        server.months.append((2025, 1))
+        requests = server.requests["games"]
+        start = time.perf_counter()
+        count = len(fetch_archive_games("player0", new_only=True))
+        elapsed = time.perf_counter() - start
+        print(
+            f"{'incremental':<18} {count:>6} {elapsed:>8.2f}"
+            f"   ({server.requests['games'] - requests} month downloaded)"
+        )
+        set_backend(SQLiteBackend(Path(root) / "closing.sqlite3"))
+
+
+if __name__ == "__main__":
+    main()
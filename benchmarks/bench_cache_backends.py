@@ -0,0 +1,51 @@
+"""100k cache lookups on the JSON-file and SQLite backends.
+
+Usage: `python -m benchmarks.bench_cache_backends [lookups] [entries]`
+"""
+
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.stand_in import StandInServer, player_name
+from cache.main import BACKENDS, decode, encode, make_key
+
+
+def main():
+    lookups = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    entries = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+    server = StandInServer(num_players=entries)
+    payloads = [
+        (
+            make_key((player_name(index),), {}),
+            encode(server.profile(player_name(index))),
+        )
+        for index in range(entries)
+    ]
+    rng = random.Random(0)
+    order = [rng.randrange(entries) for _ in range(lookups)]
+
+    print(f"{'backend':<8} {'writes/s':>10} {'lookups/s':>10} {'size MB':>8}")
+    for name, build in BACKENDS.items():
+        with tempfile.TemporaryDirectory() as root:
+            backend = build(Path(root))
+            start = time.perf_counter()
+            for key, value in payloads:
+                backend.set("get_player_profile", key, value)
+            backend.flush()
+            writes = entries / (time.perf_counter() - start)
+
+            start = time.perf_counter()
+            for index in order:
+                decode(backend.get("get_player_profile", payloads[index][0]))
+            reads = lookups / (time.perf_counter() - start)
+            backend.close()
+
+            size = sum(path.stat().st_size for path in Path(root).rglob("*"))
+            print(f"{name:<8} {writes:>10.0f} {reads:>10.0f} {size / 1e6:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Compression ratio and read latency of cached monthly archives, raw and compressed.
+
+Usage: `python -m benchmarks.bench_cache_compression [archives] [games]`
+"""
+
+import sys
+import tempfile
+import time
+import zlib
+from pathlib import Path
+
+from benchmarks.stand_in import StandInServer, player_name, random_opponents
+from cache.backends import SQLiteBackend
+from cache.compression import Compressor, train_dictionary
+from cache.main import decode, encode, make_key
+
+
+class Zlib(Compressor):
+    """zlib without a preset dictionary, as a baseline."""
+
+    def compress(self, payload: bytes) -> bytes:
+        return zlib.compress(payload, self.level)
+
+    def decompress(self, value: bytes) -> bytes:
+        return zlib.decompress(value)
+
+
+class Raw(Compressor):
+    """No compression at all."""
+
+    def compress(self, payload: bytes) -> bytes:
+        return payload
+
+
+def main():
+    archives = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    games = int(sys.argv[2]) if len(sys.argv) > 2 else 60
+    server = StandInServer(
+        num_players=archives * 2, opponents=random_opponents(archives * 2, games)
+    )
+    payloads = [
+        encode(server.games(player_name(index), 2024, 10)) for index in range(archives)
+    ]
+    # Train on other players, as a dictionary would be trained on older entries.
+    training = [
+        encode(server.games(player_name(index), 2024, 9))
+        for index in range(archives, archives + 200)
+    ]
+    codecs = {
+        "raw": Raw(),
+        "zlib": Zlib(),
+        "zlib+seed": Compressor(),
+        "zlib+trained": Compressor([train_dictionary(training)]),
+    }
+    raw_size = sum(map(len, payloads))
+    print(f"{archives} archives, {raw_size / archives / 1e3:.0f} kB each on average")
+
+    print(f"{'codec':<13} {'ratio':>6} {'file MB':>8} {'write ms':>9} {'read ms':>8}")
+    for name, codec in codecs.items():
+        with tempfile.TemporaryDirectory() as root:
+            backend = SQLiteBackend(Path(root) / "cache.sqlite3")
+            stored = 0
+            start = time.perf_counter()
+            for index, payload in enumerate(payloads):
+                value = codec.compress(payload)
+                backend.set("games", make_key((index,), {}), value)
+                stored += len(value)
+            backend.flush()
+            write = (time.perf_counter() - start) / archives
+
+            start = time.perf_counter()
+            for index in range(archives):
+                decode(codec.decompress(backend.get("games", make_key((index,), {}))))
+            read = (time.perf_counter() - start) / archives
+            backend.close()
+            size = sum(path.stat().st_size for path in Path(root).rglob("*"))
+        print(
+            f"{name:<13} {raw_size / stored:>6.1f} {size / 1e6:>8.1f}"
+            f" {write * 1e3:>9.2f} {read * 1e3:>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Requests per second: pooled AsyncClient vs. the thread-per-call chessdotcom path.
+
+Usage: `python -m benchmarks.bench_client [requests] [latency_seconds]`
+"""
+
+import asyncio
+import sys
+import time
+
+import chessdotcom as cdc
+from chessdotcom.types import Resource
+
+from benchmarks.stand_in import StandInServer, player_name
+from extraction.client import AsyncClient
+from extraction.ratelimit import RateLimiter
+
+
+async def thread_per_call(usernames):
+    """Today's path: every call is a blocking `requests.get` on the thread pool."""
+    return await asyncio.gather(
+        *[asyncio.to_thread(cdc.get_player_profile, name) for name in usernames]
+    )
+
+
+async def pooled(client: AsyncClient, usernames):
+    """New path: one keep-alive session, bounded by the client semaphore."""
+    return await asyncio.gather(
+        *[client.get_json(f"/player/{name}") for name in usernames]
+    )
+
+
+def measure(label: str, run, count: int) -> float:
+    start = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<24} {count / elapsed:>10.1f} req/s  ({elapsed:.2f}s)")
+    return count / elapsed
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.005
+    usernames = [player_name(index % 1000) for index in range(count)]
+    cdc.Client.request_config["headers"]["User-Agent"] = "DataWizards benchmark"
+
+    with StandInServer(latency=latency) as server:
+        Resource._base_url = server.url
+        # Measure transport throughput, not the production request budget.
+        client = AsyncClient(base_url=server.url, rate_limiter=RateLimiter(rate=1e6))
+        baseline = measure(
+            "thread-per-call",
+            lambda: asyncio.run(thread_per_call(usernames)),
+            count,
+        )
+        improved = measure(
+            "pooled AsyncClient", lambda: asyncio.run(pooled(client, usernames)), count
+        )
+        client.close()
+
+    print(f"speed-up: {improved / baseline:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Clock extraction throughput on a multi-game PGN text, scan vs full parse.
+
+Usage: `python -m benchmarks.bench_clocks [games] [games parsed with python-chess]`
+"""
+
+import io
+import random
+import sys
+import time
+
+import chess.pgn
+
+from benchmarks.stand_in import MOVES, synthetic_pgn
+from extraction.clocks import ClockTable, iter_game_clocks
+
+
+def full_parse(text: str) -> list:
+    """Clocks of every game read with python-chess, which builds every board."""
+    stream, clocks = io.StringIO(text), []
+    while (game := chess.pgn.read_game(stream)) is not None:
+        clocks.append([node.clock() for node in game.mainline()])
+    return clocks
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    parsed = int(sys.argv[2]) if len(sys.argv) > 2 else 2_000
+    rng = random.Random(0)
+    games = [
+        synthetic_pgn(
+            f"player{i % 500}",
+            f"player{(i * 7 + 1) % 500}",
+            rng,
+            rng.randint(20, len(MOVES)),
+        )
+        for i in range(count)
+    ]
+    text = "\n".join(games)
+    print(f"{count} games, {len(text) / 1e6:.0f} MB of PGN")
+    print(f"{'method':<22} {'games':>7} {'games/s':>9}")
+
+    def report(name: str, games: int, seconds: float) -> None:
+        print(f"{name:<22} {games:>7} {games / seconds:>9.0f}")
+
+    start = time.perf_counter()
+    full_parse("\n".join(games[:parsed]))
+    report("python-chess", parsed, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    table = ClockTable()
+    table.append(iter_game_clocks([text]))
+    report("scan, one text", count, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for _ in iter_game_clocks(io.StringIO(text)):
+        pass
+    report("scan, line by line", count, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    table.player_features()
+    report("player features", count, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
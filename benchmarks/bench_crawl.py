@@ -0,0 +1,100 @@
+"""Wall-clock time and API calls of the depth crawl, recursive vs. breadth-first.
+
+Usage: `python -m benchmarks.bench_crawl [max_depth] [latency_seconds]`
+"""
+
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import networkx as nx
+
+import cache.main
+from benchmarks.stand_in import StandInServer, random_opponents
+from cache.backends import SQLiteBackend
+from dashapp.crawl import crawl_opponents
+from extraction import (
+    fetch_opponents_and_games_by_month,
+    fetch_player_data,
+    get_player_data,
+)
+from extraction.client import client
+from extraction.ratelimit import RateLimiter
+from network import add_edges_bulk
+
+
+async def add_opponents(graph, username, year, month, player):
+    """The single-player expansion the recursive crawl was built on."""
+    opponents_and_games = await fetch_opponents_and_games_by_month(
+        username, year, month
+    )
+    nodes = await asyncio.gather(
+        *[fetch_player_data(opponent) for opponent in opponents_and_games]
+    )
+    opponents_node = {
+        opponent: node
+        for opponent, node in zip(opponents_and_games, nodes)
+        if node is not None
+    }
+    add_edges_bulk(
+        graph,
+        [
+            (player, node, opponents_and_games[opponent])
+            for opponent, node in opponents_node.items()
+        ],
+    )
+    return opponents_node
+
+
+async def recursive_crawl(graph, username, year, month, depth, player):
+    """The depth-first crawl `add_opponents_with_depth` used before."""
+
+    async def recursive_add(graph, username, current_depth, player):
+        if current_depth > depth:
+            return
+        opponents_node = await add_opponents(graph, username, year, month, player)
+        for opponent, node in opponents_node.items():
+            await recursive_add(graph, opponent, current_depth + 1, node)
+
+    await recursive_add(graph, username, 1, player)
+    return graph
+
+
+def run(server: StandInServer, crawl, depth: int):
+    """Crawl with a cold cache, returning seconds, API calls and graph size."""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        backend = SQLiteBackend(Path(cache_dir) / "cache.sqlite3")
+        cache.main.set_backend(backend)
+        server.requests.clear()
+        start = time.perf_counter()
+        player = get_player_data("player0")
+        graph = asyncio.run(crawl(nx.Graph(), "player0", 2024, 10, depth, player))
+        elapsed = time.perf_counter() - start
+        backend.close()
+    return elapsed, sum(server.requests.values()), graph.number_of_nodes()
+
+
+def main():
+    max_depth = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.02
+    client.rate_limiter = RateLimiter(rate=1e6)
+
+    opponents = random_opponents(num_players=20000, fanout=6)
+    with StandInServer(
+        num_players=20000, latency=latency, opponents=opponents
+    ) as server:
+        client.base_url = server.url
+        print(f"{'depth':>5} {'crawl':>10} {'seconds':>8} {'calls':>6} {'nodes':>6}")
+        for depth in range(1, max_depth + 1):
+            for label, crawl in (
+                ("recursive", recursive_crawl),
+                ("bfs", crawl_opponents),
+            ):
+                elapsed, calls, nodes = run(server, crawl, depth)
+                print(f"{depth:>5} {label:>10} {elapsed:>8.2f} {calls:>6} {nodes:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Wall-clock time and bytes written by the bulk crawl, old script vs. crawler.
+
+The old `player_crawler.py` fetched a player's months one after another,
+saved them to a file per player and rewrote the whole search space file
+after every player. Both crawls here share the cached client and visit the
+same players breadth-first.
+
+Usage: `python -m benchmarks.bench_crawler [players] [months] [latency_seconds]`
+"""
+
+import asyncio
+import json
+import sys
+import tempfile
+import time
+from itertools import islice
+from pathlib import Path
+
+import cache.main
+from benchmarks.stand_in import StandInServer, random_opponents
+from cache.backends import SQLiteBackend
+from extraction.api import fetch_player_game_archives, fetch_player_games_by_month
+from extraction.client import client
+from extraction.crawler import CrawlState, crawl
+from extraction.main import archive_months
+from extraction.ratelimit import RateLimiter
+
+
+async def rewriting_crawl(seed: str, players: int, directory: Path) -> int:
+    """The old crawl: sequential months, the search space rewritten per player."""
+    queue, seen, written = [seed], {seed}, 0
+    for username in islice(queue, players):
+        archives = []
+        for year, month in archive_months(await fetch_player_game_archives(username)):
+            archives.append(await fetch_player_games_by_month(username, year, month))
+        data = json.dumps(archives, indent=4)
+        (directory / f"{username}.json").write_text(data)
+        for archive in archives:
+            for game in archive["games"]:
+                for color in ("white", "black"):
+                    opponent = game[color]["username"]
+                    if opponent not in seen:
+                        seen.add(opponent)
+                        queue.append(opponent)
+        text = "\n".join(seen) + "\n"
+        (directory / "player_search_space.txt").write_text(text)
+        written += len(data) + len(text)
+    return written
+
+
+def run(server: StandInServer, players: int, old: bool):
+    """Crawl `players` with a cold cache, returning seconds and bytes written."""
+    with tempfile.TemporaryDirectory() as directory:
+        backend = SQLiteBackend(Path(directory) / "cache.sqlite3")
+        cache.main.set_backend(backend)
+        start = time.perf_counter()
+        if old:
+            written = asyncio.run(rewriting_crawl("player0", players, Path(directory)))
+        else:
+            state = CrawlState(Path(directory) / "crawl.sqlite3")
+            asyncio.run(
+                crawl(["player0"], state, depth=100, max_users=players, interval=1e9)
+            )
+            state.close()
+            written = sum(
+                path.stat().st_size for path in Path(directory).glob("crawl.sqlite3*")
+            )
+        elapsed = time.perf_counter() - start
+        backend.close()
+    return elapsed, written
+
+
+def main():
+    players = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    months = int(sys.argv[2]) if len(sys.argv) > 2 else 12
+    latency = float(sys.argv[3]) if len(sys.argv) > 3 else 0.02
+    client.rate_limiter = RateLimiter(rate=1e6)
+
+    with StandInServer(
+        num_players=20000,
+        months=[(2023, month) for month in range(1, months + 1)],
+        latency=latency,
+        opponents=random_opponents(num_players=20000, fanout=6),
+    ) as server:
+        client.base_url = server.url
+        print(f"{'crawl':>10} {'players':>7} {'seconds':>8} {'MB written':>10}")
+        for label, old in (("rewriting", True), ("crawler", False)):
+            elapsed, written = run(server, players, old)
+            print(f"{label:>10} {players:>7} {elapsed:>8.2f} {written / 1e6:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
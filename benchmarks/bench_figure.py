@@ -0,0 +1,79 @@
+"""Figure build time and JSON size, one trace per edge vs batched colour bins.
+
+Usage: `python -m benchmarks.bench_figure [edges ...]`
+"""
+
+import sys
+import time
+
+import networkx as nx
+import numpy as np
+import plotly.graph_objs as go
+from matplotlib import pyplot as plt
+
+from dashapp.graph import create_figure
+
+
+def per_edge_figure(graph: nx.Graph) -> go.Figure:
+    """The original `create_figure`: one trace and one colormap call per edge."""
+    pos = graph.graph["positions"]
+    max_weight = max(
+        (w for _, _, w in graph.edges(data="weight", default=1)), default=1
+    )
+    cmap = plt.get_cmap("plasma")
+    edges = []
+    for u, v, weight in graph.edges(data="weight", default=1):
+        color = cmap(weight / max_weight if max_weight > 0 else 0)
+        r, g, b = (int(c * 255) for c in color[:3])
+        edges.append(
+            go.Scatter(
+                x=[pos[u][0], pos[v][0]],
+                y=[pos[u][1], pos[v][1]],
+                line=dict(width=2, color=f"rgba({r}, {g}, {b}, 1)"),
+                mode="lines",
+                showlegend=False,
+                hoverinfo="none",
+            )
+        )
+    fig = go.Figure(data=edges)
+    fig.add_trace(
+        go.Scatter(
+            x=[pos[node][0] for node in graph],
+            y=[pos[node][1] for node in graph],
+            mode="markers",
+            text=list(graph),
+            marker=dict(size=15),
+        )
+    )
+    return fig
+
+
+def synthetic_graph(edges: int) -> nx.Graph:
+    """A random graph with crawl-like density, weights and fixed positions."""
+    rng = np.random.default_rng(0)
+    graph = nx.relabel_nodes(nx.gnm_random_graph(edges * 4 // 5, edges, seed=0), str)
+    for u, v in graph.edges:
+        graph[u][v]["weight"] = int(rng.integers(0, 800))
+    nx.set_node_attributes(graph, 1500, "rating")
+    graph.graph["positions"] = {node: tuple(rng.random(2)) for node in graph}
+    return graph
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1_000, 10_000, 50_000]
+    print(f"{'edges':>6} {'renderer':<9} {'traces':>7} {'build s':>8} {'JSON MB':>8}")
+    for edges in sizes:
+        graph = synthetic_graph(edges)
+        for name, build in (("per-edge", per_edge_figure), ("batched", create_figure)):
+            start = time.perf_counter()
+            figure = build(graph)
+            payload = figure.to_json()
+            elapsed = time.perf_counter() - start
+            print(
+                f"{edges:>6} {name:<9} {len(figure.data):>7} {elapsed:>8.2f}"
+                f" {len(payload) / 1e6:>8.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
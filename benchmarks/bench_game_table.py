@@ -0,0 +1,142 @@
+"""Memory, anomaly detection time and store size of per-edge game dicts vs the table.
+
+Usage: `python -m benchmarks.bench_game_table [games] [players]`
+"""
+
+import json
+import random
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict
+
+import networkx as nx
+import numpy as np
+
+from benchmarks.stand_in import player_name, synthetic_game
+from dashapp.analytics import _detect_probability_anomalies
+from dashapp.sessions import graph_to_data
+from network import GameEdge, PlayerDetails, PlayerNode, add_edge, add_node
+
+
+def to_edge(game: dict) -> GameEdge:
+    """Convert an archive game the way `fetch_opponents_and_games_by_month` does."""
+    return GameEdge(
+        uuid=game["uuid"],
+        time_control=game["time_control"],
+        time_class=game["time_class"],
+        rules=game["rules"],
+        accuracies=game["accuracies"],
+        eco_code=game["eco"],
+        white=PlayerDetails(
+            username=game["white"]["username"],
+            rating=game["white"]["rating"],
+            result=game["white"]["result"],
+            uid=game["white"]["uuid"],
+        ),
+        black=PlayerDetails(
+            username=game["black"]["username"],
+            rating=game["black"]["rating"],
+            result=game["black"]["result"],
+            uid=game["black"]["uuid"],
+        ),
+        start_time=game["start_time"],
+        end_time=game["end_time"],
+    )
+
+
+def legacy_add_edge(graph: nx.Graph, node1, node2, edge_data) -> None:
+    """The original `add_edge`, storing `asdict` copies, PGN included, on the edge."""
+    add_node(graph, node1)
+    add_node(graph, node2)
+    if not graph.has_edge(node1.username, node2.username):
+        graph.add_edge(node1.username, node2.username, weight=0, data=[])
+    graph[node1.username][node2.username]["data"].extend(
+        {**asdict(edge), "pgn": PGNS[edge.uuid]} for edge in edge_data
+    )
+
+
+def legacy_probability_anomalies(graph: nx.Graph) -> dict:
+    """The previous per-game loop of `_detect_probability_anomalies`."""
+
+    def probability(rating_a: int, rating_b: int) -> float:
+        return 1 / (1 + 10 ** ((rating_b - rating_a) / 400))
+
+    def score(player: dict) -> float:
+        return {"win": 1, "stalemate": 0.5}.get(player.get("result"), 0)
+
+    totals: dict = {}
+    for _, _, data in graph.edges(data=True):
+        for game in data["data"]:
+            white, black = game["white"], game["black"]
+            white_result = score(white) - probability(white["rating"], black["rating"])
+            black_result = score(black) - probability(black["rating"], white["rating"])
+            totals[white["username"]] = totals.get(white["username"], 0) + white_result
+            totals[black["username"]] = totals.get(black["username"], 0) + black_result
+    percentile = np.percentile(list(totals.values()), 98)
+    return {player: total for player, total in totals.items() if total > percentile}
+
+
+PGNS: dict = {}
+
+
+def build(add, pairs, nodes, games) -> tuple:
+    """Build a graph with `add`, returning it with its traced size in bytes."""
+    graph = nx.Graph()
+    for node in nodes:
+        add_node(graph, node)
+    tracemalloc.start()
+    for (white, black), game in zip(pairs, games):
+        add(graph, nodes[white], nodes[black], [game])
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return graph, size
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    players = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    rng = random.Random(0)
+    nodes = [
+        PlayerNode(uid=i, name="", username=player_name(i), country="US", rating=1500)
+        for i in range(players)
+    ]
+    pairs = [tuple(rng.sample(range(players), 2)) for _ in range(count)]
+    archive = [
+        synthetic_game(player_name(w), player_name(b), seed, 1730000000)
+        for seed, (w, b) in enumerate(pairs)
+    ]
+    games = [to_edge(game) for game in archive]
+    # PGN strings are shared with the archive, so do not count towards MB/100k.
+    PGNS.update((game["uuid"], game["pgn"]) for game in archive)
+    del archive
+    print(f"{count} games, {sum(map(len, PGNS.values())) / 1e6:.1f} MB of PGN")
+
+    legacy, legacy_size = build(legacy_add_edge, pairs, nodes, games)
+    table, table_size = build(add_edge, pairs, nodes, games)
+    scale = 100_000 / count
+    print(f"{'layout':<8} {'MB/100k':>8} {'anomalies ms':>13} {'store MB':>9}")
+    for name, graph, size, detect in (
+        ("dicts", legacy, legacy_size, legacy_probability_anomalies),
+        ("table", table, table_size, _detect_probability_anomalies),
+    ):
+        start = time.perf_counter()
+        detect(graph)
+        elapsed = time.perf_counter() - start
+        if name == "dicts":
+            store = json.dumps(
+                {
+                    "nodes": list(graph.nodes(data=True)),
+                    "edges": list(graph.edges(data=True)),
+                }
+            )
+        else:
+            store = json.dumps(graph_to_data(graph))
+        print(
+            f"{name:<8} {size * scale / 1e6:>8.1f} {elapsed * 1e3:>13.1f}"
+            f" {len(store) / 1e6:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Payload size and store overhead of a graph callback, dcc.Store vs sessions.
+
+Before, every callback received the whole graph as JSON, rebuilt it, and
+sent it back. Now the browser holds a session reference and the graph
+stays on the server.
+
+Usage: `python -m benchmarks.bench_graph_sessions [players] [fanout]`
+"""
+
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.stand_in import StandInServer, random_opponents
+from cache.backends import InMemoryBackend, SQLiteBackend
+from cache.main import set_backend
+from dashapp.graph import initialize_graph
+from dashapp.sessions import GraphSessions, data_to_graph, graph_to_data
+from extraction.client import client
+from extraction.ratelimit import RateLimiter
+
+
+def timed(step, repeat: int = 20) -> float:
+    """Median milliseconds of `step`."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        step()
+        times.append(time.perf_counter() - start)
+    return sorted(times)[len(times) // 2] * 1e3
+
+
+def main():
+    players = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    fanout = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    client.rate_limiter = RateLimiter(rate=1e6)
+    set_backend(InMemoryBackend())
+    server = StandInServer(
+        num_players=players, opponents=random_opponents(players, fanout)
+    )
+    with server:
+        client.base_url = server.url
+        graph = initialize_graph("player0", 2024, 10, depth=2)
+    print(
+        f"depth-2 graph: {graph.number_of_nodes()} players,"
+        f" {graph.number_of_edges()} edges"
+    )
+
+    payload = json.dumps(graph_to_data(graph))
+
+    def store_click():
+        # Upload as State, rebuild, serialise the same graph back as Output
+        json.dumps(graph_to_data(data_to_graph(json.loads(payload))))
+
+    def store_render():
+        data_to_graph(json.loads(payload))
+
+    with tempfile.TemporaryDirectory() as root:
+        backend = SQLiteBackend(Path(root) / "sessions.sqlite3")
+        variants = {
+            "memory": (GraphSessions(), GraphSessions()),
+            "shared": (GraphSessions(backend=backend), GraphSessions(backend=backend)),
+        }
+        print(f"{'store':<14} {'request kB':>10} {'response kB':>11} {'click ms':>9}")
+        print(
+            f"{'dcc.Store':<14} {len(payload) / 1e3:>10.1f} {len(payload) / 1e3:>11.1f}"
+            f" {timed(store_click):>9.2f}   (render {timed(store_render):.2f} ms)"
+        )
+        for name, (sessions, other) in variants.items():
+            ref = sessions.create(graph)
+            size = len(json.dumps(ref)) / 1e3
+
+            def session_click():
+                nonlocal ref
+                ref = sessions.update(ref, sessions.get(ref))
+
+            click = timed(session_click)
+            render = timed(lambda: sessions.get(ref))
+            line = (
+                f"{'sessions/' + name:<14} {size:>10.2f} {size:>11.2f} {click:>9.2f}"
+                f"   (render {render:.3f} ms"
+            )
+            if name == "shared":  # Served by a worker that has not seen it yet
+                line += f", other worker {timed(lambda: other._load(ref['session'])):.2f} ms"
+            print(line + ")")
+        backend.close()
+
+
+if __name__ == "__main__":
+    main()
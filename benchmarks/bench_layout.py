@@ -0,0 +1,70 @@
+"""Layout time and node movement when a node of a depth-2 graph is expanded.
+
+Usage: `python -m benchmarks.bench_layout [players] [fanout] [clicks]`
+"""
+
+import sys
+import time
+
+import networkx as nx
+import numpy as np
+
+from benchmarks.stand_in import StandInServer, random_opponents
+from cache.backends import InMemoryBackend
+from cache.main import set_backend
+from dashapp.graph import add_opponents_with_depth, initialize_graph
+from dashapp.layout import graph_layout
+from extraction.client import client
+from extraction.ratelimit import RateLimiter
+
+
+def movement(before: dict, after: dict) -> float:
+    """Mean distance moved by the nodes present before, relative to the spread."""
+    nodes = list(before)
+    old = np.array([before[node] for node in nodes])
+    new = np.array([after[node] for node in nodes])
+    return np.linalg.norm(new - old, axis=1).mean() / np.ptp(old, axis=0).max()
+
+
+def main():
+    players = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    fanout = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    clicks = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+    client.rate_limiter = RateLimiter(rate=1e6)
+    set_backend(InMemoryBackend())
+    server = StandInServer(
+        num_players=players, opponents=random_opponents(players, fanout)
+    )
+    with server:
+        client.base_url = server.url
+        graph = initialize_graph("player0", 2024, 10, depth=2)
+        full = nx.fruchterman_reingold_layout(graph)
+        graph_layout(graph)
+        print(
+            f"depth-2 graph: {graph.number_of_nodes()} players,"
+            f" {graph.number_of_edges()} edges; {clicks} clicks on unexpanded players"
+        )
+        print(
+            f"{'click':>5} {'new':>4} {'full ms':>8} {'moved':>6} {'incr ms':>8} {'moved':>6}"
+        )
+        expanded = {username for username, _, _ in graph.graph["expanded"]}
+        leaves = [node for node in graph if node not in expanded]
+        for click, node in enumerate(leaves[:clicks], 1):
+            known = dict(graph.graph["positions"])
+            add_opponents_with_depth(graph, node, 2024, 10, 1)
+            new = graph.number_of_nodes() - len(known)
+
+            start = time.perf_counter()
+            previous, full = full, nx.fruchterman_reingold_layout(graph)
+            full_ms = (time.perf_counter() - start) * 1e3
+            start = time.perf_counter()
+            positions = graph_layout(graph)
+            incremental_ms = (time.perf_counter() - start) * 1e3
+            print(
+                f"{click:>5} {new:>4} {full_ms:>8.1f} {movement(previous, full):>6.2f}"
+                f" {incremental_ms:>8.1f} {movement(known, positions):>6.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Time and quality of a full layout, networkx against `full_layout`.
+
+Quality is the mean edge length over the mean distance between random pairs
+of nodes: lower means neighbours are drawn closer together.
+
+Usage: `python -m benchmarks.bench_layout_engine [max networkx nodes]`
+"""
+
+import sys
+import time
+
+import networkx as nx
+import numpy as np
+
+from dashapp.layout import full_layout
+
+SIZES = (500, 2000, 5000, 20000)
+
+
+def quality(graph: nx.Graph, positions: dict) -> float:
+    """Mean edge length relative to the mean distance between random pairs."""
+    index = {node: i for i, node in enumerate(graph)}
+    pos = np.array([positions[node] for node in graph])
+    edges = np.array([(index[u], index[v]) for u, v in graph.edges()])
+    edge_length = np.linalg.norm(pos[edges[:, 0]] - pos[edges[:, 1]], axis=1).mean()
+    pairs = np.random.default_rng(0).integers(0, len(pos), (20000, 2))
+    return (
+        edge_length / np.linalg.norm(pos[pairs[:, 0]] - pos[pairs[:, 1]], axis=1).mean()
+    )
+
+
+def timed(layout, graph: nx.Graph):
+    """Seconds taken to lay out a graph, and the quality of the result."""
+    start = time.perf_counter()
+    positions = layout(graph)
+    return time.perf_counter() - start, quality(graph, positions)
+
+
+def main():
+    max_networkx = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    print(
+        f"{'nodes':>6} {'edges':>6} {'nx s':>7} {'quality':>7} {'new s':>7} {'quality':>7}"
+    )
+    for size in SIZES:
+        graph = nx.powerlaw_cluster_graph(size, 2, 0.3, seed=0)
+        if size <= max_networkx:
+            nx_s, nx_quality = timed(lambda g: nx.spring_layout(g, seed=0), graph)
+            networkx = f"{nx_s:>7.2f} {nx_quality:>7.3f}"
+        else:
+            networkx = f"{'-':>7} {'-':>7}"
+        new_s, new_quality = timed(full_layout, graph)
+        print(
+            f"{size:>6} {graph.number_of_edges():>6} {networkx}"
+            f" {new_s:>7.2f} {new_quality:>7.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""Allocations and time to build a month's graph from archive games.
+
+Compares the original dataclasses stored with `asdict` against the slotted
+ones appended to the game table, edge by edge and in bulk.
+
+Usage: `python -m benchmarks.bench_network_build [games] [players]`
+"""
+
+import random
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Optional
+
+import networkx as nx
+
+from benchmarks.stand_in import player_name, synthetic_game
+from network import GameEdge, PlayerDetails, PlayerNode, add_edge, add_edges_bulk
+
+
+@dataclass
+class LegacyPlayerNode:
+    uid: int
+    name: str
+    username: str
+    country: str
+    rating: int
+
+
+@dataclass
+class LegacyPlayerDetails:
+    uid: int
+    username: str
+    rating: int
+    result: str
+
+
+@dataclass
+class LegacyGameEdge:
+    pgn: str
+    time_control: str
+    time_class: str
+    rules: str
+    accuracies: Dict[str, float]
+    eco_code: str
+    white: LegacyPlayerDetails
+    black: LegacyPlayerDetails
+    start_time: int
+    end_time: int
+    duration: Optional[int] = field(init=False)
+
+    def __post_init__(self):
+        self.duration = self.end_time - self.start_time
+
+
+def legacy_add_edge(graph: nx.Graph, node1, node2, edge_data) -> nx.Graph:
+    """`add_edge` before the game table: nodes and games copied with `asdict`."""
+    for node in (node1, node2):
+        if node.username not in graph:
+            graph.add_node(node.username, **asdict(node))
+    if not graph.has_edge(node1.username, node2.username):
+        graph.add_edge(node1.username, node2.username, weight=0, data=[])
+    graph[node1.username][node2.username]["data"].extend(
+        asdict(edge) for edge in edge_data
+    )
+    return graph
+
+
+def to_edges(games: list, edge_type, details_type) -> Dict[tuple, list]:
+    """Group archive games by player pair, as the extraction layer does."""
+    grouped = defaultdict(list)
+    for game in games:
+        white, black = game["white"], game["black"]
+        # The original GameEdge carried the PGN, the current one its uuid.
+        key = "uuid" if edge_type is GameEdge else "pgn"
+        grouped[white["username"], black["username"]].append(
+            edge_type(
+                **{key: game[key]},
+                time_control=game["time_control"],
+                time_class=game["time_class"],
+                rules=game["rules"],
+                accuracies=game["accuracies"],
+                eco_code=game["eco"],
+                white=details_type(
+                    white["uuid"], white["username"], white["rating"], white["result"]
+                ),
+                black=details_type(
+                    black["uuid"], black["username"], black["rating"], black["result"]
+                ),
+                start_time=game["start_time"],
+                end_time=game["end_time"],
+            )
+        )
+    return grouped
+
+
+def measure(step) -> tuple:
+    """Run `step` twice, untraced for time and traced for allocations."""
+    start = time.perf_counter()
+    step()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    result = step()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, elapsed, size
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    players = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    rng = random.Random(0)
+    games = [
+        synthetic_game(*map(player_name, rng.sample(range(players), 2)), seed, 1.73e9)
+        for seed in range(count)
+    ]
+
+    print(f"{count} games between {players} players")
+    print(f"{'variant':<20} {'objects MB':>10} {'graph MB':>9} {'build ms':>9}")
+    variants = {
+        "dataclass + asdict": (LegacyGameEdge, LegacyPlayerDetails, LegacyPlayerNode),
+        "slotted + add_edge": (GameEdge, PlayerDetails, PlayerNode),
+        "slotted + bulk": (GameEdge, PlayerDetails, PlayerNode),
+    }
+    for name, (edge_type, details_type, node_type) in variants.items():
+        nodes = {
+            player_name(i): node_type(i, "", player_name(i), "US", 1500)
+            for i in range(players)
+        }
+        grouped, _, objects = measure(lambda: to_edges(games, edge_type, details_type))
+
+        def build() -> nx.Graph:
+            graph = nx.Graph()
+            if name == "slotted + bulk":
+                return add_edges_bulk(
+                    graph,
+                    [(nodes[w], nodes[b], edges) for (w, b), edges in grouped.items()],
+                )
+            add = legacy_add_edge if name == "dataclass + asdict" else add_edge
+            for (white, black), edges in grouped.items():
+                add(graph, nodes[white], nodes[black], edges)
+            return graph
+
+        _, elapsed, size = measure(build)
+        print(
+            f"{name:<20} {objects / 1e6:>10.1f} {size / 1e6:>9.1f}"
+            f" {elapsed * 1e3:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
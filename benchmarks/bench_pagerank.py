@@ -0,0 +1,66 @@
+"""PageRank after a click, full `nx.pagerank` vs the incremental update.
+
+Each graph gets a player expanded with `new` opponents, as a click does,
+before the scores are asked for again.
+
+Usage: `python -m benchmarks.bench_pagerank [new opponents]`
+"""
+
+import random
+import sys
+import time
+
+import networkx as nx
+
+from dashapp.centrality import pagerank
+
+SIZES = (1000, 5000, 20000, 50000, 100000)
+
+
+def weighted_graph(size: int) -> nx.Graph:
+    """A clustered graph weighted like the rating differences of the app."""
+    rng = random.Random(size)
+    graph = nx.powerlaw_cluster_graph(size, 3, 0.3, seed=0)
+    for u, v in graph.edges():
+        graph[u][v]["weight"] = rng.randint(0, 400)
+    return graph
+
+
+def expand(graph: nx.Graph, new: int, rng: random.Random) -> None:
+    """Add `new` opponents to one player, some of whom played known players."""
+    player, size = rng.randrange(len(graph)), len(graph)
+    for i in range(new):
+        graph.add_edge(player, f"new{size}-{i}", weight=rng.randint(0, 400))
+        graph.add_edge(
+            f"new{size}-{i}", rng.randrange(size), weight=rng.randint(0, 400)
+        )
+
+
+def timed(function, *args):
+    """Seconds taken by a call."""
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    new = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    rng = random.Random(0)
+    print(
+        f"{'nodes':>7} {'edges':>7} {'nx ms':>8} {'first ms':>9} {'update ms':>10} {'iters':>6}"
+    )
+    for size in SIZES:
+        graph = weighted_graph(size)
+        first = timed(pagerank, graph)
+        expand(graph, new, rng)
+        full = timed(nx.pagerank, graph)
+        update = timed(pagerank, graph)
+        print(
+            f"{size:>7} {graph.number_of_edges():>7} {full * 1e3:>8.1f}"
+            f" {first * 1e3:>9.1f} {update * 1e3:>10.1f}"
+            f" {graph.graph['pagerank'].iterations:>6}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+"""Local stand-in for api.chess.com serving deterministic synthetic players."""
+
+import json
+import random
+import re
+import threading
+import time
+import zlib
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, List, Optional, Tuple
+
+MOVES = (
+    "e4 e5 Nf3 Nc6 Bb5 a6 Ba4 Nf6 O-O Be7 Re1 b5 Bb3 d6 c3 O-O h3 Nb8 d4 Nbd7 "
+    "c4 c6 cxb5 axb5 Nc3 Bb7 Bg5 b4 Nb1 h6 Bh4 c5 dxe5 Nxe4 Bxe7 Qxe7 exd6 Qf6 "
+    "Nbd2 Nxd6 Nc4 Nxc4 Bxc4 Nb6 Ne5 Rae8 Bxf7+ Rxf7 Nxf7 Rxe1+ Qxe1 Kxf7"
+).split()
+
+
+def player_name(index: int) -> str:
+    """Username of the synthetic player at `index`."""
+    return f"player{index}"
+
+
+def player_index(username: str) -> int:
+    """Index of a synthetic player from its username."""
+    return int(username.removeprefix("player"))
+
+
+def ring_opponents(num_players: int, fanout: int) -> Callable[[str], List[str]]:
+    """Symmetric opponent graph where neighbours share most of their opponents."""
+
+    steps = [step for offset in range(1, fanout // 2 + 1) for step in (offset, -offset)]
+
+    def opponents(username: str) -> List[str]:
+        index = player_index(username)
+        return [player_name((index + step) % num_players) for step in steps]
+
+    return opponents
+
+
+def random_opponents(
+    num_players: int, fanout: int, seed: int = 0
+) -> Callable[[str], List[str]]:
+    """Symmetric random opponent graph with about `fanout` opponents per player."""
+    rng = random.Random(seed)
+    graph: List[set] = [set() for _ in range(num_players)]
+    for index in range(num_players):
+        for other in rng.sample(range(num_players), fanout // 2):
+            if other != index:
+                graph[index].add(other)
+                graph[other].add(index)
+
+    def opponents(username: str) -> List[str]:
+        return [player_name(other) for other in sorted(graph[player_index(username)])]
+
+    return opponents
+
+
+def synthetic_pgn(white: str, black: str, rng: random.Random, moves: int) -> str:
+    """Build a chess.com style PGN with `[%clk]` annotations."""
+    clocks = [600.0, 600.0]
+    body = []
+    for ply, san in enumerate(MOVES[:moves]):
+        clocks[ply % 2] = max(0.1, clocks[ply % 2] - rng.uniform(0.5, 25.0))
+        seconds = clocks[ply % 2]
+        clock = f"{int(seconds // 3600)}:{int(seconds % 3600 // 60):02d}:{seconds % 60:04.1f}"
+        prefix = f"{ply // 2 + 1}. " if ply % 2 == 0 else f"{ply // 2 + 1}... "
+        body.append(f"{prefix}{san} {{[%clk {clock}]}}")
+    headers = {
+        "Event": "Live Chess",
+        "Site": "Chess.com",
+        "White": white,
+        "Black": black,
+        "Result": "1-0",
+        "ECO": "C92",
+        "TimeControl": "600",
+        "Termination": f"{white} won by resignation",
+    }
+    header_text = "\n".join(f'[{key} "{value}"]' for key, value in headers.items())
+    return f"{header_text}\n\n{' '.join(body)} 1-0\n"
+
+
+def synthetic_game(white: str, black: str, seed: int, end_time: int) -> dict:
+    """Build one game payload as returned by the monthly archive endpoint."""
+    rng = random.Random(seed)
+    white_result, black_result = rng.choice(
+        [("win", "resigned"), ("checkmated", "win"), ("agreed", "agreed")]
+    )
+    uuid = f"{seed:032x}"
+    return {
+        "url": f"https://www.chess.com/game/live/{seed}",
+        "pgn": synthetic_pgn(white, black, rng, rng.randint(20, len(MOVES))),
+        "time_control": "600",
+        "end_time": end_time,
+        "rated": True,
+        "accuracies": {"white": rng.uniform(60, 99), "black": rng.uniform(60, 99)},
+        "uuid": uuid,
+        "initial_setup": "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+        "fen": "8/8/8/8/8/8/8/8 w - - 0 1",
+        "start_time": end_time - rng.randint(60, 1200),
+        "time_class": "rapid",
+        "rules": "chess",
+        "white": {
+            "rating": 1500 + rng.randint(0, 1000),
+            "result": white_result,
+            "@id": f"https://api.chess.com/pub/player/{white}",
+            "username": white,
+            "uuid": f"w{uuid[1:]}",
+        },
+        "black": {
+            "rating": 1500 + rng.randint(0, 1000),
+            "result": black_result,
+            "@id": f"https://api.chess.com/pub/player/{black}",
+            "username": black,
+            "uuid": f"b{uuid[1:]}",
+        },
+        "eco": "https://www.chess.com/openings/Ruy-Lopez-Opening",
+    }
+
+
+class StandInServer:
+    """Threaded HTTP server that mimics the chess.com endpoints used by the app.
+
+    Args:
+        num_players (int): Number of synthetic players `player0..playerN-1`.
+        fanout (int): Opponents per player per month.
+        months (List[Tuple[int, int]]): Archive months available for every player.
+        latency (float): Seconds of simulated server time per request.
+        opponents (Callable[[str], List[str]], optional): Overrides the opponent graph.
+
+    Every 200 response carries an `ETag` and `Last-Modified`, and requests whose
+    `If-None-Match` still matches are answered with 304 Not Modified. Bump
+    `revision` to change every profile, like a player coming back online.
+    """
+
+    def __init__(
+        self,
+        num_players: int = 1000,
+        fanout: int = 10,
+        months: Optional[List[Tuple[int, int]]] = None,
+        latency: float = 0.0,
+        opponents: Optional[Callable[[str], List[str]]] = None,
+    ):
+        self.num_players = num_players
+        self.months = months or [(2024, 10)]
+        self.latency = latency
+        self.opponents = opponents or ring_opponents(num_players, fanout)
+        self.requests: Counter = Counter()
+        self.revision = 0
+        self.last_modified = "Fri, 01 Nov 2024 00:00:00 GMT"
+        self._throttled = 0
+        self._retry_after: Optional[str] = None
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        """Base URL to use in place of `https://api.chess.com/pub`."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "StandInServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def throttle(self, count: int, retry_after: Optional[str] = None) -> None:
+        """Answer the next `count` requests with 429 Too Many Requests."""
+        with self._lock:
+            self._throttled = count
+            self._retry_after = retry_after
+
+    def profile(self, username: str) -> dict:
+        index = player_index(username)
+        return {
+            "player_id": index,
+            "@id": f"https://api.chess.com/pub/player/{username}",
+            "url": f"https://www.chess.com/member/{username}",
+            "name": username.title(),
+            "username": username,
+            "followers": index % 97,
+            "country": "https://api.chess.com/pub/country/US",
+            "last_online": 1730000000 + self.revision,
+            "joined": 1500000000,
+            "status": "basic",
+            "is_streamer": False,
+            "verified": False,
+            "league": "Wood",
+        }
+
+    def stats(self, username: str) -> dict:
+        rating = 1500 + player_index(username) * 37 % 1000
+        return {
+            "chess_rapid": {
+                "last": {"rating": rating, "date": 1730000000, "rd": 50},
+                "best": {"rating": rating + 50, "date": 1720000000},
+                "record": {"win": 10, "loss": 10, "draw": 2},
+            }
+        }
+
+    def archives(self, username: str) -> dict:
+        return {
+            "archives": [
+                f"https://api.chess.com/pub/player/{username}/games/{year}/{month:02d}"
+                for year, month in self.months
+            ]
+        }
+
+    def games(self, username: str, year: int, month: int) -> dict:
+        games = []
+        end_time = int(time.mktime((year, month, 1, 12, 0, 0, 0, 0, -1)))
+        for number, opponent in enumerate(self.opponents(username)):
+            white, black = sorted((username, opponent))
+            seed = zlib.crc32(f"{white}/{black}/{year}/{month}".encode())
+            games.append(synthetic_game(white, black, seed, end_time + number * 60))
+        return {"games": games}
+
+    def route(self, path: str) -> Optional[Tuple[str, object]]:
+        """Return `(kind, body)` for a request path, or None for a 404."""
+        routes: List[Tuple[str, str, Callable]] = [
+            ("profile", r"/player/(\w+)", self.profile),
+            ("stats", r"/player/(\w+)/stats", self.stats),
+            ("archives", r"/player/(\w+)/games/archives", self.archives),
+            (
+                "games",
+                r"/player/(\w+)/games/(\d{4})/(\d{2})",
+                lambda u, y, m: self.games(u, int(y), int(m)),
+            ),
+            (
+                "pgn",
+                r"/player/(\w+)/games/(\d{4})/(\d{2})/pgn",
+                lambda u, y, m: "\n\n".join(
+                    game["pgn"] for game in self.games(u, int(y), int(m))["games"]
+                ),
+            ),
+        ]
+        for kind, pattern, build in routes:
+            if match := re.fullmatch(pattern, path):
+                try:
+                    player_index(match.group(1))
+                except ValueError:
+                    return None
+                return kind, build(*match.groups())
+        return None
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                if server.latency:
+                    time.sleep(server.latency)
+                with server._lock:
+                    throttled = server._throttled > 0
+                    server._throttled -= throttled
+                if throttled:
+                    server.requests["429"] += 1
+                    headers = {"Retry-After": server._retry_after}
+                    self.respond(429, {"message": "Too Many Requests"}, headers)
+                    return
+                routed = server.route(self.path)
+                if routed is None:
+                    with server._lock:
+                        server.requests["404"] += 1
+                    self.respond(404, {"code": 0, "message": "Not found"})
+                    return
+                kind, body = routed
+                payload = (body if isinstance(body, str) else json.dumps(body)).encode()
+                headers = {
+                    "ETag": f'"{zlib.crc32(payload):08x}"',
+                    "Last-Modified": server.last_modified,
+                }
+                modified = self.headers.get("If-None-Match") != headers["ETag"]
+                with server._lock:
+                    server.requests[kind if modified else "304"] += 1
+                if modified:
+                    self.respond(200, payload, headers)
+                else:
+                    self.respond(304, b"", headers)
+
+            def respond(self, status: int, body, headers: Optional[dict] = None):
+                if isinstance(body, bytes):
+                    payload = body
+                elif isinstance(body, str):
+                    payload = body.encode()
+                else:
+                    payload = json.dumps(body).encode()
+                self.send_response(status)
+                for key, value in (headers or {}).items():
+                    if value is not None:
+                        self.send_header(key, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args) -> None:
+                pass
+
+        return Handler
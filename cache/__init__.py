@@ -1,3 +1,14 @@
-from cache.main import cache
+from cache.main import CacheStats, cache, cache_stats, memory_stats
+from cache.policy import TTL, CachePolicy, Forever, MonthlyArchive, NotModified
 
-__all__ = ["cache"]
+__all__ = [
+    "cache",
+    "cache_stats",
+    "memory_stats",
+    "CacheStats",
+    "CachePolicy",
+    "Forever",
+    "MonthlyArchive",
+    "NotModified",
+    "TTL",
+]
@@ -0,0 +1,314 @@
+"""Storage backends for the cache decorator."""
+
+import atexit
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+
+class CacheBackend(ABC):
+    """Key-value store for serialized cache entries, grouped by namespace."""
+
+    @abstractmethod
+    def get(self, namespace: str, key: str) -> Optional[bytes]:
+        """Return the stored value, or None if missing."""
+
+    @abstractmethod
+    def set(self, namespace: str, key: str, value: bytes) -> None:
+        """Store a value, replacing any previous one."""
+
+    @abstractmethod
+    def items(self) -> Iterator[Tuple[str, str, bytes]]:
+        """Iterate over every `(namespace, key, value)` in the store."""
+
+    @abstractmethod
+    def purge(self, namespace: str, before: float) -> int:
+        """Delete a namespace's entries stored before the timestamp `before`.
+
+        Returns:
+            int: Number of entries deleted.
+        """
+
+    def flush(self) -> None:
+        """Persist buffered writes, if the backend buffers any."""
+
+    def close(self) -> None:
+        """Flush and release resources."""
+        self.flush()
+
+
+class JSONFileBackend(CacheBackend):
+    """One JSON file per entry, at `<root>/<namespace>/<key[:2]>/<key>.json`."""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, namespace: str, key: str) -> Path:
+        return self.root / namespace / key[:2] / f"{key}.json"
+
+    def get(self, namespace: str, key: str) -> Optional[bytes]:
+        try:
+            return self._path(namespace, key).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def set(self, namespace: str, key: str, value: bytes) -> None:
+        """Write atomically, so readers never see a partial file."""
+        path = self._path(namespace, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            dir=path.parent, suffix=".tmp", delete=False
+        ) as file:
+            file.write(value)
+        os.replace(file.name, path)
+
+    def items(self) -> Iterator[Tuple[str, str, bytes]]:
+        for path in sorted(self.root.glob("*/*/*.json")):
+            yield path.parent.parent.name, path.stem, path.read_bytes()
+
+    def purge(self, namespace: str, before: float) -> int:
+        deleted = 0
+        for path in (self.root / namespace).glob("*/*.json"):
+            try:
+                if path.stat().st_mtime < before:
+                    path.unlink()
+                    deleted += 1
+            except FileNotFoundError:
+                pass  # Replaced or purged by another process meanwhile
+        return deleted
+
+
+class SQLiteBackend(CacheBackend):
+    """Single-file SQLite store in WAL mode with batched writes.
+
+    Writes are buffered and committed in one transaction once `batch_size`
+    entries are pending or `flush_interval` seconds have passed. Buffered
+    entries are visible to `get` straight away. Several processes, such as
+    gunicorn workers, can share one file.
+
+    Args:
+        path (Path): Database file.
+        batch_size (int): Pending writes that trigger a commit.
+        flush_interval (float): Maximum seconds a write stays buffered.
+        max_bytes (int): Evict the oldest entries once the file holds more
+            than this many bytes of pages. 0 means unbounded.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        batch_size: int = 64,
+        flush_interval: float = 1.0,
+        max_bytes: int = 0,
+    ):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+
+        self._lock = threading.RLock()
+        self._pending: Dict[Tuple[str, str], bytes] = {}
+        self._timer: Optional[threading.Timer] = None
+        self._connection = sqlite3.connect(
+            self.path, check_same_thread=False, isolation_level=None, timeout=30
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " namespace TEXT NOT NULL,"
+            " key TEXT NOT NULL,"
+            " value BLOB NOT NULL,"
+            " stored_at REAL NOT NULL,"
+            " PRIMARY KEY (namespace, key)"
+            ") WITHOUT ROWID"
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS entries_stored_at ON entries (stored_at)"
+        )
+        atexit.register(self.close)
+
+    @property
+    def size(self) -> int:
+        """Bytes of pages in use, excluding pages freed by deletions."""
+        page_size, page_count, freelist_count = (
+            self._connection.execute(f"PRAGMA {pragma}").fetchone()[0]
+            for pragma in ("page_size", "page_count", "freelist_count")
+        )
+        return page_size * (page_count - freelist_count)
+
+    def get(self, namespace: str, key: str) -> Optional[bytes]:
+        with self._lock:
+            if (namespace, key) in self._pending:
+                return self._pending[(namespace, key)]
+            row = self._connection.execute(
+                "SELECT value FROM entries WHERE namespace = ? AND key = ?",
+                (namespace, key),
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, namespace: str, key: str, value: bytes) -> None:
+        with self._lock:
+            self._pending[(namespace, key)] = value
+            if len(self._pending) >= self.batch_size:
+                self.flush()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._pending:
+                return
+            now = time.time()
+            rows = [(ns, key, value, now) for (ns, key), value in self._pending.items()]
+            # Take the write lock up front, so concurrent writers queue on
+            # `timeout` instead of failing to upgrade a read lock.
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                self._connection.executemany(
+                    "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)", rows
+                )
+                self._connection.execute("COMMIT")
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+            self._pending.clear()
+            if self.max_bytes and self.size > self.max_bytes:
+                self.evict()
+
+    def evict(self, target: float = 0.9) -> int:
+        """Delete the oldest entries until the file is under `target` of its cap.
+
+        Returns:
+            int: Number of entries deleted.
+        """
+        deleted = 0
+        with self._lock:
+            while self.size > self.max_bytes * target:
+                (count,) = self._connection.execute(
+                    "SELECT COUNT(*) FROM entries"
+                ).fetchone()
+                if count == 0:
+                    break
+                cursor = self._connection.execute(
+                    "DELETE FROM entries WHERE (namespace, key) IN ("
+                    " SELECT namespace, key FROM entries ORDER BY stored_at LIMIT ?"
+                    ")",
+                    (max(1, count // 10),),
+                )
+                deleted += cursor.rowcount
+        return deleted
+
+    def items(self) -> Iterator[Tuple[str, str, bytes]]:
+        self.flush()
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT namespace, key, value FROM entries ORDER BY namespace, key"
+            ).fetchall()
+        yield from rows
+
+    def purge(self, namespace: str, before: float) -> int:
+        # Pending writes are newer than any committed entry, so they are kept
+        with self._lock:
+            return self._connection.execute(
+                "DELETE FROM entries WHERE namespace = ? AND stored_at < ?",
+                (namespace, before),
+            ).rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is None:
+                return
+            self.flush()
+            self._connection.close()
+            self._connection = None
+        atexit.unregister(self.close)
+
+
+class InMemoryBackend(CacheBackend):
+    """Process-local dictionary store, e.g. to stand in for a remote tier in tests."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple[str, str], bytes] = {}
+        self._stored_at: Dict[Tuple[str, str], float] = {}
+
+    def get(self, namespace: str, key: str) -> Optional[bytes]:
+        with self._lock:
+            return self._entries.get((namespace, key))
+
+    def set(self, namespace: str, key: str, value: bytes) -> None:
+        with self._lock:
+            self._entries[(namespace, key)] = value
+            self._stored_at[(namespace, key)] = time.time()
+
+    def items(self) -> Iterator[Tuple[str, str, bytes]]:
+        with self._lock:
+            entries = sorted(self._entries.items())
+        for (namespace, key), value in entries:
+            yield namespace, key, value
+
+    def purge(self, namespace: str, before: float) -> int:
+        with self._lock:
+            expired = [
+                entry
+                for entry, stored_at in self._stored_at.items()
+                if entry[0] == namespace and stored_at < before
+            ]
+            for entry in expired:
+                del self._entries[entry], self._stored_at[entry]
+        return len(expired)
+
+
+class TieredBackend(CacheBackend):
+    """Instance-local store in front of a shared remote store.
+
+    Reads try `local` first and copy remote hits into it. Writes go to both,
+    so other instances find the entry in the remote tier.
+
+    Args:
+        local (CacheBackend): Fast store shared by the workers of an instance.
+        remote (CacheBackend): Slower store shared by every instance.
+    """
+
+    def __init__(self, local: CacheBackend, remote: CacheBackend):
+        self.local = local
+        self.remote = remote
+
+    def get(self, namespace: str, key: str) -> Optional[bytes]:
+        if (value := self.local.get(namespace, key)) is not None:
+            return value
+        if (value := self.remote.get(namespace, key)) is not None:
+            self.local.set(namespace, key, value)
+        return value
+
+    def set(self, namespace: str, key: str, value: bytes) -> None:
+        self.local.set(namespace, key, value)
+        self.remote.set(namespace, key, value)
+
+    def items(self) -> Iterator[Tuple[str, str, bytes]]:
+        return self.remote.items()
+
+    def purge(self, namespace: str, before: float) -> int:
+        self.local.purge(namespace, before)
+        return self.remote.purge(namespace, before)
+
+    def flush(self) -> None:
+        self.local.flush()
+        self.remote.flush()
+
+    def close(self) -> None:
+        self.local.close()
+        self.remote.close()
@@ -0,0 +1,182 @@
+"""Transparent compression of cached payloads with zlib preset dictionaries.
+
+Monthly archives repeat the same JSON keys, URLs and PGN headers in every
+game, which a preset dictionary lets zlib reference from the first byte.
+A compressed payload starts with `DICTIONARY_MARKER` and the 4-byte id of its
+dictionary, so dictionaries can be retrained without invalidating old entries.
+
+Usage: `python -m cache.compression [--namespace get_player_games_by_month]`
+trains a dictionary on the cached entries of `CACHE_DIR`. The newest trained
+dictionary compresses new entries, older ones are kept to read old entries.
+"""
+
+import argparse
+import os
+import re
+import struct
+import zlib
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Sequence
+
+COMPRESS_MIN_BYTES = int(os.getenv("CACHE_COMPRESS_MIN_BYTES", "1024"))
+COMPRESS_LEVEL = int(os.getenv("CACHE_COMPRESS_LEVEL", "6"))
+DICTIONARY_SIZE = 32 * 1024
+"""zlib only looks back 32 KiB, so a larger dictionary is never referenced."""
+DICTIONARY_PATTERN = "zdict-*.bin"
+DICTIONARY_MARKER = b"z"
+CHUNK_SIZE = 64 * 1024
+
+SEED_DICTIONARY = (
+    b'"initial_setup":"rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",'
+    b'"rules":"chess","time_class":"blitz","time_class":"bullet",'
+    b'"time_class":"rapid","time_class":"daily","time_control":"180+2",'
+    b'"time_control":"600","time_control":"60","rated":true,"rated":false,'
+    b'"accuracies":{"white":,"black":},"tcn":"","uuid":"","fen":"'
+    b'"result":"timeout","result":"resigned","result":"checkmated",'
+    b'"result":"agreed","result":"repetition","result":"stalemate",'
+    b'"result":"insufficient","result":"timevsinsufficient","result":"abandoned",'
+    b'"eco":"https://www.chess.com/openings/'
+    b'\\n[Event \\"Live Chess\\"]\\n[Site \\"Chess.com\\"]\\n[Date \\"'
+    b'\\"]\\n[Round \\"-\\"]\\n[White \\"\\"]\\n[Black \\"\\"]\\n[Result \\"'
+    b'\\"]\\n[CurrentPosition \\"\\"]\\n[Timezone \\"UTC\\"]\\n[ECO \\"'
+    b'\\"]\\n[ECOUrl \\"https://www.chess.com/openings/\\"]\\n[UTCDate \\"'
+    b'\\"]\\n[UTCTime \\"\\"]\\n[WhiteElo \\"\\"]\\n[BlackElo \\"\\"]\\n'
+    b'[TimeControl \\"\\"]\\n[Termination \\" won by resignation\\"]\\n'
+    b'[Termination \\" won on time\\"]\\n[Termination \\" won by checkmate\\"]\\n'
+    b'[Termination \\"Game drawn by agreement\\"]\\n[StartTime \\"'
+    b'\\"]\\n[EndDate \\"\\"]\\n[EndTime \\"\\"]\\n[Link \\"'
+    b'https://www.chess.com/game/live/\\"]\\n\\n1. e4 {[%clk 0:0'
+    b"}] 1... e5 {[%clk 0:0}] 2. Nf3 {[%clk 0:0}] 2... Nc6 {[%clk 0:0"
+    b'}] 3. d4 {[%clk 0:0}] 1... d5 {[%clk 0:0}] 1-0\\n","pgn":"'
+    b'"white":{"rating":,"result":"win","@id":"https://api.chess.com/pub/player/'
+    b'","username":"","uuid":""},"black":{"rating":,"result":"win",'
+    b'"@id":"https://api.chess.com/pub/player/","username":"","uuid":""},'
+    b'"end_time":,"start_time":,"url":"https://www.chess.com/game/live/'
+)
+"""Built-in dictionary of the structure shared by every chess.com game."""
+
+_SEGMENT = re.compile(rb'[^,:{}\[\]"\\]+|\\["n]|[,:{}\[\]"]')
+
+
+def dictionary_id(dictionary: bytes) -> int:
+    """Stable id of a dictionary, stored in front of the data it compressed."""
+    return zlib.crc32(dictionary)
+
+
+class Compressor:
+    """Compresses payloads of at least `min_bytes` with a preset dictionary.
+
+    Every known dictionary can decompress; only the last one compresses.
+
+    Args:
+        dictionaries (List[bytes]): Trained dictionaries, oldest first.
+        min_bytes (int): Payloads below this size are kept as is.
+        level (int): zlib compression level.
+    """
+
+    def __init__(
+        self,
+        dictionaries: Sequence[bytes] = (),
+        min_bytes: int = COMPRESS_MIN_BYTES,
+        level: int = COMPRESS_LEVEL,
+    ):
+        self.min_bytes = min_bytes
+        self.level = level
+        self._dictionaries: Dict[int, bytes] = {}
+        for dictionary in (SEED_DICTIONARY, *dictionaries):
+            self.dictionary_id = self.register(dictionary)
+
+    def register(self, dictionary: bytes) -> int:
+        """Make a dictionary available for decompression and return its id."""
+        dictionary = dictionary[-DICTIONARY_SIZE:]
+        self._dictionaries[dictionary_id(dictionary)] = dictionary
+        return dictionary_id(dictionary)
+
+    def compress(self, payload: bytes) -> bytes:
+        """Compress a JSON payload, or return it unchanged if it is small."""
+        if len(payload) < self.min_bytes:
+            return payload
+        dictionary = self._dictionaries[self.dictionary_id]
+        compressor = zlib.compressobj(self.level, zdict=dictionary)
+        compressed = compressor.compress(payload) + compressor.flush()
+        header = DICTIONARY_MARKER + struct.pack(">I", self.dictionary_id)
+        return header + compressed if len(compressed) < len(payload) else payload
+
+    def decompress(self, value: bytes) -> bytes:
+        """Return the JSON payload of a compressed or uncompressed value."""
+        return b"".join(self.iter_decompress(value))
+
+    def iter_decompress(self, value: bytes) -> Iterator[bytes]:
+        """Inflate a value in chunks of at most `CHUNK_SIZE` bytes."""
+        if not value.startswith(DICTIONARY_MARKER):
+            yield value
+            return
+        (key,) = struct.unpack_from(">I", value, len(DICTIONARY_MARKER))
+        if (dictionary := self._dictionaries.get(key)) is None:
+            raise zlib.error(f"Unknown compression dictionary {key:08x}.")
+        decompressor = zlib.decompressobj(zdict=dictionary)
+        data = memoryview(value)[len(DICTIONARY_MARKER) + 4 :]
+        while data:
+            yield decompressor.decompress(data, CHUNK_SIZE)
+            data = decompressor.unconsumed_tail
+        yield decompressor.flush()
+
+
+def train_dictionary(samples: Iterable[bytes], size: int = DICTIONARY_SIZE) -> bytes:
+    """Build a preset dictionary from the segments shared by many samples.
+
+    Segments are scored by how many samples contain them times their length,
+    and the best ones are placed last, where zlib references them cheapest.
+    """
+    frequency: Counter = Counter()
+    for sample in samples:
+        frequency.update(
+            {segment for segment in _SEGMENT.findall(sample) if len(segment) > 3}
+        )
+    scored = sorted(
+        (count * len(segment), segment)
+        for segment, count in frequency.items()
+        if count > 1
+    )
+    chosen, total = [], 0
+    for _, segment in reversed(scored):
+        if total + len(segment) > size:
+            continue
+        chosen.append(segment)
+        total += len(segment)
+    return b"".join(reversed(chosen))
+
+
+def load_dictionaries(root: Path) -> List[bytes]:
+    """Return the dictionaries trained under `root`, oldest first."""
+    paths = sorted(Path(root).glob(DICTIONARY_PATTERN), key=lambda p: p.stat().st_mtime)
+    return [path.read_bytes() for path in paths]
+
+
+def main():
+    """Train a dictionary on the local cache from the command line."""
+    from cache.main import CACHE_DIR, decode_entry, encode, get_backend
+
+    parser = argparse.ArgumentParser(description="Train a compression dictionary.")
+    parser.add_argument("--namespace", default="get_player_games_by_month")
+    parser.add_argument("--samples", type=int, default=1000)
+    args = parser.parse_args()
+
+    samples = []
+    for namespace, _, value in get_backend().items():
+        if namespace == args.namespace and len(samples) < args.samples:
+            samples.append(encode(decode_entry(value).data))
+    if not samples:
+        parser.error(f"No cached {args.namespace} entries to train on.")
+    dictionary = train_dictionary(samples)
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    path = CACHE_DIR / DICTIONARY_PATTERN.replace(
+        "*", f"{dictionary_id(dictionary):08x}"
+    )
+    path.write_bytes(dictionary)
+    print(f"Trained a {len(dictionary)} byte dictionary on {len(samples)} entries.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,58 +1,438 @@
 """Cache module aimed to contain all the data storage and retrieval logic."""
 
+import asyncio
+import atexit
+import hashlib
+import importlib
+import inspect
 import json
 import os
+import threading
+import time
+import zlib
+from concurrent.futures import Future
+from contextvars import Token
+from dataclasses import dataclass, replace
 from functools import wraps
 from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+from cache.backends import CacheBackend, JSONFileBackend, SQLiteBackend, TieredBackend
+from cache.compression import Compressor, load_dictionaries
+from cache.memory import MemoryCache, MemoryStats
+from cache.policy import CachePolicy, Forever, NotModified, Revalidation, revalidation
 
 IS_GCP = (
     os.getenv("GAE_ENV") is not None or os.getenv("GOOGLE_CLOUD_PROJECT") is not None
 )
+# App Engine only allows writes to /tmp, which is held in the instance's memory,
+# so the cache is kept small there.
+DEFAULT_CACHE_DIR = "/tmp/data_cache" if IS_GCP else "data_cache"
+DEFAULT_MAX_BYTES = 128 * 1024 * 1024 if IS_GCP else 0
+DEFAULT_MEMORY_BYTES = (16 if IS_GCP else 64) * 1024 * 1024
+
+CACHE_DIR = Path(os.getenv("CACHE_DIR", DEFAULT_CACHE_DIR))
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "sqlite")
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(DEFAULT_MAX_BYTES)))
+CACHE_MEMORY_ENTRIES = int(os.getenv("CACHE_MEMORY_ENTRIES", "4096"))
+CACHE_MEMORY_BYTES = int(os.getenv("CACHE_MEMORY_BYTES", str(DEFAULT_MEMORY_BYTES)))
+CACHE_REMOTE = os.getenv("CACHE_REMOTE")
+"""Optional `module:factory` returning the remote tier, a `CacheBackend`."""
+
+BACKENDS: Dict[str, Callable[[Path], CacheBackend]] = {
+    "sqlite": lambda root: SQLiteBackend(
+        root / "cache.sqlite3", max_bytes=CACHE_MAX_BYTES
+    ),
+    "json": JSONFileBackend,
+}
+
+REGISTRY: Dict[str, Callable] = {}
+"""Cached functions by namespace, used to interpret stored keys."""
+
+_backend: Optional[CacheBackend] = None
+_backend_lock = threading.Lock()
+_memory = MemoryCache(CACHE_MEMORY_ENTRIES, CACHE_MEMORY_BYTES)
+_compressor = Compressor(load_dictionaries(CACHE_DIR))
+
+
+def load_remote(spec: str) -> CacheBackend:
+    """Build a remote tier from a `module:factory` specification."""
+    module, _, factory = spec.partition(":")
+    return getattr(importlib.import_module(module), factory)()
+
+
+def get_backend() -> CacheBackend:
+    """Return the active backend, creating the configured one on first use."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = BACKENDS[CACHE_BACKEND](CACHE_DIR)
+            if CACHE_REMOTE:
+                _backend = TieredBackend(_backend, load_remote(CACHE_REMOTE))
+        return _backend
+
+
+def _after_fork() -> None:
+    """Drop the parent's backend, whose connections must not cross a fork."""
+    global _backend, _backend_lock
+    _backend_lock = threading.Lock()
+    if _backend is not None:
+        atexit.unregister(_backend.close)
+        if isinstance(_backend, TieredBackend):
+            atexit.unregister(_backend.local.close)
+            atexit.unregister(_backend.remote.close)
+    _backend = None
+
+
+os.register_at_fork(after_in_child=_after_fork)
+
+
+def set_backend(backend: CacheBackend) -> None:
+    """Replace the active backend, e.g. to point the cache somewhere else."""
+    global _backend
+    with _backend_lock:
+        if _backend is not None and _backend is not backend:
+            _backend.close()
+        _backend = backend
+    _memory.clear()
+
+
+def make_key(args: tuple, kwargs: dict) -> str:
+    """Hash call arguments into a collision-free key.
+
+    Arguments are compared by `str`, as the JSON-file layout always did, so
+    `("2024", "10")` and `(2024, 10)` share an entry.
+    """
+    canonical = json.dumps(
+        [[str(arg) for arg in args], sorted((k, str(v)) for k, v in kwargs.items())],
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def encode(data: dict) -> bytes:
+    """Serialize a cached value."""
+    return json.dumps(data, separators=(",", ":")).encode()
+
+
+def decode(value: bytes) -> dict:
+    """Deserialize a cached value."""
+    return json.loads(value)
+
+
+@dataclass
+class CacheEntry:
+    """A cached value with the metadata needed to judge and refresh it."""
+
+    data: dict
+    stored_at: float = 0.0
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+ENTRY_HEADER = b"#"
+"""Prefix of an entry's metadata line, which never starts a JSON object."""
+
+
+def encode_entry(entry: CacheEntry) -> bytes:
+    """Serialize an entry as a metadata line followed by the compressed value."""
+    meta = {"stored_at": entry.stored_at}
+    if entry.etag is not None:
+        meta["etag"] = entry.etag
+    if entry.last_modified is not None:
+        meta["last_modified"] = entry.last_modified
+    return (
+        ENTRY_HEADER + encode(meta) + b"\n" + _compressor.compress(encode(entry.data))
+    )
+
+
+def decode_entry(value: bytes) -> CacheEntry:
+    """Deserialize an entry. Bare values are entries of unknown age."""
+    if not value.startswith(ENTRY_HEADER):
+        return CacheEntry(decode(value))
+    meta, _, payload = value[len(ENTRY_HEADER) :].partition(b"\n")
+    return CacheEntry(decode(_compressor.decompress(payload)), **decode(meta))
+
+
+@dataclass
+class CacheStats:
+    """Counters for cached calls.
+
+    `misses` are real upstream calls, `coalesced` are callers that waited on
+    another caller's in-flight upstream call for the same key. `revalidated`
+    are misses for stale entries that the upstream answered as unchanged.
+    """
+
+    hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    revalidated: int = 0
+
+
+_stats = CacheStats()
+_stats_lock = threading.Lock()
 
-if not IS_GCP:
-    CACHE_DIR = Path("data_cache")
-    CACHE_DIR.mkdir(exist_ok=True)
-else:
-    print("Running on Google Cloud Platform. Disabling cache.")
 
+def _count(field: str) -> None:
+    with _stats_lock:
+        setattr(_stats, field, getattr(_stats, field) + 1)
 
-def load_json(file_path: Path) -> dict:
-    """Load JSON data from a file."""
-    with open(file_path, "r", encoding="utf8") as file:
-        return json.load(file)
 
+def cache_stats() -> CacheStats:
+    """Return a snapshot of the cache counters."""
+    with _stats_lock:
+        return replace(_stats)
 
-def save_json(data: dict, file_path: Path) -> None:
-    """Save JSON data to a file."""
-    with open(file_path, "w", encoding="utf8") as file:
-        json.dump(data, file)
 
+def memory_stats() -> MemoryStats:
+    """Return a snapshot of the in-memory tier's counters."""
+    return _memory.stats
 
-def cache(func):
+
+class SingleFlight:
+    """Deduplicates concurrent calls for the same key across threads and loops."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Future] = {}
+
+    def claim(self, key: str) -> Tuple[Future, bool]:
+        """Return the future for `key` and whether the caller must resolve it."""
+        with self._lock:
+            if key in self._calls:
+                return self._calls[key], False
+            future = self._calls[key] = Future()
+            return future, True
+
+    def release(self, key: str, future: Future) -> None:
+        """Forget the call for `key` once `future`, its leader's, is resolved."""
+        with self._lock:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+
+    def abandon(self, key: str, future: Future) -> None:
+        """Release `key` and wake its followers to retry, as the leader quit."""
+        self.release(key, future)
+        future.set_exception(LeaderAbandoned())
+
+
+class LeaderAbandoned(Exception):
+    """Tells coalesced callers that the call they waited on was cancelled.
+
+    The leader's cancellation, or interruption, is its own: followers retry,
+    one of them taking over as the new leader.
     """
-    Cache the results of a function.
-    JSON logic can be replaced with DB solutions (i.e. MongoDB)
+
+
+_in_flight = SingleFlight()
+
+
+def _load(namespace: str, key: str) -> Optional[CacheEntry]:
+    """Load a cached entry from memory or the backend, or None if missing."""
+    if (value := _memory.get(namespace, key)) is None:
+        if (value := get_backend().get(namespace, key)) is None:
+            return None
+        _memory.set(namespace, key, value)
+    try:
+        return decode_entry(value)
+    except (json.JSONDecodeError, UnicodeDecodeError, TypeError, zlib.error):
+        print(f"Error loading cache for {namespace}/{key}. Recomputing...")
+    return None
+
+
+def _store(namespace: str, key: str, entry: CacheEntry) -> Optional[bytes]:
+    """Store an entry with a truthy value, returning its serialized form."""
+    if not entry.data:
+        return None
+    value = encode_entry(entry)
+    get_backend().set(namespace, key, value)
+    _memory.set(namespace, key, value)
+    return value
+
+
+def _share(future: Future, entry: CacheEntry, value: Optional[bytes]) -> None:
+    """Publish a result to coalesced callers, who each decode a private copy."""
+    if entry.data and value is None:
+        value = encode_entry(entry)
+    future.set_result(value)
+
+
+def _shared(value: Optional[bytes]) -> Optional[dict]:
+    return decode_entry(value).data if value is not None else None
+
+
+def cache(func=None, *, name: Optional[str] = None, policy: CachePolicy = Forever()):
     """
+    Cache the results of a function in the configured backend.
+
+    Coroutine functions are supported. `name` overrides the namespace, so an
+    async variant can share the entries of its synchronous counterpart.
+    Concurrent misses for the same key share one call of `func`; if the
+    caller making it is cancelled, one of the others takes over.
+
+    Entries that `policy` considers stale are recomputed with the stored
+    validators published through `cache.policy.revalidation`. If `func`
+    raises `NotModified`, the stored value is kept and marked fresh again.
+    `wrapper.is_fresh(*args, **kwargs)` tells whether a call would be served
+    from the cache, `wrapper.peek(*args, **kwargs)` returns the stored value,
+    fresh or stale, without ever calling `func`, and
+    `wrapper.expire(*args, **kwargs)` forces the next call to revalidate.
+    """
+    if func is None:
+        return lambda func: cache(func, name=name, policy=policy)
+    namespace = name or func.__name__
+    REGISTRY[namespace] = func
+    signature = inspect.signature(func)
+
+    def bind(args: tuple, kwargs: dict) -> Tuple[tuple, dict]:
+        """Pass arguments by position where possible, as keys and policies expect."""
+        bound = signature.bind(*args, **kwargs)
+        return bound.args, bound.kwargs
+
+    def fresh(args: tuple, entry: Optional[CacheEntry]) -> bool:
+        return entry is not None and policy.is_fresh(args, entry.stored_at, time.time())
+
+    def lookup(args: tuple, kwargs: dict) -> Tuple[str, Optional[dict]]:
+        key = make_key(args, kwargs)
+        if fresh(args, entry := _load(namespace, key)):
+            _count("hits")
+            return key, entry.data
+        return key, None
+
+    def begin(entry: Optional[CacheEntry]) -> Tuple[Revalidation, Token]:
+        _count("misses")
+        validators = (
+            Revalidation(entry.etag, entry.last_modified) if entry else Revalidation()
+        )
+        return validators, revalidation.set(validators)
+
+    def finish(
+        key: str, data: Optional[dict], validators: Revalidation
+    ) -> Tuple[CacheEntry, Optional[bytes]]:
+        entry = CacheEntry(data, time.time(), validators.etag, validators.last_modified)
+        return entry, _store(namespace, key, entry)
+
+    def is_fresh(*args, **kwargs) -> bool:
+        """Whether a fresh result for these arguments is cached."""
+        args, kwargs = bind(args, kwargs)
+        return fresh(args, _load(namespace, make_key(args, kwargs)))
+
+    def peek(*args, **kwargs) -> Optional[dict]:
+        """The stored result for these arguments, fresh or not, or None."""
+        args, kwargs = bind(args, kwargs)
+        entry = _load(namespace, make_key(args, kwargs))
+        return entry.data if entry is not None else None
+
+    def expire(*args, **kwargs) -> None:
+        """Mark the result for these arguments stale, so the next call revalidates."""
+        args, kwargs = bind(args, kwargs)
+        key = make_key(args, kwargs)
+        if (entry := _load(namespace, key)) is not None:
+            _store(namespace, key, replace(entry, stored_at=0.0))
+
+    if inspect.iscoroutinefunction(func):
+
+        @wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            args, kwargs = bind(args, kwargs)
+            while True:
+                key, data = lookup(args, kwargs)
+                if data is not None:
+                    return data
+
+                future, leader = _in_flight.claim(f"{namespace}/{key}")
+                if leader:
+                    return await lead(key, future, args, kwargs)
+                _count("coalesced")
+                try:
+                    # Shielded, so that cancelling this caller leaves the others
+                    return _shared(await asyncio.shield(asyncio.wrap_future(future)))
+                except LeaderAbandoned:
+                    continue
+
+        async def lead(key: str, future: Future, args: tuple, kwargs: dict):
+            try:
+                value = None
+                # A previous leader may have refreshed the entry since the lookup.
+                if fresh(args, entry := _load(namespace, key)):
+                    data = entry.data
+                else:
+                    validators, token = begin(entry)
+                    try:
+                        data = await func(*args, **kwargs) or None
+                    except NotModified:
+                        if entry is None:
+                            raise
+                        _count("revalidated")
+                        data = entry.data
+                    finally:
+                        revalidation.reset(token)
+                    entry, value = finish(key, data, validators)
+                _share(future, entry, value)
+                return data
+            except Exception as exc:
+                future.set_exception(exc)
+                raise
+            except BaseException:
+                _in_flight.abandon(f"{namespace}/{key}", future)
+                raise
+            finally:
+                _in_flight.release(f"{namespace}/{key}", future)
+
+        async_wrapper.is_fresh = is_fresh
+        async_wrapper.peek = peek
+        async_wrapper.expire = expire
+        return async_wrapper
 
     @wraps(func)
     def wrapper(*args, **kwargs):
-        if IS_GCP:  # Disable cache on GCP
-            return func(*args, **kwargs)
-        cache_key = f"{func.__name__}/{'_'.join(map(str, args))}.json"
-        cache_path = CACHE_DIR / cache_key
-        cache_path.parent.mkdir(exist_ok=True)
+        args, kwargs = bind(args, kwargs)
+        while True:
+            key, data = lookup(args, kwargs)
+            if data is not None:
+                return data
 
-        if cache_path.exists():
+            future, leader = _in_flight.claim(f"{namespace}/{key}")
+            if leader:
+                return lead_sync(key, future, args, kwargs)
+            _count("coalesced")
             try:
-                return load_json(cache_path)
-            except json.JSONDecodeError:
-                print(f"Error loading cache for {cache_path}. Recomputing...")
+                return _shared(future.result())
+            except LeaderAbandoned:
+                continue
 
-        if data := func(*args, **kwargs):
-            save_json(data, cache_path)
+    def lead_sync(key: str, future: Future, args: tuple, kwargs: dict):
+        try:
+            value = None
+            # A previous leader may have refreshed the entry since the lookup.
+            if fresh(args, entry := _load(namespace, key)):
+                data = entry.data
+            else:
+                validators, token = begin(entry)
+                try:
+                    data = func(*args, **kwargs) or None
+                except NotModified:
+                    if entry is None:
+                        raise
+                    _count("revalidated")
+                    data = entry.data
+                finally:
+                    revalidation.reset(token)
+                entry, value = finish(key, data, validators)
+            _share(future, entry, value)
             return data
-        return None
+        except Exception as exc:
+            future.set_exception(exc)
+            raise
+        except BaseException:
+            _in_flight.abandon(f"{namespace}/{key}", future)
+            raise
+        finally:
+            _in_flight.release(f"{namespace}/{key}", future)
 
+    wrapper.is_fresh = is_fresh
+    wrapper.peek = peek
+    wrapper.expire = expire
     return wrapper
 
 
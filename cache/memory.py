@@ -0,0 +1,80 @@
+"""Bounded in-process LRU tier in front of the persistent cache backend."""
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+
+@dataclass
+class MemoryStats:
+    """Counters and current size of a memory tier."""
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    entries: int = 0
+    bytes: int = 0
+
+
+class MemoryCache:
+    """Thread-safe LRU of serialized cache entries.
+
+    Values are kept in their serialized form, which is both the size estimate
+    and what protects them from mutation: every hit decodes a private copy.
+
+    Args:
+        max_entries (int): Maximum number of entries kept.
+        max_bytes (int): Maximum total size of the values kept.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Tuple[str, str], bytes] = OrderedDict()
+        self._bytes = 0
+        self._stats = MemoryStats()
+
+    @property
+    def stats(self) -> MemoryStats:
+        """A snapshot of the tier's counters."""
+        with self._lock:
+            return MemoryStats(
+                hits=self._stats.hits,
+                misses=self._stats.misses,
+                evictions=self._stats.evictions,
+                entries=len(self._entries),
+                bytes=self._bytes,
+            )
+
+    def get(self, namespace: str, key: str) -> Optional[bytes]:
+        """Return the value and mark it most recently used, or None."""
+        with self._lock:
+            value = self._entries.get((namespace, key))
+            if value is None:
+                self._stats.misses += 1
+                return None
+            self._entries.move_to_end((namespace, key))
+            self._stats.hits += 1
+            return value
+
+    def set(self, namespace: str, key: str, value: bytes) -> None:
+        """Store a value, evicting least recently used entries to make room."""
+        if len(value) > self.max_bytes or self.max_entries < 1:
+            return
+        with self._lock:
+            if (old := self._entries.pop((namespace, key), None)) is not None:
+                self._bytes -= len(old)
+            self._entries[(namespace, key)] = value
+            self._bytes += len(value)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self._stats.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
@@ -0,0 +1,85 @@
+"""Import a legacy `data_cache/<function>/<args joined by _>.json` tree into a backend.
+
+Usage: `python -m cache.migrate [source] [--backend sqlite|json] [--target dir]`
+"""
+
+import argparse
+import inspect
+import json
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+from cache.backends import CacheBackend
+from cache.main import BACKENDS, CACHE_DIR, REGISTRY, CacheEntry, encode_entry, make_key
+
+
+def _arity(func: Callable) -> int:
+    """Number of positional parameters that made up a legacy file name."""
+    return sum(
+        param.kind in (param.POSITIONAL_ONLY, param.POSITIONAL_OR_KEYWORD)
+        and param.default is param.empty
+        for param in inspect.signature(func).parameters.values()
+    )
+
+
+def parse_legacy_name(stem: str, arity: int) -> Optional[Tuple[str, ...]]:
+    """Recover call arguments from a legacy file name.
+
+    Usernames may contain underscores, but only the first argument is a
+    username, so the name is split from the right. The other arguments are
+    years and months, read back as ints so that `09` matches the key of the
+    app's calls with `9`.
+    """
+    args = tuple(stem.rsplit("_", arity - 1)) if arity > 1 else (stem,)
+    if len(args) != arity:
+        return None
+    return args[:1] + tuple(int(arg) if arg.isdigit() else arg for arg in args[1:])
+
+
+def migrate(
+    source: Path, backend: CacheBackend, registry: Dict[str, Callable] = REGISTRY
+) -> Dict[str, int]:
+    """Copy every legacy entry under `source` into `backend`.
+
+    Returns:
+        Dict[str, int]: Counts of `migrated` and `skipped` files.
+    """
+    counts = {"migrated": 0, "skipped": 0}
+    for path in sorted(Path(source).glob("*/*.json")):
+        namespace = path.parent.name
+        func = registry.get(namespace)
+        args = parse_legacy_name(path.stem, _arity(func)) if func else None
+        try:
+            data = json.loads(path.read_text(encoding="utf8"))
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            data = None
+        if args is None or not data:
+            print(f"Skipping {path}.")
+            counts["skipped"] += 1
+            continue
+        # The file's age stands in for when the entry was stored.
+        entry = CacheEntry(data, stored_at=path.stat().st_mtime)
+        backend.set(namespace, make_key(args, {}), encode_entry(entry))
+        counts["migrated"] += 1
+    backend.flush()
+    return counts
+
+
+def main():
+    """Run the migration from the command line."""
+    import extraction.api  # noqa: F401 Registers the cached API functions
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("source", nargs="?", type=Path, default=CACHE_DIR)
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="sqlite")
+    parser.add_argument("--target", type=Path, default=CACHE_DIR)
+    args = parser.parse_args()
+
+    backend = BACKENDS[args.backend](args.target)
+    counts = migrate(args.source, backend)
+    backend.close()
+    print(f"Migrated {counts['migrated']} entries, skipped {counts['skipped']}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Freshness policies and conditional revalidation for cached calls."""
+
+import os
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional
+
+CURRENT_MONTH_TTL = float(os.getenv("CACHE_CURRENT_MONTH_TTL", str(15 * 60)))
+PROFILE_TTL = float(os.getenv("CACHE_PROFILE_TTL", str(24 * 60 * 60)))
+
+
+class CachePolicy:
+    """Decides whether a stored entry can be served without revalidation."""
+
+    def is_fresh(self, args: tuple, stored_at: float, now: float) -> bool:
+        """Whether an entry for `args` stored at `stored_at` is fresh at `now`."""
+        raise NotImplementedError
+
+
+class Forever(CachePolicy):
+    """Entries never go stale."""
+
+    def is_fresh(self, args: tuple, stored_at: float, now: float) -> bool:
+        return True
+
+
+@dataclass
+class TTL(CachePolicy):
+    """Entries go stale `seconds` after they were stored."""
+
+    seconds: float
+
+    def is_fresh(self, args: tuple, stored_at: float, now: float) -> bool:
+        return now - stored_at < self.seconds
+
+
+@dataclass
+class MonthlyArchive(CachePolicy):
+    """Policy for `(username, year, month)` archives.
+
+    An entry stored after its month ended (plus `grace` seconds for late game
+    results) is immutable. Anything stored while the month was still running
+    is only fresh for `ttl` seconds.
+    """
+
+    ttl: float = CURRENT_MONTH_TTL
+    grace: float = 60 * 60
+
+    @staticmethod
+    def month_end(year: int, month: int) -> float:
+        """Timestamp of the first instant after the month, in UTC."""
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        return datetime(year, month, 1, tzinfo=timezone.utc).timestamp()
+
+    def is_fresh(self, args: tuple, stored_at: float, now: float) -> bool:
+        _, year, month = args[:3]
+        if stored_at >= self.month_end(int(year), int(month)) + self.grace:
+            return True
+        return now - stored_at < self.ttl
+
+
+class NotModified(Exception):
+    """Raised by a cached function when the upstream answered 304 Not Modified."""
+
+
+@dataclass
+class Revalidation:
+    """Validators for a conditional request, and those of the response.
+
+    The cache publishes one through `revalidation` while calling a function.
+    The HTTP client sends `etag`/`last_modified` as `If-None-Match`/
+    `If-Modified-Since` and overwrites them with the response's validators.
+    """
+
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    taken: bool = False
+
+
+revalidation: ContextVar[Optional[Revalidation]] = ContextVar(
+    "revalidation", default=None
+)
+
+
+def take_revalidation() -> Optional[Revalidation]:
+    """Return the current validators to the first request that asks for them.
+
+    A cached function's later requests are unconditional, so they can neither
+    be answered with 304 nor overwrite the validators of the cached response.
+    """
+    validators = revalidation.get()
+    if validators is None or validators.taken:
+        return None
+    validators.taken = True
+    return validators
@@ -1,137 +1,214 @@
+import math
+import operator
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, List, Optional, Tuple
+
 import networkx as nx
 import numpy as np
 import pandas as pd
-from dash import html
+from dash import dash_table, html
+from pandas.api.types import is_numeric_dtype
+
+from dashapp.centrality import PAGERANK_PERCENTILE, pagerank
+from extraction import get_cached_pgns
+from extraction.clocks import ClockTable, GameClocks, parse_game_clocks
+from network import PlayerNode, game_table
+
+ANALYTICS_CACHE_ENTRIES = int(os.getenv("ANALYTICS_CACHE_ENTRIES", "256"))
+TABLE_PAGE_SIZE = int(os.getenv("TABLE_PAGE_SIZE", "25"))
+MIN_CLOCK_MOVES = int(os.getenv("MIN_CLOCK_MOVES", "50"))
 
-from network import PlayerNode
+FILTER_PART = re.compile(r"\{(?P<column>[^}]+)\}\s+(?P<comparison>\S+)\s+(?P<value>.+)")
+FILTER_OPERATORS = {
+    "=": operator.eq,
+    "eq": operator.eq,
+    "!=": operator.ne,
+    "ne": operator.ne,
+    "<": operator.lt,
+    "lt": operator.lt,
+    "<=": operator.le,
+    "le": operator.le,
+    ">": operator.gt,
+    "gt": operator.gt,
+    ">=": operator.ge,
+    "ge": operator.ge,
+    "contains": None,
+    "datestartswith": None,
+}
+"""Operators of DataTable filter queries, also prefixed by `s` or `i` for case."""
 
 
 def _detect_anomalies(graph) -> pd.DataFrame:
     """Detect anomalies in the graph based on edge weight."""
-    anomalies = []
+    edges = list(graph.edges(data="weight", default=1))
+    if not edges:
+        return pd.DataFrame()
+    weights = np.array([weight for _, _, weight in edges])
+    weight_threshold = np.percentile(weights, 99)
 
-    weight_threshold = np.percentile(
-        [data.get("weight", 1) for _, _, data in graph.edges(data=True)], 99
+    return pd.DataFrame(
+        [
+            {"Source": f"{u} - {v}", "Type": "Rating Difference", "Value": weight}
+            for (u, v, _), weight in zip(edges, weights)
+            if weight > weight_threshold
+        ]
     )
 
-    for edge in graph.edges(data=True):
-        weight = edge[-1].get("weight", 1)
-        if weight > weight_threshold:
-            anomalies.append(
-                {
-                    "Source": f"{edge[0]} - {edge[1]}",
-                    "Type": "Rating Difference",
-                    "Value": weight,
-                }
-            )
 
-    return pd.DataFrame(anomalies)
+def _detect_probability_anomalies(graph) -> pd.DataFrame:
+    """Detect anomalies in the graph based on Probability of Win vs Actual Win.
 
+    Each player's actual score minus their expected score is summed over all
+    of their games, straight from the columns of the graph's game table. Every
+    row of the table belongs to an edge, so whole columns are used as they are.
+    """
+    table = game_table(graph)
+    if not len(table):
+        return pd.DataFrame()
 
-def _detect_probability_anomalies(graph) -> pd.DataFrame:
-    """Detect anomalies in the graph based on Probability of Win vs Actual Win."""
-
-    def calculate_win_probability(rating_a: int, rating_b: int) -> float:
-        """Calculate the win probability of player A against player B."""
-        return 1 / (1 + 10 ** ((rating_b - rating_a) / 400))
-
-    def get_player_result(player: dict) -> float:
-        if player.get("result") == "win":
-            return 1
-        elif player.get("result") == "stalemate":
-            return 0.5
-        return 0
-
-    player_games: dict = {}
-    anomalies = []
-    for edge in graph.edges(data=True):
-        if not edge[-1].get("data"):
-            print("No data - skipping")
-            continue
-        games = edge[-1].get("data", 0)
-        for game in games:
-            player_a = game.get("white", {})
-            player_b = game.get("black", {})
+    white, black = table.column("white"), table.column("black")
+    rating_difference = table.column("black_rating").astype(np.float64) - table.column(
+        "white_rating"
+    )
+    white_probability = 1 / (1 + 10 ** (rating_difference / 400))
+    white_result = table.scores("white") - white_probability
+    black_result = table.scores("black") - (1 - white_probability)
 
-            player_a_probability = calculate_win_probability(
-                player_a.get("rating"), player_b.get("rating")
-            )
-            player_b_probability = calculate_win_probability(
-                player_b.get("rating"), player_a.get("rating")
-            )
+    players = len(table.vocabulary("white"))
+    totals = np.bincount(white, white_result, players) + np.bincount(
+        black, black_result, players
+    )
+    played = np.bincount(white, minlength=players) + np.bincount(
+        black, minlength=players
+    )
+    usernames = np.asarray(table.vocabulary("white"), dtype=object)[played > 0]
+    totals = totals[played > 0]
 
-            player_a_result = get_player_result(player_a) - player_a_probability
-            player_b_result = get_player_result(player_b) - player_b_probability
+    percentile = np.percentile(totals, 98)
+    return pd.DataFrame(
+        {
+            "Source": usernames[totals > percentile],
+            "Type": "Win Probability",
+            "Value": totals[totals > percentile],
+        }
+    )
 
-            player_games[player_a["username"]] = (
-                player_games.get(player_a["username"], 0) + player_a_result
-            )
-            player_games[player_b["username"]] = (
-                player_games.get(player_b["username"], 0) + player_b_result
-            )
 
-    percentile = np.percentile(list(player_games.values()), 98)
-    for player, result in player_games.items():
-        if result > percentile:
-            anomalies.append(
-                {"Source": player, "Type": "Win Probability", "Value": result}
+def graph_clocks(graph) -> ClockTable:
+    """Clocks of the graph's games, row for row with its game table.
+
+    Only archives already in the cache are read, so this never makes a
+    request. Games whose archive is not cached get empty clocks and are
+    tried again on later calls. The table, and the rows still missing, are
+    kept in `graph.graph["clocks"]` and `graph.graph["clocks_missing"]`,
+    which are saved with the session.
+    """
+    table = game_table(graph)
+    clocks = graph.graph.setdefault("clocks", ClockTable())
+    missing = graph.graph.setdefault("clocks_missing", set())
+    rows = sorted(missing) + list(range(len(clocks), len(table)))
+    if not rows:
+        return clocks
+    games = [table.game(row) for row in rows]
+    pgns = get_cached_pgns(games, graph.graph.get("expanded", ()))
+    read = {}
+    for row, game in zip(rows, games):
+        if game.uuid in pgns:
+            missing.discard(row)
+            read[row] = parse_game_clocks(pgns[game.uuid])
+        else:
+            missing.add(row)
+            read[row] = GameClocks(
+                game.white.username,
+                game.black.username,
+                0.0,
+                0.0,
+                np.zeros(0, dtype=np.float32),
             )
+    known = len(clocks)
+    clocks.replace({row: read[row] for row in rows if row < known})
+    clocks.append(read[row] for row in rows if row >= known)
+    return clocks
+
 
-    return pd.DataFrame(anomalies)
+def _detect_time_anomalies(graph) -> pd.DataFrame:
+    """Detect anomalies in how players use their clock.
+
+    Flags players whose time per move varies least, relative to its mean,
+    and those most accurate in games where they ran short of time.
+    """
+    table = game_table(graph)
+    if not len(table):
+        return pd.DataFrame()
+    accuracies = np.stack(
+        [table.column("white_accuracy"), table.column("black_accuracy")], axis=1
+    )
+    features = graph_clocks(graph).player_features(accuracies)
+    features = features[features["moves"] >= MIN_CLOCK_MOVES]
+    if features.empty:
+        return pd.DataFrame()
+
+    variation = np.sqrt(features["time_variance"]) / features["mean_time"]
+    uniform = variation < np.percentile(variation, 2)
+    anomalies = [
+        pd.DataFrame(
+            {
+                "Source": features["player"][uniform],
+                "Type": "Move Time Variation",
+                "Value": variation[uniform],
+            }
+        )
+    ]
+    accuracy = features["low_time_accuracy"].dropna()
+    if not accuracy.empty:
+        accurate = accuracy > np.percentile(accuracy, 98)
+        anomalies.append(
+            pd.DataFrame(
+                {
+                    "Source": features["player"][accuracy.index[accurate]],
+                    "Type": "Low-Time Accuracy",
+                    "Value": accuracy[accurate],
+                }
+            )
+        )
+    return pd.concat(anomalies, ignore_index=True)
 
 
 def _page_rank_scores(graph) -> pd.DataFrame:
     """Calculate the PageRank scores for the graph."""
-    scores = nx.pagerank(graph)
+    scores = pagerank(graph)
     scores_df = pd.DataFrame(
         [(node, "PageRank", score) for node, score in scores.items()],
         columns=["Source", "Type", "Value"],
     )
 
-    percentile = np.percentile(scores_df["Value"], 98)
+    percentile = np.percentile(scores_df["Value"], PAGERANK_PERCENTILE)
     return scores_df[scores_df["Value"] > percentile]
 
 
-def create_anomaly_stats(graph):
-    """Create the content for the Anomaly Detection tab."""
-    anomalies = _detect_anomalies(graph)
-    probability_anomalies = _detect_probability_anomalies(graph)
-    page_rank_anomalies = _page_rank_scores(graph)
-    anomalies = pd.concat([anomalies, probability_anomalies, page_rank_anomalies])
+def anomaly_frame(graph) -> pd.DataFrame:
+    """Every anomaly of the graph, from ratings, results, PageRank and clocks."""
+    anomalies = [
+        _detect_anomalies(graph),
+        _detect_probability_anomalies(graph),
+        _page_rank_scores(graph),
+        _detect_time_anomalies(graph),
+    ]
+    return pd.concat(anomalies, ignore_index=True)
+
 
+def create_anomaly_stats(anomalies: pd.DataFrame):
+    """Create the content for the Anomaly Detection tab."""
     if anomalies.empty:
         return html.Div([html.H3("No anomalies detected in the graph.")])
 
-    anomaly_table = html.Table(
-        [
-            html.Thead(
-                html.Tr(
-                    [
-                        html.Th(col, style={"textAlign": "left"})
-                        for col in anomalies.columns
-                    ]
-                )
-            ),
-            html.Tbody(
-                [
-                    html.Tr(
-                        [
-                            html.Td(row["Source"]),
-                            html.Td(row["Type"]),
-                            html.Td(row["Value"]),
-                        ],
-                    )
-                    for _, row in anomalies.iterrows()
-                ],
-            ),
-        ],
-        style={"width": "100%"},
-    )
-
     return html.Div(
         [
             html.H3("Anomaly Detection Results"),
-            anomaly_table,
+            paged_table("anomalies", anomalies),
         ]
     )
 
@@ -163,25 +240,167 @@ def create_graph_summary(graph):
     )
 
 
-def create_player_stats(graph):
-    """Create player statistics."""
-    nodes = graph.nodes(data=True)
+def player_frame(graph) -> pd.DataFrame:
+    """One row of `PlayerNode` fields per player of the graph."""
     headers = [field for field in PlayerNode.__dataclass_fields__]
+    return pd.DataFrame.from_records(
+        [data for _, data in graph.nodes(data=True)], columns=headers
+    )
+
 
+def create_player_stats(players: pd.DataFrame):
+    """Create player statistics."""
     return html.Div(
         [
             html.H3("Player Statistics"),
-            html.Table(
-                [
-                    html.Tr(
-                        [html.Th(field) for field in headers],
-                        style={"textAlign": "left"},
-                    )
-                ]
-                + [
-                    html.Tr([html.Td(node[-1].get(field)) for field in headers])
-                    for node in nodes
-                ]
-            ),
+            paged_table("players", players),
         ]
     )
+
+
+def paged_table(name: str, frame: pd.DataFrame) -> dash_table.DataTable:
+    """An empty table whose pages `table_page` serves from `frame`."""
+    return dash_table.DataTable(
+        id={"type": "analytics-table", "name": name},
+        columns=[
+            {
+                "name": column,
+                "id": column,
+                "type": "numeric" if is_numeric_dtype(frame[column]) else "text",
+            }
+            for column in frame.columns
+        ],
+        page_current=0,
+        page_size=TABLE_PAGE_SIZE,
+        page_count=max(1, math.ceil(len(frame) / TABLE_PAGE_SIZE)),
+        page_action="custom",
+        sort_action="custom",
+        sort_mode="multi",
+        sort_by=[],
+        filter_action="custom",
+        filter_query="",
+        style_cell={"textAlign": "left"},
+    )
+
+
+def filter_frame(frame: pd.DataFrame, query: Optional[str]) -> pd.DataFrame:
+    """Rows of `frame` matching a DataTable `filter_query`.
+
+    Parts are joined by `&&` and look like `{column} operator value`, with
+    the operators of DataTable's filter row. Parts that do not parse, or
+    compare a numeric column to text, are ignored.
+    """
+    for part in filter(None, (query or "").split(" && ")):
+        match = FILTER_PART.fullmatch(part.strip())
+        if match is None or match["column"] not in frame:
+            continue
+        column = frame[match["column"]]
+        comparison, value = match["comparison"], match["value"]
+        sensitive = True
+        if comparison not in FILTER_OPERATORS and comparison[1:] in FILTER_OPERATORS:
+            sensitive, comparison = comparison[0] == "s", comparison[1:]
+        if comparison not in FILTER_OPERATORS:
+            continue
+        if len(value) > 1 and value[0] == value[-1] and value[0] in "\"'`":
+            value = value[1:-1]
+
+        if comparison in ("contains", "datestartswith"):
+            text = column.astype(str)
+            if comparison == "contains":
+                keep = text.str.contains(value, case=sensitive, regex=False)
+            else:
+                keep = text.str.startswith(value)
+        elif is_numeric_dtype(column):
+            try:
+                keep = FILTER_OPERATORS[comparison](column, float(value))
+            except ValueError:
+                continue
+        elif sensitive:
+            keep = FILTER_OPERATORS[comparison](column.astype(str), value)
+        else:
+            keep = FILTER_OPERATORS[comparison](
+                column.astype(str).str.lower(), value.lower()
+            )
+        frame = frame[keep]
+    return frame
+
+
+def table_page(
+    frame: pd.DataFrame,
+    page_current: int,
+    page_size: int,
+    sort_by: Optional[List[dict]],
+    filter_query: Optional[str],
+) -> Tuple[List[dict], int]:
+    """One page of `frame`, filtered and sorted, and the number of pages."""
+    frame = filter_frame(frame, filter_query)
+    if sort_by:
+        frame = frame.sort_values(
+            [sort["column_id"] for sort in sort_by],
+            ascending=[sort["direction"] == "asc" for sort in sort_by],
+            kind="stable",
+        )
+    page = frame.iloc[page_current * page_size : (page_current + 1) * page_size]
+    page = page.astype(object).where(page.notna(), None)
+    return page.to_dict("records"), max(1, math.ceil(len(frame) / page_size))
+
+
+TABLES = {"players": player_frame, "anomalies": anomaly_frame}
+"""Frames behind the paged tables, by table name."""
+
+TABS = {
+    "summary-tab": (create_graph_summary, None),
+    "stats-tab": (create_player_stats, "players"),
+    "anomaly-tab": (create_anomaly_stats, "anomalies"),
+}
+"""Content of each analytics tab, built from the graph or from a table's frame."""
+
+
+class AnalyticsCache:
+    """LRU of rendered analytics tabs and table frames by graph version.
+
+    A tab is only computed when it is viewed, and then kept until the graph
+    it was computed for changes version or falls out of the LRU, so switching
+    back and forth between tabs of an unchanged graph costs nothing. Tables
+    keep their frame too, so paging, sorting and filtering reuse it.
+
+    Args:
+        max_entries (int): Maximum number of tabs and frames kept.
+    """
+
+    def __init__(self, max_entries: int = ANALYTICS_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._rendered: OrderedDict[tuple, Any] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._rendered)
+
+    def render(self, version: Hashable, tab: str, graph: nx.Graph):
+        """The content of `tab` for `graph`, identified by `version`."""
+        if tab not in TABS:
+            return None
+        create, table = TABS[tab]
+        return self._get(
+            (version, tab),
+            lambda: create(self.frame(version, table, graph) if table else graph),
+        )
+
+    def frame(self, version: Hashable, table: str, graph: nx.Graph) -> pd.DataFrame:
+        """The frame behind `table` for `graph`, identified by `version`."""
+        return self._get((version, table), lambda: TABLES[table](graph))
+
+    def _get(self, key: tuple, compute: Callable[[], Any]):
+        with self._lock:
+            if key in self._rendered:
+                self._rendered.move_to_end(key)
+                return self._rendered[key]
+        value = compute()
+        with self._lock:
+            self._rendered[key] = value
+            while len(self._rendered) > self.max_entries:
+                self._rendered.popitem(last=False)
+        return value
+
+
+analytics_cache = AnalyticsCache()
@@ -0,0 +1,134 @@
+"""PageRank of the player graph, kept up to date as the graph grows.
+
+Players and games are only ever added to the graph, so the PageRank state
+kept in `graph.graph["pagerank"]` picks up new nodes and edges from where it
+left off: new players are appended to the node index, new edges are found
+at the end of the adjacency of players whose degree changed, and power
+iteration restarts from the previous scores instead of a uniform vector.
+"""
+
+import os
+from itertools import islice
+from typing import Dict, List
+
+import networkx as nx
+import numpy as np
+from scipy import sparse
+
+PAGERANK_ALPHA = 0.85
+PAGERANK_TOLERANCE = float(os.getenv("PAGERANK_TOLERANCE", "1e-3"))
+PAGERANK_PERCENTILE = 98
+PAGERANK_MAX_ITERATIONS = 100
+
+
+class IncrementalPageRank:
+    """Weighted PageRank, as `nx.pagerank`, updated as a graph grows.
+
+    Only players above the `percentile`-th score are reported, so iteration
+    stops once the error left, estimated as the largest change of the last
+    iteration times `alpha / (1 - alpha)`, is below `tolerance` times that
+    score at the start. networkx's
+    fixed tolerance per node gets looser relative to the scores as the graph
+    grows, and tighter than needed on small graphs.
+
+    Args:
+        alpha (float): Damping factor.
+        tolerance (float): Error allowed, relative to the percentile score.
+        percentile (float): Percentile of the scores that are reported.
+    """
+
+    def __init__(
+        self,
+        alpha: float = PAGERANK_ALPHA,
+        tolerance: float = PAGERANK_TOLERANCE,
+        percentile: float = PAGERANK_PERCENTILE,
+    ):
+        self.alpha = alpha
+        self.tolerance = tolerance
+        self.percentile = percentile
+        self.nodes: List = []
+        self.scores = np.zeros(0)
+        self.iterations = 0
+        self._index: Dict = {}
+        self._degree: List[int] = []
+        self._sources = np.zeros(0, dtype=np.intp)
+        self._targets = np.zeros(0, dtype=np.intp)
+        self._weights = np.zeros(0)
+
+    def follows(self, graph: nx.Graph) -> bool:
+        """Whether `graph` can be the state's graph, with nodes or edges added."""
+        return graph.number_of_nodes() >= len(self.nodes)
+
+    def _sync(self, graph: nx.Graph) -> bool:
+        """Take in the nodes and edges added since the last call, if any."""
+        changed = len(self.nodes) < graph.number_of_nodes()
+        for node in islice(graph, len(self.nodes), None):
+            self._index[node] = len(self.nodes)
+            self.nodes.append(node)
+            self._degree.append(0)
+
+        sources, targets, weights = [], [], []
+        # The raw adjacency dicts, as views of them cost more than the scan
+        for node, neighbours in graph._adj.items():
+            i = self._index[node]
+            if len(neighbours) == self._degree[i]:
+                continue
+            changed = True
+            # Adjacency is insertion ordered, so new neighbours come last
+            for other in islice(neighbours, self._degree[i], None):
+                j = self._index[other]
+                if i > j:
+                    continue
+                weight = neighbours[other].get("weight", 1)
+                sources.append(i)
+                targets.append(j)
+                weights.append(weight)
+                if i != j:
+                    sources.append(j)
+                    targets.append(i)
+                    weights.append(weight)
+            self._degree[i] = len(neighbours)
+        if not changed:
+            return False
+        self._sources = np.concatenate([self._sources, sources]).astype(np.intp)
+        self._targets = np.concatenate([self._targets, targets]).astype(np.intp)
+        self._weights = np.concatenate([self._weights, weights])
+        return True
+
+    def update(self, graph: nx.Graph) -> Dict:
+        """Scores of every node of `graph`, by node."""
+        if not self._sync(graph) and self.iterations:
+            return dict(zip(self.nodes, self.scores.tolist()))
+        size = len(self.nodes)
+        if size == 0:
+            return {}
+        matrix = sparse.csr_array(
+            (self._weights, (self._sources, self._targets)), shape=(size, size)
+        )
+        out = np.asarray(matrix.sum(axis=1)).ravel()
+        dangling = out == 0
+        with np.errstate(divide="ignore"):
+            matrix = sparse.diags_array(np.where(dangling, 0, 1 / out)) @ matrix
+
+        # Warm start: known players keep their score, new ones start at 1/size
+        x = np.concatenate([self.scores, np.full(size - len(self.scores), 1 / size)])
+        x /= x.sum()
+        uniform = 1 / size
+        cut = np.percentile(x, self.percentile)
+        for self.iterations in range(1, PAGERANK_MAX_ITERATIONS + 1):
+            previous = x
+            x = self.alpha * (x @ matrix + x[dangling].sum() * uniform)
+            x += (1 - self.alpha) * uniform
+            error = np.abs(x - previous).max() * self.alpha / (1 - self.alpha)
+            if error < self.tolerance * cut:
+                break
+        self.scores = x
+        return dict(zip(self.nodes, x.tolist()))
+
+
+def pagerank(graph: nx.Graph) -> Dict:
+    """PageRank of every node, updated from the graph's previous scores."""
+    ranks = graph.graph.get("pagerank")
+    if ranks is None or not ranks.follows(graph):
+        ranks = graph.graph["pagerank"] = IncrementalPageRank()
+    return ranks.update(graph)
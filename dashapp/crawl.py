@@ -0,0 +1,175 @@
+import asyncio
+import os
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+import networkx as nx
+from chessdotcom import ChessDotComError
+
+from extraction import fetch_opponents_and_games_by_month, fetch_player_data
+from network import GameEdge, PlayerNode, add_edges_bulk
+
+MAX_CONCURRENT_EXPANSIONS = int(os.getenv("MAX_CONCURRENT_EXPANSIONS", "8"))
+
+Expansion = List[Tuple[PlayerNode, List[GameEdge]]]
+Edges = List[Tuple[PlayerNode, PlayerNode, List[GameEdge]]]
+ExpansionKey = Tuple[str, int, int]
+
+
+def expansion_key(
+    username: str, year: Optional[int], month: Optional[int]
+) -> ExpansionKey:
+    """Key of a player's expansion in a month, the running month by default."""
+    now = datetime.now()
+    return (
+        username,
+        now.year if year is None else int(year),
+        now.month if month is None else int(month),
+    )
+
+
+class Crawler:
+    """Level-synchronous breadth-first crawl of the opponent graph.
+
+    Every level's frontier is expanded concurrently, players are expanded at
+    most once per month and opponent profiles are fetched at most once per
+    crawl. Expansions by earlier crawls of the same graph, recorded in
+    `graph.graph["expanded"]` as `(username, year, month)`, are not made
+    again, while the same players' games of another month are added.
+
+    Args:
+        year (Optional[int]): Year of the games to crawl.
+        month (Optional[int]): Month of the games to crawl.
+        max_concurrency (int): Maximum number of players expanded at once.
+    """
+
+    def __init__(
+        self,
+        year: Optional[int],
+        month: Optional[int],
+        max_concurrency: int = MAX_CONCURRENT_EXPANSIONS,
+    ):
+        _, self.year, self.month = expansion_key("", year, month)
+        self.max_concurrency = max_concurrency
+        self.expanded: Set[ExpansionKey] = set()
+        self._linked: Set[Tuple[frozenset, int, int]] = set()
+        self._previous: Set[ExpansionKey] = set()
+        self._players: Dict[str, asyncio.Future] = {}
+
+    def _fetch_player(self, username: str) -> asyncio.Future:
+        """Fetch a player once, sharing the request between concurrent callers."""
+        if username not in self._players:
+            self._players[username] = asyncio.ensure_future(fetch_player_data(username))
+        return self._players[username]
+
+    async def _expand(
+        self, player: PlayerNode, semaphore: asyncio.Semaphore, is_seed: bool
+    ) -> Expansion:
+        """Fetch one player's opponents and their player nodes."""
+        async with semaphore:
+            try:
+                opponents_and_games = await fetch_opponents_and_games_by_month(
+                    player.username, self.year, self.month
+                )
+            except (ValueError, ChessDotComError) as exc:
+                if is_seed:
+                    raise
+                print(f"Skipping {player.username}: {exc}")
+                return []
+            nodes = await asyncio.gather(
+                *[self._fetch_player(opponent) for opponent in opponents_and_games],
+                return_exceptions=True,
+            )
+        expansion = []
+        for opponent, node in zip(opponents_and_games, nodes):
+            if isinstance(node, BaseException):
+                if not isinstance(node, Exception):
+                    raise node
+                print(f"Skipping {opponent}: {node}")
+            elif node is not None:
+                expansion.append((node, opponents_and_games[opponent]))
+        return expansion
+
+    def _merge(
+        self, edges: Edges, player: PlayerNode, expansion: Expansion
+    ) -> List[PlayerNode]:
+        """Collect one player's new games in `edges`, returning reached players."""
+        reached = []
+        for node, games in expansion:
+            pair = (frozenset((player.username, node.username)), self.year, self.month)
+            key = self._key(node.username)
+            # Games already added from the other side, in this crawl or before
+            if pair in self._linked or key in self._previous:
+                continue
+            self._linked.add(pair)
+            edges.append((player, node, games))
+            if key not in self.expanded:
+                reached.append(node)
+        return reached
+
+    def _key(self, username: str) -> ExpansionKey:
+        return username, self.year, self.month
+
+    async def crawl(self, graph: nx.Graph, player: PlayerNode, depth: int) -> nx.Graph:
+        """Expand `player` and its opponents, level by level, up to `depth`."""
+        self._previous = graph.graph.setdefault("expanded", set())
+        self.expanded.update(self._previous)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        known = self._players[player.username] = (
+            asyncio.get_running_loop().create_future()
+        )
+        known.set_result(player)
+        frontier = [player]
+        for level in range(1, depth + 1):
+            frontier = [
+                node
+                for node in frontier
+                if self._key(node.username) not in self.expanded
+            ]
+            if not frontier:
+                break
+            self.expanded.update(self._key(node.username) for node in frontier)
+            expansions = await asyncio.gather(
+                *[self._expand(node, semaphore, level == 1) for node in frontier]
+            )
+
+            next_frontier: Dict[str, PlayerNode] = {}
+            edges: Edges = []
+            for node, expansion in zip(frontier, expansions):
+                for reached in self._merge(edges, node, expansion):
+                    next_frontier.setdefault(reached.username, reached)
+            add_edges_bulk(graph, edges)
+            frontier = list(next_frontier.values())
+        self._previous.update(self.expanded)
+        return graph
+
+
+async def crawl_opponents(
+    graph: nx.Graph,
+    username: str,
+    year: Optional[int],
+    month: Optional[int],
+    depth: int,
+    player: Optional[PlayerNode] = None,
+    max_concurrency: int = MAX_CONCURRENT_EXPANSIONS,
+) -> nx.Graph:
+    """Add opponents to the graph breadth-first, up to a specified depth.
+
+    Args:
+        graph (nx.Graph): Graph to add players and games to.
+        username (str): Player to start the crawl from.
+        year (Optional[int]): Year of the games to crawl.
+        month (Optional[int]): Month of the games to crawl.
+        depth (int): Number of levels to expand. 1 expands only `username`.
+        player (Optional[PlayerNode], optional): Node of `username`, if known.
+        max_concurrency (int, optional): Maximum number of players expanded at once.
+
+    Returns:
+        nx.Graph: The graph, updated in place.
+    """
+    if player is None and (player := await fetch_player_data(username)) is None:
+        raise ValueError(
+            f"Player {username} not found. Is this a valid chess.com username?"
+        )
+    crawler = Crawler(year, month, max_concurrency)
+    return await crawler.crawl(graph, player, depth)
@@ -1,81 +1,92 @@
 import asyncio
-from typing import Dict, Optional, Tuple
+import os
+from typing import List, Optional
 
 import networkx as nx
 import numpy as np
 import plotly.graph_objs as go
+from chessdotcom import ChessDotComError
 from dash import Input, Output, State, callback_context
+from dash.exceptions import PreventUpdate
 from matplotlib import pyplot as plt
 
 from dashapp import app
-from extraction import (
-    fetch_player_data,
-    get_opponents_and_games_by_month,
-    get_player_data,
-)
-from network import PlayerNode, add_edge, add_node
+from dashapp.analytics import graph_clocks
+from dashapp.crawl import MAX_CONCURRENT_EXPANSIONS, crawl_opponents, expansion_key
+from dashapp.layout import graph_layout
+from dashapp.sessions import copy_graph, get_sessions
+from extraction import get_player_data
+from network import PlayerNode, add_node
+
+EDGE_COLOR_BINS = int(os.getenv("EDGE_COLOR_BINS", "16"))
+WEBGL_THRESHOLD = int(os.getenv("WEBGL_THRESHOLD", "1000"))
+
+
+def _rgba(colors: np.ndarray) -> List[str]:
+    """CSS strings of colormap RGBA rows."""
+    return [f"rgba({r}, {g}, {b}, 1)" for r, g, b in (colors[:, :3] * 255).astype(int)]
+
+
+def _edge_traces(graph: nx.Graph, pos, cmap, scatter) -> list:
+    """One trace per weight bin, its edges separated by gaps."""
+    edges = list(graph.edges(data="weight", default=1))
+    if not edges:
+        return []
+    weights = np.array([weight for _, _, weight in edges], dtype=np.float64)
+    max_weight = weights.max()
+    normalized = weights / max_weight if max_weight > 0 else np.zeros_like(weights)
+    bins = np.minimum((normalized * EDGE_COLOR_BINS).astype(int), EDGE_COLOR_BINS - 1)
+    colors = _rgba(cmap((np.arange(EDGE_COLOR_BINS) + 0.5) / EDGE_COLOR_BINS))
+
+    # Each edge is start, end, gap; NaN coordinates break the line. Single
+    # precision is plenty on screen and halves the payload.
+    segments = np.full((len(edges), 3, 2), np.nan, dtype=np.float32)
+    segments[:, 0] = [pos[u] for u, _, _ in edges]
+    segments[:, 1] = [pos[v] for _, v, _ in edges]
+    traces = []
+    for index in np.unique(bins):
+        points = segments[bins == index].reshape(-1, 2)
+        traces.append(
+            scatter(
+                x=points[:, 0],
+                y=points[:, 1],
+                line=dict(width=2, color=colors[index]),
+                mode="lines",
+                showlegend=False,
+                hoverinfo="skip",
+            )
+        )
+    return traces
 
 
 def create_figure(graph: nx.Graph):
-    """Create a Plotly figure from a NetworkX graph."""
-    pos = nx.fruchterman_reingold_layout(graph)  # May alter if needed
+    """Create a Plotly figure from a NetworkX graph.
 
-    min_weight = 0
-    max_weight = max(
-        (data.get("weight", 1) for _, _, data in graph.edges(data=True)), default=1
-    )
+    Edges are drawn with one trace per colour bin of their weight, and with
+    WebGL once the graph has more than `WEBGL_THRESHOLD` edges and nodes.
+    """
+    pos = graph_layout(graph)
     cmap = plt.get_cmap("plasma")
+    size = graph.number_of_edges() + graph.number_of_nodes()
+    scatter = go.Scattergl if size > WEBGL_THRESHOLD else go.Scatter
 
-    edges = []
-    for edge in graph.edges(data=True):
-        x0, y0 = pos[edge[0]]
-        x1, y1 = pos[edge[1]]
-
-        weight = edge[-1].get("weight", 1)
-
-        if max_weight > min_weight:
-            normalized_weight = (weight - min_weight) / (max_weight - min_weight)
-        else:
-            normalized_weight = 0
-        color = cmap(normalized_weight)
-        r, g, b = (int(c * 255) for c in color[:3])
-        edge_trace = go.Scatter(
-            x=[x0, x1],
-            y=[y0, y1],
-            line=dict(
-                width=2,
-                color=f"rgba({r}, {g}, {b}, 1)",
-            ),
-            mode="lines",
-            showlegend=False,
-            hoverinfo="none",
-        )
-        edges.append(edge_trace)
-
-    fig = go.Figure(data=edges)
+    fig = go.Figure(data=_edge_traces(graph, pos, cmap, scatter))
 
-    node_x = [pos[node][0] for node in graph.nodes()]
-    node_y = [pos[node][1] for node in graph.nodes()]
+    node_xy = np.array([pos[node] for node in graph.nodes()], dtype=np.float32)
     node_text = [str(node) for node in graph.nodes()]
-    ratings = [graph.nodes[node].get("rating", 0) for node in graph.nodes()]
+    ratings = np.array([rating for _, rating in graph.nodes(data="rating", default=0)])
     norm_ratings = (ratings - np.min(ratings)) / max(
         1, (np.max(ratings) - np.min(ratings))
     )
-    node_colors = cmap(norm_ratings)
 
-    nodes = go.Scatter(
-        x=node_x,
-        y=node_y,
+    # Plotly's Plasma is matplotlib's, so nodes need no per-node colour strings
+    nodes = scatter(
+        x=node_xy[:, 0],
+        y=node_xy[:, 1],
         mode="markers",
         hoverinfo="text",
         text=node_text,
-        marker=dict(
-            size=15,
-            color=[
-                f"rgba({int(c[0]*255)}, {int(c[1]*255)}, {int(c[2]*255)}, 1)"
-                for c in node_colors
-            ],
-        ),
+        marker=dict(size=15, color=norm_ratings, colorscale="Plasma", cmin=0, cmax=1),
         showlegend=False,
     )
 
@@ -94,74 +105,6 @@ def create_figure(graph: nx.Graph):
     return fig
 
 
-def graph_to_data(graph: nx.Graph):
-    """Convert the graph to store both nodes and edges."""
-    data = {
-        "nodes": list(graph.nodes(data=True)),
-        "edges": list(graph.edges(data=True)),
-    }
-
-    return data
-
-
-def data_to_graph(graph_data):
-    """Convert stored data back to a graph."""
-    graph = nx.Graph()
-    graph.add_nodes_from(graph_data["nodes"])
-    graph.add_edges_from(graph_data["edges"])
-    return graph
-
-
-async def _add_opponents_async(
-    graph: nx.Graph,
-    username: str,
-    year: Optional[int],
-    month: Optional[int],
-    player: Optional[PlayerNode] = None,
-) -> Tuple[nx.Graph, Dict[str, Optional[PlayerNode]]]:
-    """Add opponents to the graph."""
-    if player is None and (player := get_player_data(username)) is None:
-        raise ValueError(
-            f"Player {username} not found. Is this a valid chess.com username?"
-        )
-    opponents_node: dict = {}
-
-    # Add filters to reduce data
-    # if not is_within_rated_range(player):
-    #     return (graph, opponents_node)
-    # if not is_within_country(player):
-    #     return (graph, opponents_node)
-
-    opponents_and_games = get_opponents_and_games_by_month(username, year, month)
-
-    fetch_tasks = [fetch_player_data(opponent) for opponent in opponents_and_games]
-    fetched_nodes = await asyncio.gather(*fetch_tasks)
-
-    for opponent, node in zip(opponents_and_games.keys(), fetched_nodes):
-        if node is None:
-            continue
-        # if not is_within_rated_range(node):
-        #     continue
-        # if not is_within_country(node):
-        #     continue
-
-        opponents_node[opponent] = node
-        graph = add_edge(graph, player, node, opponents_and_games[opponent])
-
-    return (graph, opponents_node)
-
-
-def _add_opponents(
-    graph: nx.Graph,
-    username: str,
-    year: Optional[int],
-    month: Optional[int],
-    player: Optional[PlayerNode] = None,
-) -> Tuple[nx.Graph, Dict[str, Optional[PlayerNode]]]:
-    """Synchronous wrapper for the asynchronous _add_opponents_async."""
-    return asyncio.run(_add_opponents_async(graph, username, year, month, player))
-
-
 def add_opponents_with_depth(
     graph: nx.Graph,
     username: str,
@@ -169,26 +112,12 @@ def add_opponents_with_depth(
     month: Optional[int],
     depth: int,
     player: Optional[PlayerNode] = None,
+    max_concurrency: int = MAX_CONCURRENT_EXPANSIONS,
 ) -> nx.Graph:
-    """Recursively add opponents to the graph up to a specified depth."""
-
-    async def recursive_add(
-        graph: nx.Graph, username: str, current_depth: int, player: Optional[PlayerNode]
-    ):
-        if current_depth > depth:
-            return
-
-        _, opponents_node = await _add_opponents_async(
-            graph, username, year, month, player
-        )
-
-        for opponent, node in opponents_node.items():
-            if node:
-                await recursive_add(graph, opponent, current_depth + 1, node)
-
-    asyncio.run(recursive_add(graph, username, 1, player))
-
-    return graph
+    """Add opponents to the graph breadth-first up to a specified depth."""
+    return asyncio.run(
+        crawl_opponents(graph, username, year, month, depth, player, max_concurrency)
+    )
 
 
 def initialize_graph(
@@ -233,9 +162,14 @@ def initialize_graph(
     ],
 )
 def initialize_and_update_graph(
-    n_clicks, click_data, username, year, month, depth, graph_data
+    n_clicks, click_data, username, year, month, depth, graph_ref
 ):
-    """Initialize and update the graph when the initialize button is clicked."""
+    """Initialize and update the graph when the initialize button is clicked.
+
+    The graph itself stays in the server-side session store; the browser
+    only keeps the session reference in `graph-data`.
+    """
+    sessions = get_sessions()
 
     def initialize_new_graph(username, depth):
         """Initializes a new graph with given username and depth."""
@@ -246,38 +180,60 @@ def initialize_and_update_graph(
 
     def update_graph_from_click(
         graph: nx.Graph, click_data: dict, year: Optional[int], month: Optional[int]
-    ):
-        """Updates the graph with additional data based on clicked node."""
+    ) -> nx.Graph:
+        """Returns a copy of the graph expanded from the clicked node.
+
+        The session's graph is left untouched, as other callbacks may be
+        reading it under its current version.
+        """
         clicked_node = click_data["points"][0]["text"]
         print(f"Clicked node: {clicked_node}")
+        if expansion_key(clicked_node, year, month) in graph.graph.get("expanded", ()):
+            raise PreventUpdate  # Its opponents of the month are in the graph already
         player = PlayerNode(**dict(graph.nodes(data=True)).get(clicked_node) or {})
-        graph, _ = _add_opponents(graph, clicked_node, year, month, player=player)
+        graph = copy_graph(graph)
+        add_opponents_with_depth(graph, clicked_node, year, month, 1, player=player)
+        return graph
+
+    def get_default_response(graph, store):
+        """Creates default responses when no error occurs.
 
-    def get_default_response(graph):
-        """Creates default responses when no error occurs."""
-        return create_figure(graph), graph_to_data(graph), False, ""
+        The figure is created, and the clocks of new games read from the
+        archives the crawl cached, before `store` saves the graph, so that
+        the positions and clocks are saved with it.
+        """
+        figure = create_figure(graph)
+        graph_clocks(graph)
+        return figure, store(graph), False, ""
 
     def init_button_clicked():
         ctx = callback_context
         return ctx.triggered and ctx.triggered[0]["prop_id"] == "init-button.n_clicks"
 
+    graph = None
     try:
-        if graph_data is None or (init_button_clicked()):
+        graph = sessions.get(graph_ref)
+        # A new graph is also started when the session has expired
+        if graph is None or (init_button_clicked()):
             try:
-                graph = initialize_new_graph(username, depth)
+                new_graph = initialize_new_graph(username, depth)
             except ValueError:
-                graph = initialize_new_graph(username, 0)
-            return get_default_response(graph)
-
-        graph = data_to_graph(graph_data)
+                new_graph = initialize_new_graph(username, 0)
+            return get_default_response(new_graph, sessions.create)
 
         if click_data is not None:
-            update_graph_from_click(graph, click_data, year, month)
+            expanded = update_graph_from_click(graph, click_data, year, month)
+            return get_default_response(
+                expanded, lambda graph: sessions.update(graph_ref, graph)
+            )
 
-        return get_default_response(graph)
+        return get_default_response(graph, lambda graph: graph_ref)
 
-    except ValueError as e:
+    except (ValueError, ChessDotComError) as e:
         print(e)
+        # Also raised as RateLimitError once a request's retries are spent
+        message = str(e)
+        if isinstance(e, ChessDotComError):
+            message = e.json.get("message", message)
         figure = create_figure(graph) if graph else {}
-        data = graph_to_data(graph) if graph else None
-        return figure, data, True, str(e)
+        return figure, graph_ref if graph else None, True, message
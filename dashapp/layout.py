@@ -0,0 +1,256 @@
+"""Deterministic, incremental positions for the nodes of the graph figure.
+
+Small graphs are laid out by networkx's Fruchterman-Reingold. Larger ones
+use a multilevel force-directed scheme: the graph is coarsened by merging
+leaves and matched pairs of players, the coarsest graph is laid out, and
+each finer level starts from the coarser positions and is refined with
+repulsion approximated on a grid, so that every iteration is linear in the
+size of the graph instead of quadratic.
+"""
+
+import os
+import random
+from typing import Dict, List, Optional, Tuple
+
+import networkx as nx
+import numpy as np
+from scipy.signal import fftconvolve
+from scipy.spatial import cKDTree
+
+LAYOUT_SEED = int(os.getenv("LAYOUT_SEED", "0"))
+RELAX_ITERATIONS = int(os.getenv("LAYOUT_RELAX_ITERATIONS", "15"))
+LAYOUT_DENSE_MAX = int(os.getenv("LAYOUT_DENSE_MAX", "300"))
+LAYOUT_ITERATIONS = int(os.getenv("LAYOUT_ITERATIONS", "30"))
+REPULSION_GRID = 128
+REPULSION_NEIGHBOURS = 16
+
+Positions = Dict[str, Tuple[float, float]]
+
+
+def _coarsen(
+    size: int, edges: np.ndarray, rng: np.random.Generator
+) -> Tuple[np.ndarray, int]:
+    """Map every node onto a node of a graph at most about half the size.
+
+    Leaves are merged into their only neighbour, the remaining nodes are
+    merged in pairs along a random maximal matching of the edges, and nodes
+    left unmatched, typically around hubs, join the group of a neighbour.
+
+    Returns:
+        Tuple[np.ndarray, int]: Coarse node of every node, and the coarse size.
+    """
+    parent = np.arange(size)
+    degree = np.bincount(edges.ravel(), minlength=size)
+    merged = np.zeros(size, dtype=bool)
+    order = edges[rng.permutation(len(edges))].tolist()
+    for u, v in order:
+        if degree[u] == 1 and degree[v] > 1:
+            parent[u], merged[u] = v, True
+        elif degree[v] == 1 and degree[u] > 1:
+            parent[v], merged[v] = u, True
+    for u, v in order:
+        if not merged[u] and not merged[v] and parent[u] == u and parent[v] == v:
+            parent[v] = u
+            merged[u] = merged[v] = True
+    for u, v in order:
+        for node, other in ((u, v), (v, u)):
+            if not merged[node] and merged[other]:
+                parent[node], merged[node] = parent[other], True
+    parent = parent[parent[parent]]  # Leaves of a node merged into another
+    _, coarse = np.unique(parent, return_inverse=True)
+    return coarse, int(coarse.max()) + 1
+
+
+def _grid_repulsion(pos: np.ndarray, k: float) -> Tuple[np.ndarray, float]:
+    """Approximate repulsion on every node from all others, through a grid.
+
+    Nodes are binned into `REPULSION_GRID` cells a side and the repulsive
+    field is the FFT convolution of the counts with the softened kernel
+    `k² r / (|r|² + h²)`, `h` being the cell size. Nodes sharing a cell do
+    not push each other here; see `_refine`.
+
+    Returns:
+        Tuple[np.ndarray, float]: Force on every node, and the cell size.
+    """
+    low = pos.min(axis=0)
+    cell = max(float((pos.max(axis=0) - low).max()), k) / (REPULSION_GRID - 1)
+    x, y = np.rint((pos - low) / cell).astype(np.intp).T
+    counts = np.bincount(x * REPULSION_GRID + y, minlength=REPULSION_GRID**2).reshape(
+        REPULSION_GRID, REPULSION_GRID
+    )
+    offsets = np.arange(1 - REPULSION_GRID, REPULSION_GRID) * cell
+    dx, dy = np.meshgrid(offsets, offsets, indexing="ij")
+    kernel = k * k / (dx**2 + dy**2 + cell**2)
+    force = np.stack(
+        [
+            fftconvolve(counts, kernel * offset, mode="valid")[x, y]
+            for offset in (dx, dy)
+        ],
+        axis=1,
+    )
+    return force, cell
+
+
+def _refine(
+    pos: np.ndarray,
+    edges: np.ndarray,
+    k: float,
+    iterations: int,
+    temperature: float,
+    movable: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """Fruchterman-Reingold steps.
+
+    Up to `LAYOUT_DENSE_MAX` nodes every pair repels exactly. Above that the
+    repulsion comes from `_grid_repulsion`, plus exact repulsion between each
+    node and its nearest `REPULSION_NEIGHBOURS` within a cell, so that a step
+    stays linear in the size of the graph.
+    """
+    size = len(pos)
+    cooling = (0.05 * k / temperature) ** (1 / max(iterations, 1))
+    u, v = edges[:, 0], edges[:, 1]
+    exact = size <= LAYOUT_DENSE_MAX
+    if exact:
+        i, j = np.triu_indices(size, 1)
+        i, j = np.concatenate([i, j]), np.concatenate([j, i])
+    for _ in range(iterations):
+        force = np.zeros_like(pos)
+        if not exact:
+            force, cell = _grid_repulsion(pos, k)
+            _, j = cKDTree(pos).query(
+                pos, REPULSION_NEIGHBOURS + 1, distance_upper_bound=cell
+            )
+            i = np.repeat(np.arange(size), REPULSION_NEIGHBOURS + 1)
+            j = j.ravel()
+            keep = (j < size) & (j != i)
+            i, j = i[keep], j[keep]
+        delta = pos[i] - pos[j]
+        distance2 = np.maximum((delta**2).sum(axis=1), 1e-9 * k * k)
+        repulsion = delta * (k * k / distance2)[:, None]
+        delta = pos[u] - pos[v]
+        attraction = delta * (np.sqrt((delta**2).sum(axis=1)) / k)[:, None]
+        for axis in (0, 1):
+            force[:, axis] += (
+                np.bincount(i, repulsion[:, axis], size)
+                - np.bincount(u, attraction[:, axis], size)
+                + np.bincount(v, attraction[:, axis], size)
+            )
+        if movable is not None:
+            force[~movable] = 0
+        length = np.maximum(np.sqrt((force**2).sum(axis=1)), 1e-12)
+        pos = pos + force * (np.minimum(length, temperature) / length)[:, None]
+        temperature *= cooling
+    return pos
+
+
+def multilevel_layout(
+    size: int, edges: np.ndarray, seed: int = LAYOUT_SEED
+) -> np.ndarray:
+    """Positions of nodes `0..size-1` linked by `edges`, as an array of rows."""
+    rng = np.random.default_rng(seed)
+    levels: List[Tuple[np.ndarray, np.ndarray]] = []  # (edges, coarse node map)
+    while size > LAYOUT_DENSE_MAX // 2:
+        coarse, coarse_size = _coarsen(size, edges, rng)
+        if coarse_size > 0.9 * size:  # Nothing left to merge, e.g. isolated nodes
+            break
+        levels.append((edges, coarse))
+        edges = np.unique(np.sort(coarse[edges], axis=1), axis=0)
+        edges = edges[edges[:, 0] != edges[:, 1]]
+        size = coarse_size
+
+    # One node per unit of area, so the ideal edge length is 1 at the top
+    k = 1.0
+    pos = rng.uniform(0, np.sqrt(size), (size, 2))
+    pos = _refine(pos, edges, k, 4 * LAYOUT_ITERATIONS, np.sqrt(size) / 4)
+    for edges, coarse in reversed(levels):
+        k *= np.sqrt(size / len(coarse))
+        size = len(coarse)
+        pos = pos[coarse] + rng.normal(0, 0.1 * k, (size, 2))
+        pos = _refine(pos, edges, k, LAYOUT_ITERATIONS, 2 * k)
+    return pos
+
+
+def _spacing(graph: nx.Graph) -> float:
+    """Typical distance between neighbours in a unit-scaled spring layout."""
+    return 1 / np.sqrt(max(graph.number_of_nodes(), 1))
+
+
+def _place_near(
+    graph: nx.Graph, node: str, positions: Positions, seed: int
+) -> Tuple[float, float]:
+    """A start position for `node` around the centroid of its placed neighbours."""
+    rng = random.Random(f"{seed}/{node}")
+    placed = [positions[other] for other in graph[node] if other in positions]
+    x, y = np.mean(placed, axis=0) if placed else (0.0, 0.0)
+    angle, radius = rng.uniform(0, 2 * np.pi), _spacing(graph) * rng.uniform(0.5, 1)
+    return float(x + radius * np.cos(angle)), float(y + radius * np.sin(angle))
+
+
+def _index(graph: nx.Graph) -> Tuple[list, np.ndarray]:
+    """The nodes of a graph, and its edges as pairs of indices into them."""
+    nodes = list(graph)
+    index = {node: i for i, node in enumerate(nodes)}
+    edges = np.array(
+        [(index[u], index[v]) for u, v in graph.edges() if u != v], dtype=np.intp
+    ).reshape(-1, 2)
+    return nodes, edges
+
+
+def full_layout(graph: nx.Graph, seed: int = LAYOUT_SEED) -> Positions:
+    """Lay out a whole graph, picking the algorithm by its size."""
+    if graph.number_of_nodes() <= LAYOUT_DENSE_MAX:
+        layout = nx.spring_layout(graph, seed=seed)
+        return {node: tuple(map(float, xy)) for node, xy in layout.items()}
+    nodes, edges = _index(graph)
+    pos = nx.rescale_layout(multilevel_layout(len(nodes), edges, seed))
+    return {node: (float(x), float(y)) for node, (x, y) in zip(nodes, pos)}
+
+
+def graph_layout(graph: nx.Graph, seed: int = LAYOUT_SEED) -> Positions:
+    """Positions of every node, computed only for nodes that have none yet.
+
+    The first call lays out the whole graph. Later calls keep every known
+    position, start new nodes next to the neighbours they were reached from,
+    and relax only them, with their placed neighbours held fixed, for
+    `RELAX_ITERATIONS` steps. Positions are kept in `graph.graph["positions"]`
+    and saved with the session, so renders that add no player skip layout.
+    """
+    positions: Positions = graph.graph.setdefault("positions", {})
+    new = {node for node in graph if node not in positions}
+    if not new:
+        return positions
+    if not positions:
+        positions.update(full_layout(graph, seed))
+        return positions
+
+    # Nodes next to known ones first, so the others can start next to them
+    for node in sorted(
+        new, key=lambda node: (-len(graph[node].keys() & positions), node)
+    ):
+        positions[node] = _place_near(graph, node, positions, seed)
+    region = graph.subgraph(new.union(*(graph[node] for node in new)))
+    if region.number_of_nodes() <= LAYOUT_DENSE_MAX:
+        fixed = [node for node in region if node not in new]
+        layout = nx.spring_layout(
+            region,
+            k=_spacing(graph),
+            pos={node: positions[node] for node in region},
+            fixed=fixed or None,
+            iterations=RELAX_ITERATIONS,
+            scale=None,
+            seed=seed,
+        )
+    else:
+        nodes, edges = _index(region)
+        k = _spacing(graph)
+        pos = _refine(
+            np.array([positions[node] for node in nodes]),
+            edges,
+            k,
+            RELAX_ITERATIONS,
+            k,
+            movable=np.array([node in new for node in nodes]),
+        )
+        layout = dict(zip(nodes, pos))
+    positions.update((node, tuple(map(float, layout[node]))) for node in new)
+    return positions
@@ -1,14 +1,10 @@
 from datetime import datetime
 
-from dash import Input, Output, dcc, html
+from dash import MATCH, Input, Output, State, dcc, html
 
 from dashapp import app
-from dashapp.analytics import (
-    create_anomaly_stats,
-    create_graph_summary,
-    create_player_stats,
-)
-from dashapp.graph import data_to_graph
+from dashapp.analytics import analytics_cache, table_page
+from dashapp.sessions import get_sessions
 
 app.layout = html.Div(
     id="app-container",
@@ -184,17 +180,36 @@ def remove_blur(n_clicks):
     Input("analytics-tabs", "value"),
     Input("graph-data", "data"),
 )
-def render_analytics(tab, graph_data):
-    """Render the content for the selected tab."""
-    if not graph_data:
+def render_analytics(tab, graph_ref):
+    """Render the content for the selected tab, once per graph version."""
+    graph = get_sessions().get(graph_ref)
+    if graph is None:
         return html.Div([html.H3("No graph data available.")])
-    graph = data_to_graph(graph_data)
-    if tab == "summary-tab":
-        return create_graph_summary(graph)
-    elif tab == "stats-tab":
-        return create_player_stats(graph)
-    elif tab == "anomaly-tab":
-        return create_anomaly_stats(graph)
+    version = (graph_ref["session"], graph.graph["version"])
+    return analytics_cache.render(version, tab, graph)
+
+
+TABLE = {"type": "analytics-table", "name": MATCH}
+
+
+@app.callback(
+    Output(TABLE, "data"),
+    Output(TABLE, "page_count"),
+    Input(TABLE, "page_current"),
+    Input(TABLE, "page_size"),
+    Input(TABLE, "sort_by"),
+    Input(TABLE, "filter_query"),
+    State(TABLE, "id"),
+    State("graph-data", "data"),
+)
+def render_table_page(page_current, page_size, sort_by, filter_query, table, graph_ref):
+    """Send only the visible page of a table, sorted and filtered on the server."""
+    graph = get_sessions().get(graph_ref)
+    if graph is None:
+        return [], 1
+    version = (graph_ref["session"], graph.graph["version"])
+    frame = analytics_cache.frame(version, table["name"], graph)
+    return table_page(frame, page_current, page_size, sort_by, filter_query)
 
 
 def main():
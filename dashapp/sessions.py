@@ -0,0 +1,253 @@
+"""Server-side store of the graphs being explored, one per browser session.
+
+The browser only holds a small reference, `{"session": id, "version": n}`,
+in its `dcc.Store`. Graphs stay on the server: live in an in-process LRU,
+and serialised to the cache backend so that every gunicorn worker sharing
+the cache can pick up a session another worker created or updated.
+"""
+
+import copy
+import json
+import os
+import threading
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+import networkx as nx
+
+from cache.backends import CacheBackend
+from cache.main import IS_GCP, get_backend
+from extraction.clocks import ClockTable
+from network import GameTable, game_table
+
+SESSION_TTL = float(os.getenv("SESSION_TTL", str(2 * 3600)))
+SESSION_MEMORY_ENTRIES = int(os.getenv("SESSION_MEMORY_ENTRIES", "64"))
+SESSION_MEMORY_BYTES = int(
+    os.getenv("SESSION_MEMORY_BYTES", str((64 if IS_GCP else 256) << 20))
+)
+SESSION_SHARED = os.getenv("SESSION_SHARED", "1") == "1"
+SESSION_SWEEP_INTERVAL = float(os.getenv("SESSION_SWEEP_INTERVAL", "600"))
+NAMESPACE = "graph-sessions"
+
+
+def graph_to_data(graph: nx.Graph):
+    """Convert the graph to store its nodes, edges, game table and layout."""
+    data = {
+        "nodes": list(graph.nodes(data=True)),
+        "edges": list(graph.edges(data=True)),
+        "games": game_table(graph).to_dict(),
+        "expanded": sorted(graph.graph.get("expanded", ())),
+        "positions": graph.graph.get("positions", {}),
+    }
+    if "clocks" in graph.graph:
+        data["clocks"] = graph.graph["clocks"].to_dict()
+        data["clocks_missing"] = sorted(graph.graph.get("clocks_missing", ()))
+
+    return data
+
+
+def data_to_graph(graph_data):
+    """Convert stored data back to a graph."""
+    graph = nx.Graph()
+    graph.add_nodes_from(graph_data["nodes"])
+    graph.add_edges_from(graph_data["edges"])
+    if "games" in graph_data:
+        graph.graph["games"] = GameTable.from_dict(graph_data["games"])
+    graph.graph["expanded"] = {tuple(key) for key in graph_data.get("expanded", ())}
+    graph.graph["positions"] = {
+        node: tuple(xy) for node, xy in graph_data.get("positions", {}).items()
+    }
+    if "clocks" in graph_data:
+        graph.graph["clocks"] = ClockTable.from_dict(graph_data["clocks"])
+        graph.graph["clocks_missing"] = set(graph_data.get("clocks_missing", ()))
+    return graph
+
+
+def copy_graph(graph: nx.Graph) -> nx.Graph:
+    """A copy of a session's graph that can be changed without touching it.
+
+    Attribute dicts are copied by `nx.Graph.copy`; the game rows of every
+    edge, the game table and the rest of the graph's state, which crawls
+    and renders change in place, are copied as well.
+    """
+    copied = graph.copy()
+    for _, _, data in copied.edges(data=True):
+        if "rows" in data:
+            data["rows"] = list(data["rows"])
+    copied.graph = copy.deepcopy(graph.graph)
+    return copied
+
+
+def graph_size(graph: nx.Graph) -> int:
+    """Rough bytes held by a graph, for the memory cap."""
+    table = game_table(graph)
+    clocks = graph.graph.get("clocks")
+    return (
+        table.nbytes
+        + (clocks.nbytes if clocks is not None else 0)
+        + 150 * len(table)
+        + 500 * graph.number_of_nodes()
+        + 200 * graph.number_of_edges()
+    )
+
+
+@dataclass
+class Session:
+    """A stored graph and the version the browser last saw."""
+
+    graph: nx.Graph
+    version: int
+    stored_at: float
+    size: int = 0
+
+
+class GraphSessions:
+    """LRU of graphs by session id, with a TTL, a memory cap and a shared tier.
+
+    Every update bumps the session's version, also kept in the graph's
+    `graph.graph["version"]` to key results derived from it. A worker serves a session from
+    memory when it holds the version the browser asks for, or a newer one,
+    and otherwise reloads it from the shared backend.
+
+    Args:
+        max_entries (int): Maximum number of graphs kept in memory.
+        max_bytes (int): Maximum estimated size of the graphs kept in memory.
+        ttl (float): Seconds a session lives after its last update.
+        backend (Optional[CacheBackend]): Shared store, None for memory only.
+        sweep_interval (float): Seconds between purges of the sessions
+            expired in the shared store.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = SESSION_MEMORY_ENTRIES,
+        max_bytes: int = SESSION_MEMORY_BYTES,
+        ttl: float = SESSION_TTL,
+        backend: Optional[CacheBackend] = None,
+        sweep_interval: float = SESSION_SWEEP_INTERVAL,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.backend = backend
+        self.sweep_interval = sweep_interval
+        self._swept = 0.0
+        self._lock = threading.Lock()
+        self._sessions: OrderedDict[str, Session] = OrderedDict()
+        self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    @property
+    def bytes(self) -> int:
+        """Estimated size of the graphs held in memory."""
+        return self._bytes
+
+    def create(self, graph: nx.Graph) -> dict:
+        """Store a new graph, returning the reference to hand to the browser."""
+        return self._put(uuid.uuid4().hex, 1, graph)
+
+    def update(self, ref: dict, graph: nx.Graph) -> dict:
+        """Store a changed graph under the next version of its session."""
+        return self._put(ref["session"], ref["version"] + 1, graph)
+
+    def get(self, ref: Optional[dict]) -> Optional[nx.Graph]:
+        """The graph of a reference, or None if its session has expired."""
+        if not ref:
+            return None
+        session_id, version = ref["session"], ref["version"]
+        now = time.time()
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None and now - session.stored_at > self.ttl:
+                self._remove(session_id)
+                session = None
+            if session is not None and session.version >= version:
+                self._sessions.move_to_end(session_id)
+                return session.graph
+        session = self._load(session_id)
+        if session is None or session.version < version:
+            return None
+        if now - session.stored_at > self.ttl:
+            return None
+        self._keep(session_id, session)
+        return session.graph
+
+    def _put(self, session_id: str, version: int, graph: nx.Graph) -> dict:
+        graph.graph["version"] = version
+        session = Session(graph, version, time.time())
+        self._keep(session_id, session)
+        if self.backend is not None:
+            self.backend.set(NAMESPACE, session_id, self._dump(session))
+            self.backend.flush()  # Visible to the other workers straight away
+            self._sweep(session.stored_at)
+        return {"session": session_id, "version": version}
+
+    def _sweep(self, now: float) -> None:
+        """Delete the shared sessions nobody updated within the TTL."""
+        with self._lock:
+            if now - self._swept < self.sweep_interval:
+                return
+            self._swept = now
+        # Abandoned sessions are never read again, so they are only found here
+        self.backend.purge(NAMESPACE, now - self.ttl)
+
+    def _keep(self, session_id: str, session: Session) -> None:
+        """Hold a session in memory, evicting expired then least recent ones."""
+        session.size = graph_size(session.graph)
+        with self._lock:
+            self._remove(session_id)
+            self._sessions[session_id] = session
+            self._bytes += session.size
+            for expired in [
+                key
+                for key, held in self._sessions.items()
+                if session.stored_at - held.stored_at > self.ttl
+            ]:
+                self._remove(expired)
+            while len(self._sessions) > 1 and (
+                len(self._sessions) > self.max_entries or self._bytes > self.max_bytes
+            ):
+                self._remove(next(iter(self._sessions)))
+
+    def _remove(self, session_id: str) -> None:
+        if (session := self._sessions.pop(session_id, None)) is not None:
+            self._bytes -= session.size
+
+    @staticmethod
+    def _dump(session: Session) -> bytes:
+        meta = {"version": session.version, "stored_at": session.stored_at}
+        payload = json.dumps(graph_to_data(session.graph), separators=(",", ":"))
+        return json.dumps(meta).encode() + b"\n" + zlib.compress(payload.encode(), 1)
+
+    def _load(self, session_id: str) -> Optional[Session]:
+        if self.backend is None:
+            return None
+        value = self.backend.get(NAMESPACE, session_id)
+        if value is None:
+            return None
+        meta, payload = value.split(b"\n", 1)
+        meta = json.loads(meta)
+        graph = data_to_graph(json.loads(zlib.decompress(payload)))
+        graph.graph["version"] = meta["version"]
+        return Session(graph, meta["version"], meta["stored_at"])
+
+
+_sessions: Optional[GraphSessions] = None
+_sessions_lock = threading.Lock()
+
+
+def get_sessions() -> GraphSessions:
+    """The process-wide session store, shared through the cache when enabled."""
+    global _sessions
+    with _sessions_lock:
+        if _sessions is None:
+            _sessions = GraphSessions()
+        # Looked up every time, as the backend is replaced after a fork
+        _sessions.backend = get_backend() if SESSION_SHARED else None
+        return _sessions
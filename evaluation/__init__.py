@@ -0,0 +1,17 @@
+from evaluation.main import (
+    EnginePool,
+    GameEvaluation,
+    aiter_evaluations,
+    centipawn_losses,
+    fetch_game_evaluations,
+    get_game_evaluations,
+)
+
+__all__ = [
+    "EnginePool",
+    "GameEvaluation",
+    "aiter_evaluations",
+    "centipawn_losses",
+    "fetch_game_evaluations",
+    "get_game_evaluations",
+]
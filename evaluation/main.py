@@ -0,0 +1,260 @@
+"""Engine evaluations of the games behind the graph's edges.
+
+A pool of UCI engine processes, Stockfish by default and one per core,
+evaluates every position of a batch of games. Positions are keyed by their
+Zobrist hash and the search depth, and cached through the `cache` backend,
+so openings shared between games, and transpositions, are evaluated once.
+"""
+
+import asyncio
+import io
+import os
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, Iterable, List, Mapping, Optional, Tuple, Union
+
+import chess
+import chess.engine
+import chess.pgn
+import chess.polyglot
+
+from cache.main import get_backend
+from extraction.client import client
+from extraction.main import fetch_pgns
+from network import GameEdge
+
+STOCKFISH_PATH = os.getenv("STOCKFISH_PATH", "stockfish")
+EVALUATION_ENGINES = int(os.getenv("EVALUATION_ENGINES", str(os.cpu_count() or 1)))
+EVALUATION_DEPTH = int(os.getenv("EVALUATION_DEPTH", "12"))
+EVALUATION_HASH_MB = int(os.getenv("EVALUATION_HASH_MB", "16"))
+NAMESPACE = "evaluations"
+
+MATE_SCORE = 10_000
+"""Centipawns standing for a forced mate."""
+
+LOSS_CAP = 1_000
+"""Evaluations are clamped to this many centipawns when computing losses, so
+that missing one of several winning lines does not count as a blunder."""
+
+
+@dataclass(frozen=True, slots=True)
+class GameEvaluation:
+    """Engine evaluation of every position of a game.
+
+    Attributes:
+        uuid (str): The game.
+        evaluations (List[int]): Centipawns from White's point of view, of
+            the start position and after every move. Mates are `±MATE_SCORE`.
+        losses (List[int]): Centipawns lost by every move, for its player.
+    """
+
+    uuid: str
+    evaluations: List[int]
+    losses: List[int]
+
+    @property
+    def average_losses(self) -> Tuple[float, float]:
+        """Average centipawn loss of White and of Black."""
+        white, black = self.losses[0::2], self.losses[1::2]
+        return (
+            sum(white) / len(white) if white else 0.0,
+            sum(black) / len(black) if black else 0.0,
+        )
+
+
+def centipawn_losses(evaluations: List[int], white_first: bool = True) -> List[int]:
+    """Centipawns lost by each move, given the evaluations around it.
+
+    Args:
+        evaluations (List[int]): Evaluations from White's point of view.
+        white_first (bool): Whether White made the first move.
+
+    Returns:
+        List[int]: One loss per move, never negative.
+    """
+    clamped = [max(-LOSS_CAP, min(LOSS_CAP, value)) for value in evaluations]
+    sign = 1 if white_first else -1
+    losses = []
+    for before, after in zip(clamped, clamped[1:]):
+        losses.append(max(0, sign * (before - after)))
+        sign = -sign
+    return losses
+
+
+def position_key(board: chess.Board, depth: int) -> str:
+    """Cache key of a position searched to `depth`."""
+    return f"{chess.polyglot.zobrist_hash(board):016x}-{depth}"
+
+
+def terminal_score(board: chess.Board) -> Optional[int]:
+    """Score of a finished game's final position, or None if play goes on."""
+    if board.is_checkmate():
+        return -MATE_SCORE if board.turn == chess.WHITE else MATE_SCORE
+    if board.is_game_over():
+        return 0
+    return None
+
+
+class EnginePool:
+    """UCI engine processes searching positions concurrently.
+
+    Use as an async context manager, which starts and quits the engines.
+    Each engine searches one position at a time with a single thread.
+
+    Args:
+        command (Union[str, List[str]]): Command starting a UCI engine.
+        size (int): Number of engine processes.
+        depth (int): Search depth of every evaluation.
+    """
+
+    def __init__(
+        self,
+        command: Union[str, List[str]] = STOCKFISH_PATH,
+        size: int = EVALUATION_ENGINES,
+        depth: int = EVALUATION_DEPTH,
+    ):
+        self.command = command
+        self.size = size
+        self.depth = depth
+        self._engines: List[chess.engine.UciProtocol] = []
+        self._idle: Optional[asyncio.Queue] = None
+
+    async def __aenter__(self) -> "EnginePool":
+        self._idle = asyncio.Queue()
+        try:
+            for _ in range(self.size):
+                _, engine = await chess.engine.popen_uci(self.command)
+                self._engines.append(engine)
+                options = {"Threads": 1, "Hash": EVALUATION_HASH_MB}
+                await engine.configure(
+                    {
+                        name: value
+                        for name, value in options.items()
+                        if name in engine.options
+                    }
+                )
+                self._idle.put_nowait(engine)
+        except BaseException:
+            await self.__aexit__(None, None, None)
+            raise
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        engines, self._engines = self._engines, []
+        for engine in engines:
+            try:
+                await engine.quit()
+            except chess.engine.EngineError:
+                pass
+
+    async def evaluate(self, board: chess.Board) -> int:
+        """Centipawns of a position from White's point of view."""
+        if self._idle is None:
+            raise RuntimeError("EnginePool must be entered before use.")
+        engine = await self._idle.get()
+        try:
+            info = await engine.analyse(board, chess.engine.Limit(depth=self.depth))
+        finally:
+            self._idle.put_nowait(engine)
+        return info["score"].white().score(mate_score=MATE_SCORE)
+
+
+def read_positions(pgn: str) -> List[chess.Board]:
+    """The start position of a game and the position after each of its moves."""
+    game = chess.pgn.read_game(io.StringIO(pgn))
+    if game is None:
+        return []
+    board = game.board()
+    positions = [board.copy(stack=False)]
+    for move in game.mainline_moves():
+        board.push(move)
+        positions.append(board.copy(stack=False))
+    return positions
+
+
+async def aiter_evaluations(
+    pgns: Mapping[str, str], pool: Optional[EnginePool] = None
+) -> AsyncIterator[GameEvaluation]:
+    """Evaluate games, yielding each one as soon as all its positions are known.
+
+    Every distinct position of the batch is searched once, by the first free
+    engine, unless the cache already holds it.
+
+    Args:
+        pgns (Mapping[str, str]): PGN text by game uuid.
+        pool (Optional[EnginePool]): Engines to use, entered already. A pool
+            of `EVALUATION_ENGINES` Stockfish processes is started if None.
+
+    Yields:
+        GameEvaluation: Evaluations of each game, in the order they finish.
+            Games whose PGN holds no game are left out.
+    """
+    if pool is None:
+        async with EnginePool() as pool:
+            async for evaluation in aiter_evaluations(pgns, pool):
+                yield evaluation
+        return
+
+    backend = get_backend()
+    searches: Dict[str, asyncio.Task] = {}
+
+    async def evaluate(key: str, board: chess.Board) -> int:
+        if (cached := backend.get(NAMESPACE, key)) is not None:
+            return int(cached)
+        score = terminal_score(board)
+        if score is None:
+            score = await pool.evaluate(board)
+        backend.set(NAMESPACE, key, str(score).encode())
+        return score
+
+    async def evaluate_game(uuid: str, positions: List[chess.Board]) -> GameEvaluation:
+        tasks = []
+        for board in positions:
+            key = position_key(board, pool.depth)
+            if key not in searches:
+                searches[key] = asyncio.ensure_future(evaluate(key, board))
+            tasks.append(searches[key])
+        evaluations = list(await asyncio.gather(*tasks))
+        white_first = positions[0].turn == chess.WHITE
+        return GameEvaluation(
+            uuid, evaluations, centipawn_losses(evaluations, white_first)
+        )
+
+    games = [
+        asyncio.ensure_future(evaluate_game(uuid, positions))
+        for uuid, pgn in pgns.items()
+        if (positions := read_positions(pgn))
+    ]
+    try:
+        for game in asyncio.as_completed(games):
+            yield await game
+    finally:
+        for task in [*games, *searches.values()]:
+            task.cancel()
+        backend.flush()
+
+
+async def fetch_game_evaluations(
+    games: Iterable[GameEdge],
+) -> Dict[str, GameEvaluation]:
+    """Fetch the PGN of games and evaluate them asynchronously.
+
+    Args:
+        games (Iterable[GameEdge]): The games to evaluate, e.g. those of an edge.
+
+    Returns:
+        Dict[str, GameEvaluation]: Evaluations by game uuid.
+    """
+    pgns = await fetch_pgns(games)
+    return {evaluation.uuid: evaluation async for evaluation in aiter_evaluations(pgns)}
+
+
+def get_game_evaluations(games: Iterable[GameEdge]) -> Dict[str, GameEvaluation]:
+    """Get the evaluations of games, by game uuid.
+
+    Args:
+        games (Iterable[GameEdge]): The games to evaluate, e.g. those of an edge.
+
+    Returns:
+        Dict[str, GameEvaluation]: Evaluations by game uuid.
+    """
+    return client.run(fetch_game_evaluations(games))
@@ -4,10 +4,17 @@ from chessdotcom import Client
 from dotenv import load_dotenv
 
 from extraction.main import (
+    aiter_archive_games,
     fetch_archive_games,
+    fetch_opponents_and_games_by_month,
+    fetch_pgns,
     fetch_player_data,
+    get_cached_pgns,
     get_opponents_and_games_by_month,
+    get_pgn,
+    get_pgns,
     get_player_data,
+    iter_archive_games,
 )
 
 load_dotenv()
@@ -17,5 +24,12 @@ __all__ = [
     "get_player_data",
     "fetch_player_data",
     "fetch_archive_games",
+    "iter_archive_games",
+    "aiter_archive_games",
+    "fetch_opponents_and_games_by_month",
     "get_opponents_and_games_by_month",
+    "fetch_pgns",
+    "get_pgns",
+    "get_pgn",
+    "get_cached_pgns",
 ]
@@ -1,62 +1,68 @@
-import random
-import time
-from functools import wraps
-
 import chessdotcom as cdc
 
-from cache import cache
+from cache import TTL, MonthlyArchive, cache
+from cache.policy import PROFILE_TTL
+from extraction.client import client
+
+
+def _month_path(username: str, year: int, month: int) -> str:
+    """Build the monthly archive path the same way chessdotcom does."""
+    return f"/player/{username}/games/{year}/{str(month).zfill(2)}"
+
+
+@cache(name="get_player_game_archives", policy=TTL(PROFILE_TTL))
+async def fetch_player_game_archives(username: str):
+    """Fetch the game archives of a player asynchronously."""
+    return await client.get_json(f"/player/{username}/games/archives")
+
+
+@cache(name="get_player_games_by_month", policy=MonthlyArchive())
+async def fetch_player_games_by_month(username: str, year: int, month: int):
+    """Fetch the games of a player by month asynchronously."""
+    return await client.get_json(_month_path(username, year, month))
+
+
+@cache(name="get_player_games_by_month_pgn", policy=MonthlyArchive())
+async def fetch_player_games_by_month_pgn(username: str, year: int, month: int):
+    """Fetch the games of a player by month, as PGN, asynchronously."""
+    return {"pgn": await client.get_text(_month_path(username, year, month) + "/pgn")}
+
 
+@cache(name="get_player_profile", policy=TTL(PROFILE_TTL))
+async def fetch_player_profile(username: str):
+    """Fetch the profile of a player asynchronously."""
+    return {"player": await client.get_json(f"/player/{username}")}
 
-def api_429_retry(func):
-    @wraps(func)
-    def wrapper(*args, **kwargs):
-        while True:
-            try:
-                return func(*args, **kwargs)
-            except cdc.ChessDotComError as exc:
-                if exc.status_code == 429:
-                    print("Retrying after some seconds...")
-                    time.sleep(random.randint(5, 15))
-                    continue
-                else:
-                    raise
 
-    return wrapper
+@cache(name="get_player_stats", policy=TTL(PROFILE_TTL))
+async def fetch_player_stats(username: str):
+    """Fetch the stats of a player asynchronously."""
+    return {"stats": await client.get_json(f"/player/{username}/stats")}
 
 
-@cache
-@api_429_retry
 def get_player_game_archives(username: str):
     """Get the game archives of a player."""
-    return cdc.get_player_game_archives(username).json
+    return client.run(fetch_player_game_archives(username))
 
 
-@cache
-@api_429_retry
 def get_player_games_by_month(username: str, year: int, month: int):
     """Get the games of a player by month."""
-    return cdc.get_player_games_by_month(username, year, month).json
+    return client.run(fetch_player_games_by_month(username, year, month))
 
 
-@cache
-@api_429_retry
 def get_player_games_by_month_pgn(username: str, year: int, month: int):
     """Get the games of a player by month."""
-    return cdc.get_player_games_by_month_pgn(username, year, month).json
+    return client.run(fetch_player_games_by_month_pgn(username, year, month))
 
 
-@cache
-@api_429_retry
 def get_player_profile(username: str):
     """Get the profile of a player."""
-    return cdc.get_player_profile(username).json
+    return client.run(fetch_player_profile(username))
 
 
-@cache
-@api_429_retry
 def get_player_stats(username: str):
     """Get the stats of a player."""
-    return cdc.get_player_stats(username).json
+    return client.run(fetch_player_stats(username))
 
 
 def main():
@@ -65,7 +71,7 @@ def main():
         "My Python Application. " "Contact me at email@example.com"
     )
     response = get_player_profile("fabianocaruana")
-    player_name = response.player.name
+    player_name = response["player"]["name"]
     print(player_name)
 
 
@@ -0,0 +1,164 @@
+"""Pooled asyncio HTTP client for the chess.com API."""
+
+import asyncio
+import atexit
+import json
+import os
+import threading
+from typing import Any, Coroutine, Optional, TypeVar
+
+import aiohttp
+import chessdotcom as cdc
+
+from cache.policy import NotModified, Revalidation, take_revalidation
+from extraction.ratelimit import RateLimiter, RateLimitError, limiter
+
+API_URL = os.getenv("CHESS_API_URL", "https://api.chess.com/pub")
+MAX_CONCURRENT_REQUESTS = int(os.getenv("MAX_CONCURRENT_REQUESTS", "8"))
+REQUEST_TIMEOUT = 30
+
+T = TypeVar("T")
+
+
+class AsyncClient:
+    """Keep-alive HTTP client shared by every thread and coroutine of a process.
+
+    Requests run on a background event loop owned by the client, so one
+    `aiohttp.ClientSession` (and its connection pool) outlives the short-lived
+    loops created by `asyncio.run` in Dash callbacks.
+
+    Args:
+        base_url (str): Root URL of the API. Defaults to `API_URL`.
+        max_concurrency (int): Maximum number of requests in flight at once.
+        rate_limiter (RateLimiter): Limiter shared with the rest of the process.
+    """
+
+    def __init__(
+        self,
+        base_url: str = API_URL,
+        max_concurrency: int = MAX_CONCURRENT_REQUESTS,
+        rate_limiter: RateLimiter = limiter,
+    ):
+        self.base_url = base_url
+        self.max_concurrency = max_concurrency
+        self.rate_limiter = rate_limiter
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pid: Optional[int] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """The client's event loop, started on first use (and again after a fork)."""
+        with self._lock:
+            if self._loop is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._loop = asyncio.new_event_loop()
+                self._session = None
+                self._semaphore = None
+                threading.Thread(
+                    target=self._loop.run_forever, name="chess-api-client", daemon=True
+                ).start()
+            return self._loop
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Return the pooled session. Must be called on the client loop."""
+        if self._session is None or self._session.closed:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_concurrency),
+                headers={
+                    key: value
+                    for key, value in cdc.Client.request_config["headers"].items()
+                    if value is not None
+                },
+                timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT),
+            )
+        return self._session
+
+    async def _request(
+        self, path: str, validators: Optional[Revalidation] = None
+    ) -> str:
+        session = self._get_session()
+        assert self._semaphore is not None
+        url = self.base_url + path
+        request_headers = {}
+        if validators is not None and validators.etag is not None:
+            request_headers["If-None-Match"] = validators.etag
+        if validators is not None and validators.last_modified is not None:
+            request_headers["If-Modified-Since"] = validators.last_modified
+        attempt = 0
+        while True:
+            await self.rate_limiter.acquire_async()
+            async with self._semaphore:
+                async with session.get(url, headers=request_headers) as response:
+                    text = await response.text()
+                    status, response_headers = response.status, response.headers
+            if status == 429:
+                if not self.rate_limiter.on_throttled(response_headers, attempt):
+                    raise RateLimitError(url, attempt + 1, response_headers)
+                attempt += 1
+                print(f"Rate limited on {url}. Retry {attempt}...")
+                continue
+            self.rate_limiter.on_response(response_headers)
+            if validators is not None and status == 200:
+                validators.etag = response_headers.get("ETag")
+                validators.last_modified = response_headers.get("Last-Modified")
+            if validators is not None and status == 304:
+                # A 304 may omit validators that did not change.
+                validators.etag = response_headers.get("ETag", validators.etag)
+                validators.last_modified = response_headers.get(
+                    "Last-Modified", validators.last_modified
+                )
+                raise NotModified(url)
+            if status != 200:
+                raise cdc.ChessDotComError(
+                    status_code=status, response_text=text, headers=response_headers
+                )
+            return text
+
+    async def _dispatch(self, coro: Coroutine[Any, Any, T]) -> T:
+        """Await `coro` on the client loop from whichever loop is running."""
+        loop = self.loop
+        if asyncio.get_running_loop() is loop:
+            return await coro
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
+
+    async def get_text(self, path: str) -> str:
+        """GET `path` and return the response body as text.
+
+        Inside a cached call with stored validators the request is conditional,
+        and `NotModified` is raised if the upstream answers 304.
+        """
+        return await self._dispatch(self._request(path, take_revalidation()))
+
+    async def get_json(self, path: str) -> dict:
+        """GET `path` and return the decoded JSON body."""
+        return json.loads(await self.get_text(path))
+
+    def run(self, coro: Coroutine[Any, Any, T]) -> T:
+        """Run `coro` on the client loop and block until it completes."""
+        loop = self.loop
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            raise RuntimeError("AsyncClient.run cannot block its own event loop.")
+        return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+    def close(self) -> None:
+        """Close the pooled session and stop the client loop."""
+        with self._lock:
+            loop, session = self._loop, self._session
+            self._loop = self._session = self._semaphore = None
+        if loop is None or self._pid != os.getpid():
+            return
+        if session is not None and not session.closed:
+            asyncio.run_coroutine_threadsafe(session.close(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+
+
+client = AsyncClient()
+atexit.register(client.close)
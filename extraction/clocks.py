@@ -0,0 +1,286 @@
+"""Per-move clock readings out of chess.com PGN, without building boards.
+
+chess.com annotates every move with the time left, `{[%clk 0:09:58.3]}`.
+The extractor only scans the text for those comments and a few headers, so
+it keeps up with bulk archives, and `ClockTable` lays the readings of many
+games out as flat NumPy arrays with one entry per move.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from extraction.api import fetch_player_games_by_month_pgn
+from extraction.client import client
+
+LOW_TIME_FRACTION = 0.1
+"""Share of the base time under which a player is short of time."""
+
+CLOCK = re.compile(r"\[%clk (\d+):(\d+):(\d+(?:\.\d+)?)\]")
+HEADER = re.compile(r'^\[(White|Black|TimeControl) "([^"]*)"\]', re.MULTILINE)
+GAME_START = re.compile(r"^\[Event ", re.MULTILINE)
+
+
+def parse_time_control(time_control: str) -> Tuple[float, float]:
+    """Base time and increment in seconds, e.g. `600+5` or daily `1/86400`."""
+    base, _, increment = time_control.partition("+")
+    base = base.rpartition("/")[2]
+    try:
+        return float(base), float(increment or 0)
+    except ValueError:  # "-" for untimed games
+        return 0.0, 0.0
+
+
+@dataclass(frozen=True, slots=True)
+class GameClocks:
+    """Clock readings of one game.
+
+    Attributes:
+        white (str): Username of White.
+        black (str): Username of Black.
+        base (float): Starting time of each player, in seconds.
+        increment (float): Seconds added after each move.
+        clocks (np.ndarray): Seconds left to the mover after every move.
+    """
+
+    white: str
+    black: str
+    base: float
+    increment: float
+    clocks: np.ndarray
+
+    @property
+    def moves(self) -> int:
+        """Number of moves, counting both players."""
+        return len(self.clocks)
+
+
+def parse_game_clocks(pgn: str) -> GameClocks:
+    """Read the clocks and players of a single PGN game."""
+    headers = dict(HEADER.findall(pgn))
+    readings = CLOCK.findall(pgn)
+    clocks = (
+        np.array(readings, dtype=np.float32) @ np.array([3600, 60, 1], np.float32)
+        if readings
+        else np.zeros(0, dtype=np.float32)
+    )
+    base, increment = parse_time_control(headers.get("TimeControl", "-"))
+    return GameClocks(
+        headers.get("White", ""), headers.get("Black", ""), base, increment, clocks
+    )
+
+
+def iter_game_clocks(chunks: Iterable[str]) -> Iterator[GameClocks]:
+    """Stream the clocks of every game of a multi-game PGN text.
+
+    Args:
+        chunks (Iterable[str]): The text in pieces of any size, e.g. lines of
+            a file. A game is parsed as soon as the next one starts.
+
+    Yields:
+        GameClocks: The clocks of each game, in order.
+    """
+    buffer, start = "", None
+    for chunk in chunks:
+        # Only the new text is scanned, back far enough for a cut-off marker
+        scan = max(0, len(buffer) - len("[Event ") + 1)
+        buffer += chunk
+        for match in GAME_START.finditer(buffer, scan):
+            if start is not None:
+                yield parse_game_clocks(buffer[start : match.start()])
+            start = match.start()
+        if start:
+            buffer, start = buffer[start:], 0
+    if buffer.strip():
+        yield parse_game_clocks(buffer)
+
+
+class ClockTable:
+    """Clock readings of many games, as flat arrays with one entry per move.
+
+    Games are appended in order, so the n-th game can be matched to the
+    n-th row of another table, e.g. the graph's `GameTable`.
+    """
+
+    def __init__(self):
+        self._games: List[GameClocks] = []
+        self._columns: Optional[Dict[str, np.ndarray]] = None
+        self.players: List[str] = []
+        self._codes: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._games)
+
+    def append(self, games: Iterable[GameClocks]) -> None:
+        """Append games to the table."""
+        self._games.extend(games)
+        self._columns = None
+
+    def replace(self, games: Mapping[int, GameClocks]) -> None:
+        """Replace the clocks of games already in the table, by row."""
+        for row, game in games.items():
+            self._games[row] = game
+        self._columns = None
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the clock readings."""
+        return sum(game.clocks.nbytes for game in self._games)
+
+    def to_dict(self) -> dict:
+        """JSON-serialisable form, e.g. to store with a graph session."""
+        return {
+            "white": [game.white for game in self._games],
+            "black": [game.black for game in self._games],
+            "base": [game.base for game in self._games],
+            "increment": [game.increment for game in self._games],
+            # Readings are in tenths of a second
+            "clocks": [
+                game.clocks.astype(np.float64).round(1).tolist() for game in self._games
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ClockTable":
+        """Rebuild a table from `to_dict` output."""
+        table = cls()
+        table.append(
+            GameClocks(white, black, base, increment, np.array(clocks, np.float32))
+            for white, black, base, increment, clocks in zip(
+                data["white"],
+                data["black"],
+                data["base"],
+                data["increment"],
+                data["clocks"],
+            )
+        )
+        return table
+
+    def _code(self, player: str) -> int:
+        if player not in self._codes:
+            self._codes[player] = len(self.players)
+            self.players.append(player)
+        return self._codes[player]
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Flat columns of the table.
+
+        Returns:
+            Dict[str, np.ndarray]: One entry per move for `game`, `color` (0
+                for White), `player` code into `players`, `clock` left and
+                `elapsed` seconds. One entry per game for `base` time and
+                the `players` codes of White and Black.
+        """
+        if self._columns is not None:
+            return self._columns
+        lengths = np.array([game.moves for game in self._games], dtype=np.int64)
+        game = np.repeat(np.arange(len(self._games), dtype=np.int32), lengths)
+        starts = np.cumsum(lengths) - lengths
+        ply = np.arange(lengths.sum()) - np.repeat(starts, lengths)
+        color = (ply % 2).astype(np.uint8)
+        codes = np.array(
+            [[self._code(g.white), self._code(g.black)] for g in self._games],
+            dtype=np.int32,
+        ).reshape(-1, 2)
+        base = np.array([g.base for g in self._games], dtype=np.float32)
+        increment = np.array([g.increment for g in self._games], dtype=np.float32)
+        clock = np.concatenate(
+            [g.clocks for g in self._games] or [np.zeros(0, dtype=np.float32)]
+        )
+
+        # Time taken: the mover's previous reading, or the base time, minus
+        # this one, plus the increment earned by the move
+        previous = np.roll(clock, 2)
+        previous[ply < 2] = base[game[ply < 2]]
+        elapsed = np.maximum(previous - clock + increment[game], 0)
+        self._columns = {
+            "game": game,
+            "color": color,
+            "player": codes[game, color] if len(game) else game,
+            "clock": clock,
+            "elapsed": elapsed,
+            "base": base,
+            "players": codes,
+        }
+        return self._columns
+
+    def player_features(
+        self,
+        accuracies: Optional[np.ndarray] = None,
+        low_time: float = LOW_TIME_FRACTION,
+    ) -> pd.DataFrame:
+        """Time usage of every player over all their moves.
+
+        Args:
+            accuracies (Optional[np.ndarray]): Accuracy of White and Black in
+                every game, shape `(games, 2)`, NaN where unknown.
+            low_time (float): Share of the base time under which a player is
+                short of time.
+
+        Returns:
+            pd.DataFrame: By player, the number of `moves`, the `mean_time`
+                and `time_variance` of a move, the share of `low_time_moves`,
+                and with `accuracies`, the mean `low_time_accuracy` of the
+                games in which the player ran short of time.
+        """
+        columns = self.columns()
+        player, elapsed = columns["player"], columns["elapsed"].astype(np.float64)
+        size = len(self.players)
+        moves = np.bincount(player, minlength=size)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.bincount(player, elapsed, size) / moves
+            variance = np.bincount(player, elapsed**2, size) / moves - mean**2
+            low = columns["clock"] < low_time * columns["base"][columns["game"]]
+            features = {
+                "player": self.players,
+                "moves": moves,
+                "mean_time": mean,
+                "time_variance": np.maximum(variance, 0),
+                "low_time_moves": np.bincount(player, low, size) / moves,
+            }
+            if accuracies is not None:
+                # Games, by colour, in which the player ran short of time
+                short = np.zeros((len(self), 2), dtype=bool)
+                short[columns["game"][low], columns["color"][low]] = True
+                games, color = np.nonzero(short & ~np.isnan(accuracies))
+                codes = columns["players"][games, color]
+                features["low_time_accuracy"] = np.bincount(
+                    codes, accuracies[games, color], size
+                ) / np.bincount(codes, minlength=size)
+        return pd.DataFrame(features)
+
+
+async def fetch_player_clocks_by_month(
+    username: str, year: int, month: int
+) -> ClockTable:
+    """Fetch the clock readings of a player's games in a month asynchronously.
+
+    Args:
+        username (str): The username of the player.
+        year (int): The year of the archive.
+        month (int): The month of the archive.
+
+    Returns:
+        ClockTable: The clocks of every game of the month.
+    """
+    text = (await fetch_player_games_by_month_pgn(username, year, month))["pgn"]
+    table = ClockTable()
+    table.append(iter_game_clocks([text]))
+    return table
+
+
+def get_player_clocks_by_month(username: str, year: int, month: int) -> ClockTable:
+    """Get the clock readings of a player's games in a month.
+
+    Args:
+        username (str): The username of the player.
+        year (int): The year of the archive.
+        month (int): The month of the archive.
+
+    Returns:
+        ClockTable: The clocks of every game of the month.
+    """
+    return client.run(fetch_player_clocks_by_month(username, year, month))
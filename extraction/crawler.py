@@ -0,0 +1,370 @@
+"""Crawl the archives of players and of everyone they played, resumably.
+
+Usage: `crawl SEED [SEED ...] [--depth 2] [--max-users N] [--max-games N]
+[--start 2024-09] [--end 2024-10]`
+
+The frontier, the visited players, the finished archive months and the
+games found are kept in one SQLite file, `data_cache/crawl.sqlite3` by
+default. Each month is committed in a single transaction with its games and
+the opponents it adds to the frontier, so a crawl stopped at any point, even
+killed, resumes from its last finished month, and games are only ever
+appended.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Set, Tuple
+
+from chessdotcom import ChessDotComError
+
+from cache import MonthlyArchive
+from cache.main import CACHE_DIR
+from extraction.api import fetch_player_game_archives, fetch_player_games_by_month
+from extraction.main import MAX_CONCURRENT_MONTHS, archive_months
+from extraction.prefetch import parse_month
+from extraction.ratelimit import RateLimitError
+
+MAX_CONCURRENT_CRAWLS = int(os.getenv("MAX_CONCURRENT_CRAWLS", "4"))
+STATE_FILE = CACHE_DIR / "crawl.sqlite3"
+
+QUEUED, DONE, FAILED = 0, 1, 2
+"""Status of a player: in the frontier, crawled, or given up on."""
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS players ("
+    " username TEXT PRIMARY KEY,"
+    " depth INTEGER NOT NULL,"
+    " status INTEGER NOT NULL DEFAULT 0"
+    ")",
+    "CREATE INDEX IF NOT EXISTS players_frontier ON players (status, depth)",
+    "CREATE TABLE IF NOT EXISTS months ("
+    " username TEXT NOT NULL,"
+    " year INTEGER NOT NULL,"
+    " month INTEGER NOT NULL,"
+    " PRIMARY KEY (username, year, month)"
+    ") WITHOUT ROWID",
+    "CREATE TABLE IF NOT EXISTS games ("
+    " uuid TEXT PRIMARY KEY,"
+    " white TEXT NOT NULL,"
+    " black TEXT NOT NULL,"
+    " end_time INTEGER NOT NULL,"
+    " game TEXT NOT NULL"
+    ")",
+)
+
+
+class CrawlState:
+    """Frontier, visited players and games of a crawl, stored in SQLite.
+
+    Usernames are stored lower-cased, as chess.com matches them regardless
+    of case. Players are taken from the frontier breadth-first.
+
+    Args:
+        path (Path): Database file, created if missing.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        with self._connection:
+            for statement in SCHEMA:
+                self._connection.execute(statement)
+        self._claimed: Set[str] = set()
+        self.games = self._count("SELECT COUNT(*) FROM games")
+        self.visited = self._count(
+            "SELECT COUNT(*) FROM players WHERE status != ?", QUEUED
+        )
+
+    def _count(self, query: str, *args) -> int:
+        return self._connection.execute(query, args).fetchone()[0]
+
+    @property
+    def queued(self) -> int:
+        """Players waiting in the frontier, including those being crawled."""
+        return self._count("SELECT COUNT(*) FROM players WHERE status = ?", QUEUED)
+
+    def add(self, usernames: Iterable[str], depth: int = 0) -> None:
+        """Queue players not seen before, at `depth` hops from the seeds."""
+        with self._connection:
+            self._enqueue(usernames, depth)
+
+    def _enqueue(self, usernames: Iterable[str], depth: int) -> None:
+        self._connection.executemany(
+            "INSERT OR IGNORE INTO players (username, depth) VALUES (?, ?)",
+            [(username.lower(), depth) for username in usernames],
+        )
+
+    def claim(self) -> Optional[Tuple[str, int]]:
+        """Take the shallowest queued player nobody is crawling yet.
+
+        Returns:
+            Optional[Tuple[str, int]]: The username and depth, or None if the
+                frontier holds nobody else.
+        """
+        rows = self._connection.execute(
+            "SELECT username, depth FROM players WHERE status = ?"
+            " ORDER BY depth, rowid LIMIT ?",
+            (QUEUED, len(self._claimed) + 1),
+        )
+        for username, depth in rows:
+            if username not in self._claimed:
+                self._claimed.add(username)
+                return username, depth
+        return None
+
+    def finished_months(self, username: str) -> Set[Tuple[int, int]]:
+        """Months of a player committed by this or an earlier run."""
+        return set(
+            self._connection.execute(
+                "SELECT year, month FROM months WHERE username = ?", (username,)
+            )
+        )
+
+    def record_month(
+        self,
+        username: str,
+        year: int,
+        month: int,
+        games: List[dict],
+        depth: Optional[int] = None,
+    ) -> None:
+        """Append a month's games and queue the opponents in one transaction.
+
+        Args:
+            username (str): The player whose archive it is.
+            year (int): The year of the archive.
+            month (int): The month of the archive.
+            games (List[dict]): The games of the archive.
+            depth (Optional[int]): Depth to queue opponents at, or None to
+                leave them out of the frontier.
+        """
+        with self._connection:
+            inserted = self._connection.executemany(
+                "INSERT OR IGNORE INTO games (uuid, white, black, end_time, game)"
+                " VALUES (?, ?, ?, ?, ?)",
+                [
+                    (
+                        game["uuid"],
+                        game["white"]["username"],
+                        game["black"]["username"],
+                        game.get("end_time", 0),
+                        json.dumps(game),
+                    )
+                    for game in games
+                ],
+            ).rowcount
+            if depth is not None:
+                self._enqueue(
+                    (
+                        game[color]["username"]
+                        for game in games
+                        for color in ("white", "black")
+                    ),
+                    depth,
+                )
+            # The running month keeps growing, so it is fetched again next time
+            if MonthlyArchive.month_end(year, month) < time.time():
+                self._connection.execute(
+                    "INSERT OR IGNORE INTO months VALUES (?, ?, ?)",
+                    (username, year, month),
+                )
+        self.games += max(inserted, 0)
+
+    def finish(self, username: str, status: int = DONE) -> None:
+        """Take a player out of the frontier."""
+        with self._connection:
+            self._connection.execute(
+                "UPDATE players SET status = ? WHERE username = ?", (status, username)
+            )
+        self._claimed.discard(username)
+        self.visited += 1
+
+    def release(self, username: str) -> None:
+        """Give a claimed player back to the frontier, unfinished."""
+        self._claimed.discard(username)
+
+    def players(self, status: Optional[int] = None) -> List[str]:
+        """Usernames of every player seen, or only of those with `status`."""
+        if status is None:
+            rows = self._connection.execute("SELECT username FROM players")
+        else:
+            rows = self._connection.execute(
+                "SELECT username FROM players WHERE status = ?", (status,)
+            )
+        return [username for (username,) in rows]
+
+    def iter_games(self) -> Iterator[dict]:
+        """Yield every game found, in the order they were appended."""
+        for (game,) in self._connection.execute(
+            "SELECT game FROM games ORDER BY rowid"
+        ):
+            yield json.loads(game)
+
+    def close(self) -> None:
+        self._connection.close()
+
+
+async def crawl(
+    seeds: List[str],
+    state: CrawlState,
+    depth: int = 1,
+    max_users: Optional[int] = None,
+    max_games: Optional[int] = None,
+    start: Optional[Tuple[int, int]] = None,
+    end: Optional[Tuple[int, int]] = None,
+    max_concurrency: int = MAX_CONCURRENT_CRAWLS,
+    interval: float = 1.0,
+) -> None:
+    """Crawl players breadth-first from `seeds`, resuming from `state`.
+
+    Every player is crawled once: those already visited, by this or an
+    earlier run, are never queued again.
+    `max_concurrency` players are crawled at once, each fetching up to
+    `MAX_CONCURRENT_MONTHS` archive months at a time; every request goes
+    through the shared client and its rate limiter.
+
+    Args:
+        seeds (List[str]): Usernames to start from, queued unless seen before.
+        state (CrawlState): The crawl to continue.
+        depth (int): Levels of opponents to crawl; 1 only crawls the seeds.
+        max_users (Optional[int]): Stop once this many players were crawled,
+            counting earlier runs.
+        max_games (Optional[int]): Stop taking players once this many games
+            were found, counting earlier runs. Players in flight finish.
+        start (Optional[Tuple[int, int]]): First `(year, month)` to fetch.
+        end (Optional[Tuple[int, int]]): Last `(year, month)` to fetch.
+        max_concurrency (int): Maximum number of players crawled at once.
+        interval (float): Seconds between progress lines.
+    """
+    state.add(seeds)
+    months_semaphore = asyncio.Semaphore(MAX_CONCURRENT_MONTHS)
+    began = printed = time.monotonic()
+    visited = state.visited
+
+    def report(force: bool = False) -> None:
+        nonlocal printed
+        now = time.monotonic()
+        if force or now - printed >= interval:
+            printed = now
+            rate = (state.visited - visited) / max(now - began, 1e-9)
+            print(
+                f"{state.visited} players crawled, {state.queued - len(running)}"
+                f" queued, {state.games} games, {rate:.1f} players/s",
+                flush=True,
+            )
+
+    async def fetch_month(username: str, level: int, year: int, month: int) -> None:
+        async with months_semaphore:
+            archive = await fetch_player_games_by_month(username, year, month)
+        state.record_month(
+            username,
+            year,
+            month,
+            archive.get("games", []),
+            level + 1 if level + 1 < depth else None,
+        )
+
+    async def expand(username: str, level: int) -> None:
+        """Commit every month of a player not committed yet."""
+        tasks: List[asyncio.Future] = []
+        try:
+            finished = state.finished_months(username)
+            for year, month in archive_months(
+                await fetch_player_game_archives(username)
+            ):
+                if (
+                    (start is None or (year, month) >= start)
+                    and (end is None or (year, month) <= end)
+                    and (year, month) not in finished
+                ):
+                    tasks.append(
+                        asyncio.ensure_future(fetch_month(username, level, year, month))
+                    )
+            await asyncio.gather(*tasks)
+        except RateLimitError:
+            state.release(username)
+            raise
+        except ChessDotComError as exc:
+            print(f"Skipping {username}: {exc}")
+            state.finish(username, FAILED)
+        except BaseException:
+            state.release(username)
+            raise
+        else:
+            state.finish(username)
+        finally:
+            for task in tasks:
+                task.cancel()
+        report()
+
+    def exhausted() -> bool:
+        return (
+            max_users is not None and state.visited + len(running) >= max_users
+        ) or (max_games is not None and state.games >= max_games)
+
+    running: Set[asyncio.Future] = set()
+    try:
+        while True:
+            while len(running) < max_concurrency and not exhausted():
+                claimed = state.claim()
+                if claimed is None:
+                    break
+                running.add(asyncio.ensure_future(expand(*claimed)))
+            if not running:
+                break
+            done, running = await asyncio.wait(
+                running, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                task.result()
+    finally:
+        for task in running:
+            task.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+        running = set()
+        report(force=True)
+
+
+def main():
+    """Run the crawl from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("seeds", nargs="*", help="Usernames to start from.")
+    parser.add_argument("--depth", type=int, default=1)
+    parser.add_argument("--max-users", type=int)
+    parser.add_argument("--max-games", type=int)
+    parser.add_argument("--start", type=parse_month)
+    parser.add_argument("--end", type=parse_month)
+    parser.add_argument("--concurrency", type=int, default=MAX_CONCURRENT_CRAWLS)
+    parser.add_argument("--state", type=Path, default=STATE_FILE)
+    args = parser.parse_args()
+
+    state = CrawlState(args.state)
+    try:
+        asyncio.run(
+            crawl(
+                args.seeds,
+                state,
+                args.depth,
+                args.max_users,
+                args.max_games,
+                args.start,
+                args.end,
+                args.concurrency,
+            )
+        )
+    except KeyboardInterrupt:
+        print("Interrupted: run the same command again to resume.")
+    finally:
+        state.close()
+
+
+if __name__ == "__main__":
+    main()
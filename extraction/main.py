@@ -1,43 +1,134 @@
 import asyncio
-from datetime import datetime
-from typing import Dict, List, Optional
+import os
+from collections import deque
+from datetime import datetime, timezone
+from typing import (
+    AsyncIterator,
+    Container,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
 
 from chessdotcom import ChessDotComError
 
 from extraction.api import (
-    get_player_game_archives,
+    fetch_player_game_archives,
+    fetch_player_games_by_month,
+    fetch_player_profile,
+    fetch_player_stats,
     get_player_games_by_month,
-    get_player_profile,
-    get_player_stats,
 )
+from extraction.client import client
 from network import GameEdge, PlayerDetails, PlayerNode
 
 GAME_TYPE = "chess_rapid"
+MAX_CONCURRENT_MONTHS = int(os.getenv("MAX_CONCURRENT_MONTHS", "8"))
+
+
+def archive_months(archives: dict) -> List[Tuple[int, int]]:
+    """Parse `(year, month)` pairs out of a game archives response."""
+    return [
+        (int(url.split("/")[-2]), int(url.split("/")[-1]))
+        for url in archives["archives"]
+    ]
+
+
+async def _archive_months(username: str, new_only: bool) -> List[Tuple[int, int]]:
+    """Months of a player's archive, optionally without those cached fresh."""
+    if new_only:  # A new month may have started since the list was cached
+        fetch_player_game_archives.expire(username)
+    months = archive_months(await fetch_player_game_archives(username))
+    if new_only:
+        months = [
+            (year, month)
+            for year, month in months
+            if not fetch_player_games_by_month.is_fresh(username, year, month)
+        ]
+    return months
+
+
+def iter_archive_games(username: str, new_only: bool = False) -> Iterator[dict]:
+    """Yield the archive games of a player, one month at a time.
+
+    Args:
+        username (str): The username of the player.
+        new_only (bool, optional): Only yield months without a fresh cache entry,
+            i.e. months not seen before and the running month once it expired.
+
+    Yields:
+        dict: The games of the player, oldest month first.
+    """
+    for year, month in client.run(_archive_months(username, new_only)):
+        yield from get_player_games_by_month(username, year, month)["games"]
 
 
-def fetch_archive_games(username: str) -> list[dict]:
+async def aiter_archive_games(
+    username: str,
+    new_only: bool = False,
+    max_concurrency: int = MAX_CONCURRENT_MONTHS,
+) -> AsyncIterator[dict]:
+    """Yield the archive games of a player, fetching months concurrently.
+
+    Up to `max_concurrency` months are fetched ahead of the consumer, so memory
+    stays bounded however long the player's career is.
+
+    Args:
+        username (str): The username of the player.
+        new_only (bool, optional): Only yield months without a fresh cache entry.
+        max_concurrency (int, optional): Maximum number of months fetched at once.
+
+    Yields:
+        dict: The games of the player, oldest month first.
+    """
+    pending: Deque[asyncio.Task] = deque()
+    try:
+        for year, month in await _archive_months(username, new_only):
+            pending.append(
+                asyncio.ensure_future(
+                    fetch_player_games_by_month(username, year, month)
+                )
+            )
+            if len(pending) >= max_concurrency:
+                for game in (await pending.popleft())["games"]:
+                    yield game
+        while pending:
+            for game in (await pending.popleft())["games"]:
+                yield game
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def fetch_archive_games(username: str, new_only: bool = False) -> list[dict]:
     """Fetch the archive games of a player.
 
+    Months are fetched concurrently; prefer `iter_archive_games` or
+    `aiter_archive_games` to process long careers without holding every game.
+
     Args:
         username (str): The username of the player.
+        new_only (bool, optional): Only return months without a fresh cache entry.
 
     Returns:
         list[dict]: A list of games the player has played.
     """
 
-    games = []
-    for url in get_player_game_archives(username)["archives"]:
-        year = url.split("/")[-2]
-        month = url.split("/")[-1]
-        games += get_player_games_by_month(username, year, month)["games"]
+    async def collect() -> list[dict]:
+        return [game async for game in aiter_archive_games(username, new_only)]
 
-    return games
+    return client.run(collect())
 
 
-def get_opponents_and_games_by_month(
+async def fetch_opponents_and_games_by_month(
     username: str, year: Optional[int] = None, month: Optional[int] = None
 ) -> Dict[str, List[GameEdge]]:
-    """Get opponents and game details for a player by month.
+    """Fetch opponents and game details for a player by month asynchronously.
 
     Args:
         username (str): The username of the player.
@@ -53,7 +144,9 @@ def get_opponents_and_games_by_month(
         month = datetime.now().month
 
     try:
-        games_data = get_player_games_by_month(username, year, month).get("games", [])
+        games_data = (await fetch_player_games_by_month(username, year, month)).get(
+            "games", []
+        )
     except ChessDotComError as exc:
         if exc.status_code == 0:
             print(
@@ -71,7 +164,7 @@ def get_opponents_and_games_by_month(
         )
 
         game_edge = GameEdge(
-            pgn=game.get("pgn", ""),
+            uuid=game.get("uuid", ""),
             time_control=game.get("time_control", ""),
             time_class=game.get("time_class", ""),
             rules=game.get("rules", ""),
@@ -105,13 +198,24 @@ def get_opponents_and_games_by_month(
     return opponents_games
 
 
-async def fetch_player_data(username: str) -> Optional[PlayerNode]:
-    """Fetch the player data for a given username asynchronously."""
-    return await asyncio.to_thread(get_player_data, username)
+def get_opponents_and_games_by_month(
+    username: str, year: Optional[int] = None, month: Optional[int] = None
+) -> Dict[str, List[GameEdge]]:
+    """Get opponents and game details for a player by month.
 
+    Args:
+        username (str): The username of the player.
+        year (Optional[int], optional): The year to filter by. Defaults to None.
+        month (Optional[int], optional): The month to filter by. Defaults to None.
+
+    Returns:
+        Dict[str, List[GameEdge]]: A dictionary with opponent usernames as keys and lists of GameEdge objects as values.
+    """
+    return client.run(fetch_opponents_and_games_by_month(username, year, month))
 
-def get_player_data(username: str) -> Optional[PlayerNode]:
-    """Get the player data for a given username.
+
+async def fetch_player_data(username: str) -> Optional[PlayerNode]:
+    """Fetch the player data for a given username asynchronously.
 
     Args:
         username (str): The username of the player.
@@ -120,7 +224,7 @@ def get_player_data(username: str) -> Optional[PlayerNode]:
         PlayerNode: The player node object.
     """
     try:
-        profile = get_player_profile(username).get("player")
+        profile = (await fetch_player_profile(username)).get("player")
     except ChessDotComError as exc:
         print(f"Error fetching profile for {username}: {exc}")
         return None
@@ -128,7 +232,12 @@ def get_player_data(username: str) -> Optional[PlayerNode]:
         print(f"Profile not found for {username}")
         return None
 
-    stats = get_player_stats(username).get("stats").get(GAME_TYPE)
+    try:
+        stats = (await fetch_player_stats(username)).get("stats") or {}
+    except ChessDotComError as exc:
+        print(f"Error fetching stats for {username}: {exc}")
+        return None
+    stats = stats.get(GAME_TYPE)
     if stats is None:
         return None
     return PlayerNode(
@@ -138,3 +247,144 @@ def get_player_data(username: str) -> Optional[PlayerNode]:
         country=profile.get("country").split("/")[-1],
         rating=stats.get("last", {}).get("rating", 0),
     )
+
+
+def get_player_data(username: str) -> Optional[PlayerNode]:
+    """Get the player data for a given username.
+
+    Args:
+        username (str): The username of the player.
+
+    Returns:
+        PlayerNode: The player node object.
+    """
+    return client.run(fetch_player_data(username))
+
+
+def archive_month(game: GameEdge) -> Tuple[int, int]:
+    """The `(year, month)` of the monthly archive a game is filed under."""
+    date = datetime.fromtimestamp(game.end_time, timezone.utc)
+    return date.year, date.month
+
+
+def _archive_of(
+    game: GameEdge,
+    expanded: Container[Tuple[str, int, int]],
+    fresh: Dict[Tuple[str, int, int], bool],
+) -> Tuple[str, int, int]:
+    """The archive to read a game from: a side's that needs no request if any."""
+    year, month = archive_month(game)
+    sides = [(game.white.username, year, month), (game.black.username, year, month)]
+    for key in sides:
+        if key not in fresh:
+            fresh[key] = fetch_player_games_by_month.is_fresh(*key)
+        if fresh[key]:
+            return key
+    return next((key for key in sides if key in expanded), sides[0])
+
+
+async def fetch_pgns(
+    games: Iterable[GameEdge], expanded: Container[Tuple[str, int, int]] = ()
+) -> Dict[str, str]:
+    """Fetch the PGN of games asynchronously, from their monthly archives.
+
+    The graph only keeps each game's uuid; the PGN is read back from the
+    archive of whichever player has it fresh in the cache, else from the
+    archive of the player that was expanded, each archive being read once.
+
+    Args:
+        games (Iterable[GameEdge]): The games to fetch.
+        expanded (Container[Tuple[str, int, int]], optional): The archives,
+            as `(username, year, month)`, fetched to expand players.
+
+    Returns:
+        Dict[str, str]: PGN text by game uuid. Games missing from their archive, or whose archive failed to download, are left out.
+    """
+    wanted: Dict[Tuple[str, int, int], Set[str]] = {}
+    fresh: Dict[Tuple[str, int, int], bool] = {}
+    for game in games:
+        key = _archive_of(game, expanded, fresh)
+        wanted.setdefault(key, set()).add(game.uuid)
+    archives = await asyncio.gather(
+        *[fetch_player_games_by_month(*key) for key in wanted], return_exceptions=True
+    )
+    pgns: Dict[str, str] = {}
+    for (username, year, month), uuids, archive in zip(
+        wanted, wanted.values(), archives
+    ):
+        if isinstance(archive, BaseException):
+            if not isinstance(archive, Exception):
+                raise archive
+            print(f"Error fetching games of {username} in {year}-{month}: {archive}")
+            continue
+        _read_pgns(archive, uuids, pgns)
+    return pgns
+
+
+def _read_pgns(archive: dict, uuids: Set[str], pgns: Dict[str, str]) -> None:
+    """Add the PGN of the games of `uuids` found in an archive to `pgns`."""
+    for game in archive.get("games", []):
+        if game.get("uuid") in uuids:
+            pgns[game["uuid"]] = game.get("pgn", "")
+
+
+def get_cached_pgns(
+    games: Iterable[GameEdge], expanded: Container[Tuple[str, int, int]] = ()
+) -> Dict[str, str]:
+    """Get the PGN of games whose archive is cached, without any request.
+
+    Archives are read from the cache whether fresh or not, trying the one of
+    the player that was expanded first.
+
+    Args:
+        games (Iterable[GameEdge]): The games to read.
+        expanded (Container[Tuple[str, int, int]], optional): The archives,
+            as `(username, year, month)`, fetched to expand players.
+
+    Returns:
+        Dict[str, str]: PGN text by game uuid. Games without a cached archive are left out.
+    """
+    archives: Dict[Tuple[str, int, int], Optional[dict]] = {}
+    wanted: Dict[Tuple[str, int, int], Set[str]] = {}
+    for game in games:
+        year, month = archive_month(game)
+        sides = [(game.white.username, year, month), (game.black.username, year, month)]
+        sides.sort(key=lambda key: key not in expanded)
+        for key in sides:
+            if key not in archives:
+                archives[key] = fetch_player_games_by_month.peek(*key)
+            if archives[key] is not None:
+                wanted.setdefault(key, set()).add(game.uuid)
+                break
+    pgns: Dict[str, str] = {}
+    for key, uuids in wanted.items():
+        _read_pgns(archives[key], uuids, pgns)
+    return pgns
+
+
+def get_pgns(
+    games: Iterable[GameEdge], expanded: Container[Tuple[str, int, int]] = ()
+) -> Dict[str, str]:
+    """Get the PGN of games, by game uuid.
+
+    Args:
+        games (Iterable[GameEdge]): The games to fetch.
+        expanded (Container[Tuple[str, int, int]], optional): The archives,
+            as `(username, year, month)`, fetched to expand players.
+
+    Returns:
+        Dict[str, str]: PGN text by game uuid. Games missing from their archive, or whose archive failed to download, are left out.
+    """
+    return client.run(fetch_pgns(games, expanded))
+
+
+def get_pgn(game: GameEdge) -> Optional[str]:
+    """Get the PGN of a single game.
+
+    Args:
+        game (GameEdge): The game to fetch.
+
+    Returns:
+        Optional[str]: The PGN text, or None if the game is missing from its archive.
+    """
+    return get_pgns([game]).get(game.uuid)
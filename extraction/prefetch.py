@@ -0,0 +1,223 @@
+"""Warm the cache with the crawl of known seed players, ahead of the app.
+
+Usage: `prefetch SEED [SEED ...] [--start 2024-09] [--end 2024-10] [--depth 2]`
+
+Players are expanded breadth-first exactly as the app's crawl does, through
+the same cached `extraction` functions, so the app later reads the same keys.
+Fresh entries are served by the cache without a request, so an interrupted
+run resumes cheaply, and months already completed are recorded in a state
+file and skipped entirely.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, List, Optional, Set, Tuple
+
+from chessdotcom import ChessDotComError
+
+from cache import MonthlyArchive, cache_stats
+from cache.main import CACHE_DIR
+from extraction.main import fetch_opponents_and_games_by_month, fetch_player_data
+
+MAX_CONCURRENT_PREFETCHES = int(os.getenv("MAX_CONCURRENT_PREFETCHES", "8"))
+STATE_FILE = CACHE_DIR / "prefetch.json"
+
+
+def parse_month(value: str) -> Tuple[int, int]:
+    """Parse `YYYY-MM` into `(year, month)`."""
+    try:
+        date = datetime.strptime(value, "%Y-%m")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"{value!r} is not a YYYY-MM month.")
+    return date.year, date.month
+
+
+def month_range(
+    start: Tuple[int, int], end: Tuple[int, int]
+) -> Iterator[Tuple[int, int]]:
+    """Every `(year, month)` from `start` to `end`, inclusive."""
+    year, month = start
+    while (year, month) <= end:
+        yield year, month
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+@dataclass
+class Progress:
+    """Prints how far a level has got and when it should be done."""
+
+    label: str
+    total: int
+    done: int = 0
+    interval: float = 1.0
+
+    def __post_init__(self):
+        self._start = self._printed = time.monotonic()
+        self._stats = cache_stats()
+
+    def step(self) -> None:
+        """Count one expanded player, printing at most every `interval` seconds."""
+        self.done += 1
+        now = time.monotonic()
+        if self.done == self.total or now - self._printed >= self.interval:
+            self._printed = now
+            print(self.line(now), flush=True)
+
+    def line(self, now: float) -> str:
+        stats = cache_stats()
+        fetched = (
+            stats.misses
+            - self._stats.misses
+            - (stats.revalidated - self._stats.revalidated)
+        )
+        fresh = stats.hits - self._stats.hits + stats.coalesced - self._stats.coalesced
+        rate = self.done / max(now - self._start, 1e-9)
+        eta = (self.total - self.done) / rate if rate else float("inf")
+        return (
+            f"{self.label}: {self.done}/{self.total} players,"
+            f" {fetched} fetched, {fresh} fresh, {rate:.1f} players/s, ETA {eta:.0f}s"
+        )
+
+
+class State:
+    """Finished months completed by earlier runs, stored as JSON.
+
+    A month counts as done for a seed once it was crawled at least as deep.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        try:
+            self._done = json.loads(self.path.read_text(encoding="utf8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            self._done = {}
+
+    def is_done(self, seed: str, year: int, month: int, depth: int) -> bool:
+        return self._done.get(f"{seed}/{year}-{month:02d}", 0) >= depth
+
+    def clear(self) -> None:
+        """Forget every completed month."""
+        self._done = {}
+
+    def mark_done(self, seed: str, year: int, month: int, depth: int) -> None:
+        self._done[f"{seed}/{year}-{month:02d}"] = depth
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self._done, indent=2), encoding="utf8")
+        os.replace(tmp, self.path)
+
+
+async def prefetch_month(
+    seeds: List[str],
+    year: int,
+    month: int,
+    depth: int,
+    max_concurrency: int = MAX_CONCURRENT_PREFETCHES,
+) -> Set[str]:
+    """Cache profiles, stats and games of the crawl from `seeds` in one month.
+
+    Returns:
+        Set[str]: Usernames whose games were fetched.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    seen: Set[str] = set(seeds)
+    expanded: Set[str] = set()
+
+    async def expand(username: str, progress: Progress) -> List[str]:
+        """Cache one player's games and opponents, returning the opponents."""
+        async with semaphore:
+            try:
+                if await fetch_player_data(username) is None:
+                    return []
+                opponents = await fetch_opponents_and_games_by_month(
+                    username, year, month
+                )
+                players = await asyncio.gather(
+                    *[fetch_player_data(opponent) for opponent in opponents]
+                )
+            except (ValueError, ChessDotComError) as exc:
+                print(f"Skipping {username}: {exc}")
+                return []
+            finally:
+                progress.step()
+        expanded.add(username)
+        return [player.username for player in players if player is not None]
+
+    frontier = list(seeds)
+    for level in range(1, depth + 1):
+        progress = Progress(f"{year}-{month:02d} depth {level}/{depth}", len(frontier))
+        reached = await asyncio.gather(
+            *[expand(username, progress) for username in frontier]
+        )
+        frontier = []
+        for opponents in reached:
+            for username in opponents:
+                if username not in seen:
+                    seen.add(username)
+                    frontier.append(username)
+        if not frontier:
+            break
+    return expanded
+
+
+async def prefetch(
+    seeds: List[str],
+    start: Tuple[int, int],
+    end: Tuple[int, int],
+    depth: int,
+    max_concurrency: int = MAX_CONCURRENT_PREFETCHES,
+    state: Optional[State] = None,
+) -> None:
+    """Prefetch every month from `start` to `end` for each seed."""
+    for year, month in month_range(start, end):
+        pending = [
+            seed
+            for seed in seeds
+            if state is None or not state.is_done(seed, year, month, depth)
+        ]
+        if not pending:
+            print(f"{year}-{month:02d}: already prefetched.")
+            continue
+        await prefetch_month(pending, year, month, depth, max_concurrency)
+        # The running month keeps changing, so it is crawled again every run.
+        if state is not None and MonthlyArchive.month_end(year, month) < time.time():
+            for seed in pending:
+                state.mark_done(seed, year, month, depth)
+
+
+def main():
+    """Run the prefetch from the command line."""
+    now = datetime.now()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("seeds", nargs="+", help="Usernames to start from.")
+    parser.add_argument("--start", type=parse_month, default=(now.year, now.month))
+    parser.add_argument("--end", type=parse_month, default=(now.year, now.month))
+    parser.add_argument("--depth", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, default=MAX_CONCURRENT_PREFETCHES)
+    parser.add_argument("--state", type=Path, default=STATE_FILE)
+    parser.add_argument(
+        "--restart", action="store_true", help="Ignore months done by earlier runs."
+    )
+    args = parser.parse_args()
+
+    state = State(args.state)
+    if args.restart:
+        state.clear()
+    asyncio.run(
+        prefetch(args.seeds, args.start, args.end, args.depth, args.concurrency, state)
+    )
+    stats = cache_stats()
+    print(
+        f"Done: {stats.misses} requests ({stats.revalidated} not modified),"
+        f" {stats.hits} fresh cache hits."
+    )
+
+
+if __name__ == "__main__":
+    main()
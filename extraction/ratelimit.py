@@ -0,0 +1,216 @@
+"""Process-wide token-bucket rate limiting for the chess.com API."""
+
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass, replace
+from email.utils import parsedate_to_datetime
+from typing import Mapping, Optional
+
+from chessdotcom import ChessDotComError
+
+MAX_REQUESTS_PER_SECOND = float(os.getenv("MAX_REQUESTS_PER_SECOND", "10"))
+MAX_RETRIES = int(os.getenv("MAX_RETRIES", "5"))
+
+
+class RateLimitError(ChessDotComError):
+    """Raised when a request is still rate limited after its final retry."""
+
+    def __init__(self, url: str, attempts: int, headers: Optional[Mapping] = None):
+        super().__init__(
+            status_code=429,
+            response_text=json.dumps(
+                {"message": f"Rate limited on {url} after {attempts} attempts."}
+            ),
+            headers=headers,
+        )
+        self.url = url
+        self.attempts = attempts
+
+
+@dataclass
+class RateLimitStats:
+    """Counters describing how the limiter has shaped traffic.
+
+    Wait times are summed over callers: `queued_time` is spent waiting for a
+    token, `throttled_time` waiting out a 429 or an exhausted quota.
+    """
+
+    requests: int = 0
+    throttled: int = 0
+    retries: int = 0
+    exhausted: int = 0
+    queued_time: float = 0.0
+    throttled_time: float = 0.0
+    rate: float = 0.0
+
+
+def parse_retry_after(value: Optional[str], now: Optional[float] = None) -> float:
+    """Seconds to wait from a `Retry-After` header (delta-seconds or HTTP-date)."""
+    if not value:
+        return 0.0
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        until = parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return 0.0
+    return max(0.0, until - (time.time() if now is None else now))
+
+
+def parse_rate_limit_reset(headers: Mapping) -> float:
+    """Seconds until the quota resets, when the headers say it is used up."""
+    for prefix in ("X-RateLimit-", "RateLimit-"):
+        remaining = headers.get(f"{prefix}Remaining")
+        reset = headers.get(f"{prefix}Reset")
+        if remaining is None or reset is None:
+            continue
+        try:
+            if int(float(remaining)) > 0:
+                return 0.0
+            reset_at = float(reset)
+        except ValueError:
+            return 0.0
+        # Large values are epoch timestamps, small ones are delta-seconds.
+        return max(0.0, reset_at - time.time() if reset_at > 1e9 else reset_at)
+    return 0.0
+
+
+class RateLimiter:
+    """Token bucket shared by every thread and coroutine in the process.
+
+    Each request takes one token. The refill rate adapts to the API: a 429
+    multiplies it by `backoff` and pauses every caller until the server's
+    `Retry-After` (or a jittered exponential backoff) has passed, while each
+    quiet `recovery_window` without 429s adds `recovery` requests per second back.
+
+    Args:
+        rate (float): Initial and maximum refill rate, in requests per second.
+        burst (int, optional): Bucket capacity. Defaults to `rate`.
+        min_rate (float): Lower bound for the adaptive rate.
+        backoff (float): Factor applied to the rate on each 429.
+        recovery (float): Rate increase after a quiet `recovery_window`.
+        recovery_window (float): Seconds without 429s before speeding up.
+        max_retries (int): Retries allowed per request after a 429.
+        base_delay (float): First backoff delay, doubled on every retry.
+        max_delay (float): Upper bound for a single backoff delay.
+    """
+
+    def __init__(
+        self,
+        rate: float = MAX_REQUESTS_PER_SECOND,
+        burst: Optional[int] = None,
+        min_rate: float = 0.5,
+        backoff: float = 0.5,
+        recovery: float = 1.0,
+        recovery_window: float = 10.0,
+        max_retries: int = MAX_RETRIES,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+    ):
+        self.max_rate = rate
+        self.burst = burst or max(1, int(rate))
+        self.min_rate = min(min_rate, rate)
+        self.backoff = backoff
+        self.recovery = recovery
+        self.recovery_window = recovery_window
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self._lock = threading.Lock()
+        self._rate = rate
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._last_adjusted = 0.0
+        self._stats = RateLimitStats(rate=rate)
+
+    @property
+    def stats(self) -> RateLimitStats:
+        """A snapshot of the limiter counters."""
+        with self._lock:
+            return replace(self._stats, rate=self._rate)
+
+    def _reserve(self) -> float:
+        """Take a token and return how long the caller must wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            refill_from = max(self._updated, self._blocked_until)
+            if now > refill_from:
+                self._tokens = min(
+                    self.burst, self._tokens + (now - refill_from) * self._rate
+                )
+            self._updated = max(now, self._updated)
+            self._tokens -= 1
+
+            cooldown = max(0.0, self._blocked_until - now)
+            queued = max(0.0, -self._tokens / self._rate)
+            self._stats.requests += 1
+            self._stats.throttled_time += cooldown
+            self._stats.queued_time += queued
+            return cooldown + queued
+
+    def acquire(self) -> None:
+        """Block the current thread until a request may be sent."""
+        if wait := self._reserve():
+            time.sleep(wait)
+
+    async def acquire_async(self) -> None:
+        """Wait without blocking the event loop until a request may be sent."""
+        if wait := self._reserve():
+            await asyncio.sleep(wait)
+
+    def _block_for(self, delay: float) -> None:
+        self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+        self._tokens = min(self._tokens, 0.0)
+
+    def on_response(self, headers: Mapping) -> None:
+        """Record a successful response and adapt the rate."""
+        with self._lock:
+            if reset := parse_rate_limit_reset(headers):
+                self._block_for(reset)
+            now = time.monotonic()
+            if (
+                self._rate < self.max_rate
+                and now - self._last_adjusted > self.recovery_window
+            ):
+                self._rate = min(self.max_rate, self._rate + self.recovery)
+                self._last_adjusted = now
+
+    def on_throttled(self, headers: Mapping, attempt: int) -> bool:
+        """Record a 429 response for the `attempt`-th try of a request.
+
+        Returns:
+            bool: Whether the request may be retried.
+        """
+        with self._lock:
+            self._stats.throttled += 1
+            now = time.monotonic()
+            # 429s from requests already in flight belong to the same cooldown.
+            if now >= self._blocked_until:
+                self._rate = max(self.min_rate, self._rate * self.backoff)
+            self._last_adjusted = now
+            if attempt >= self.max_retries:
+                self._stats.exhausted += 1
+                return False
+            self._stats.retries += 1
+
+            retry_after = parse_retry_after(
+                headers.get("Retry-After")
+            ) or parse_rate_limit_reset(headers)
+            backoff = min(self.max_delay, self.base_delay * 2**attempt)
+            if retry_after:
+                delay = retry_after + random.uniform(0, self.base_delay)
+            else:
+                delay = random.uniform(backoff / 2, backoff)
+            self._block_for(delay)
+            return True
+
+
+limiter = RateLimiter()
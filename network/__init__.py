@@ -1,3 +1,21 @@
-from network.main import GameEdge, PlayerDetails, PlayerNode, add_edge, add_node
+from network.games import GameTable, edge_games, game_table
+from network.main import (
+    GameEdge,
+    PlayerDetails,
+    PlayerNode,
+    add_edge,
+    add_edges_bulk,
+    add_node,
+)
 
-__all__ = ["PlayerNode", "PlayerDetails", "GameEdge", "add_node", "add_edge"]
+__all__ = [
+    "PlayerNode",
+    "PlayerDetails",
+    "GameEdge",
+    "GameTable",
+    "add_node",
+    "add_edge",
+    "add_edges_bulk",
+    "edge_games",
+    "game_table",
+]
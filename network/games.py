@@ -0,0 +1,241 @@
+"""Columnar table of the games behind the graph's edges."""
+
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional
+
+import networkx as nx
+import numpy as np
+
+if TYPE_CHECKING:
+    from network.main import GameEdge
+
+NUMERIC_COLUMNS: Dict[str, type] = {
+    "white": np.int32,
+    "black": np.int32,
+    "white_rating": np.int16,
+    "black_rating": np.int16,
+    "white_result": np.uint8,
+    "black_result": np.uint8,
+    "white_accuracy": np.float32,
+    "black_accuracy": np.float32,
+    "start_time": np.int64,
+    "end_time": np.int64,
+    "time_class": np.uint8,
+    "time_control": np.uint16,
+    "rules": np.uint8,
+    "eco": np.uint16,
+}
+"""Fixed-width columns. Strings are stored as codes into `CATEGORIES`."""
+
+CATEGORIES: Dict[str, str] = {
+    "white": "players",
+    "black": "players",
+    "white_result": "results",
+    "black_result": "results",
+    "time_class": "time_classes",
+    "time_control": "time_controls",
+    "rules": "rules",
+    "eco": "ecos",
+}
+"""Vocabulary of each categorical column. White and black share the players."""
+
+TEXT_COLUMNS = ("uuid", "white_uid", "black_uid")
+"""Variable-length columns, kept as Python lists. PGN is fetched on demand."""
+
+DRAWS = (
+    "agreed",
+    "repetition",
+    "stalemate",
+    "insufficient",
+    "50move",
+    "timevsinsufficient",
+)
+"""Chess.com result codes of a drawn game, the same for both players."""
+
+SCORES = {"win": 1.0, **{draw: 0.5 for draw in DRAWS}}
+"""Points of a result; every other result scores 0."""
+
+
+class GameTable:
+    """Growable column store of games, indexed by the edge they belong to.
+
+    Columns are NumPy arrays that double in capacity as rows are appended, so
+    appending is amortised O(1) and reading a column is a zero-copy view.
+    """
+
+    def __init__(self):
+        self._size = 0
+        self._columns = {
+            name: np.zeros(0, dtype=dtype) for name, dtype in NUMERIC_COLUMNS.items()
+        }
+        self._text: Dict[str, List] = {name: [] for name in TEXT_COLUMNS}
+        self._vocabularies: Dict[str, List[str]] = {
+            vocabulary: [] for vocabulary in CATEGORIES.values()
+        }
+        self._codes: Dict[str, Dict[str, int]] = {
+            vocabulary: {} for vocabulary in self._vocabularies
+        }
+
+    def __len__(self) -> int:
+        return self._size
+
+    def column(self, name: str) -> np.ndarray:
+        """A read-only view of a numeric column."""
+        view = self._columns[name][: self._size]
+        view.flags.writeable = False
+        return view
+
+    def text(self, name: str) -> List:
+        """A variable-length column."""
+        return self._text[name]
+
+    def vocabulary(self, name: str) -> List[str]:
+        """The values behind the codes of a categorical column."""
+        return self._vocabularies[CATEGORIES[name]]
+
+    def decode(self, name: str) -> np.ndarray:
+        """A categorical column as an array of strings."""
+        return np.asarray(self.vocabulary(name), dtype=object)[self.column(name)]
+
+    def code(self, name: str, value: str) -> int:
+        """The code of `value` in a categorical column, adding it if new."""
+        vocabulary = CATEGORIES[name]
+        codes = self._codes[vocabulary]
+        if value not in codes:
+            codes[value] = len(self._vocabularies[vocabulary])
+            self._vocabularies[vocabulary].append(value)
+        return codes[value]
+
+    def _reserve(self, count: int) -> None:
+        """Grow every column to hold `count` more rows."""
+        needed = self._size + count
+        capacity = len(self._columns["end_time"])
+        if needed <= capacity:
+            return
+        capacity = max(needed, 2 * capacity, 64)
+        for name, column in self._columns.items():
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[: self._size] = column[: self._size]
+            self._columns[name] = grown
+
+    def append(self, games: Iterable["GameEdge"]) -> range:
+        """Append games, returning the indices of their rows."""
+        from network.main import PlayerDetails
+
+        games = list(games)
+        start = self._size
+        self._reserve(len(games))
+        rows: Dict[str, List] = {name: [] for name in NUMERIC_COLUMNS}
+        for game in games:
+            for color, player in (("white", game.white), ("black", game.black)):
+                player = player or PlayerDetails(
+                    uid="", username="", rating=0, result=""
+                )
+                rows[color].append(self.code(color, player.username))
+                rows[f"{color}_rating"].append(player.rating or 0)
+                rows[f"{color}_result"].append(
+                    self.code(f"{color}_result", player.result)
+                )
+                rows[f"{color}_accuracy"].append(
+                    (game.accuracies or {}).get(color, np.nan)
+                )
+                self._text[f"{color}_uid"].append(player.uid)
+            rows["start_time"].append(game.start_time)
+            rows["end_time"].append(game.end_time)
+            rows["time_class"].append(self.code("time_class", game.time_class))
+            rows["time_control"].append(self.code("time_control", game.time_control))
+            rows["rules"].append(self.code("rules", game.rules))
+            rows["eco"].append(self.code("eco", game.eco_code))
+            self._text["uuid"].append(game.uuid)
+        for name, values in rows.items():
+            self._columns[name][start : start + len(games)] = values
+        self._size += len(games)
+        return range(start, self._size)
+
+    def game(self, row: int) -> "GameEdge":
+        """Rebuild the `GameEdge` stored at `row`."""
+        from network.main import GameEdge, PlayerDetails
+
+        def player(color: str) -> PlayerDetails:
+            return PlayerDetails(
+                uid=self._text[f"{color}_uid"][row],
+                username=self.vocabulary(color)[self._columns[color][row]],
+                rating=int(self._columns[f"{color}_rating"][row]),
+                result=self.vocabulary(f"{color}_result")[
+                    self._columns[f"{color}_result"][row]
+                ],
+            )
+
+        accuracies = {
+            color: float(self._columns[f"{color}_accuracy"][row])
+            for color in ("white", "black")
+            if not np.isnan(self._columns[f"{color}_accuracy"][row])
+        }
+        return GameEdge(
+            uuid=self._text["uuid"][row],
+            time_control=self.vocabulary("time_control")[
+                self._columns["time_control"][row]
+            ],
+            time_class=self.vocabulary("time_class")[self._columns["time_class"][row]],
+            rules=self.vocabulary("rules")[self._columns["rules"][row]],
+            accuracies=accuracies,
+            eco_code=self.vocabulary("eco")[self._columns["eco"][row]],
+            white=player("white"),
+            black=player("black"),
+            start_time=int(self._columns["start_time"][row]),
+            end_time=int(self._columns["end_time"][row]),
+        )
+
+    def scores(self, color: str) -> np.ndarray:
+        """Points scored by the `color` player of every game."""
+        lookup = np.array(
+            [SCORES.get(result, 0.0) for result in self.vocabulary(f"{color}_result")]
+            or [0.0]
+        )
+        return lookup[self.column(f"{color}_result")]
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the numeric columns, excluding spare capacity."""
+        return sum(column.itemsize * self._size for column in self._columns.values())
+
+    def to_dict(self) -> dict:
+        """JSON-serialisable form, e.g. for a `dcc.Store`."""
+        return {
+            "columns": {name: self.column(name).tolist() for name in NUMERIC_COLUMNS},
+            "text": self._text,
+            "vocabularies": self._vocabularies,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "GameTable":
+        """Rebuild a table from `to_dict` output."""
+        table = cls()
+        table._size = len(data["columns"]["end_time"])
+        table._columns = {
+            name: np.array(data["columns"][name], dtype=dtype)
+            for name, dtype in NUMERIC_COLUMNS.items()
+        }
+        table._text = {name: list(data["text"][name]) for name in TEXT_COLUMNS}
+        table._vocabularies = {
+            name: list(values) for name, values in data["vocabularies"].items()
+        }
+        table._codes = {
+            name: {value: code for code, value in enumerate(values)}
+            for name, values in table._vocabularies.items()
+        }
+        return table
+
+
+def game_table(graph: nx.Graph) -> GameTable:
+    """The table holding the games of `graph`, created on first use."""
+    if "games" not in graph.graph:
+        graph.graph["games"] = GameTable()
+    return graph.graph["games"]
+
+
+def edge_games(graph: nx.Graph, u: str, v: str) -> List["GameEdge"]:
+    """The games played between `u` and `v`."""
+    table: Optional[GameTable] = graph.graph.get("games")
+    if table is None or not graph.has_edge(u, v):
+        return []
+    return [table.game(row) for row in graph[u][v]["rows"]]
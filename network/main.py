@@ -1,10 +1,13 @@
-from dataclasses import asdict, dataclass, field
-from typing import Dict, List, Optional
+from dataclasses import dataclass, fields
+from operator import attrgetter
+from typing import Dict, Iterable, List, Tuple
 
 import networkx as nx
 
+from network.games import game_table
 
-@dataclass
+
+@dataclass(frozen=True, slots=True)
 class PlayerNode:
     """Dataclass to represent a player node in the graph."""
 
@@ -15,7 +18,7 @@ class PlayerNode:
     rating: int
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class PlayerDetails:
     """Dataclass representing details about a player in a match."""
 
@@ -25,11 +28,11 @@ class PlayerDetails:
     result: str
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class GameEdge:
     """Dataclass representing an edge between two players."""
 
-    pgn: str
+    uuid: str
     time_control: str
     time_class: str
     rules: str
@@ -41,16 +44,27 @@ class GameEdge:
 
     start_time: int
     end_time: int
-    duration: Optional[int] = field(init=False)
 
-    def __post_init__(self):
-        self.duration = self.end_time - self.start_time
+    @property
+    def duration(self) -> int:
+        return self.end_time - self.start_time
+
+
+Edge = Tuple[PlayerNode, PlayerNode, List[GameEdge]]
+
+_NODE_FIELDS = tuple(field.name for field in fields(PlayerNode))
+_node_values = attrgetter(*_NODE_FIELDS)
+
+
+def node_attributes(node: PlayerNode) -> dict:
+    """The attributes stored on a player's graph node, as a shallow dict."""
+    return dict(zip(_NODE_FIELDS, _node_values(node)))
 
 
 def add_node(graph: nx.Graph, node: PlayerNode | None) -> nx.Graph:
     """Add a node to the graph if it doesn't already exist."""
     if node is not None and node.username not in graph:
-        graph.add_node(node.username, **asdict(node))
+        graph.add_node(node.username, **node_attributes(node))
     return graph
 
 
@@ -60,23 +74,50 @@ def add_edge(
     node2: PlayerNode | None,
     edge_data: List[GameEdge] | None = None,
 ) -> nx.Graph:
-    """Add an edge between two nodes if it doesn't already exist."""
+    """Add an edge between two nodes if it doesn't already exist.
+
+    Games are appended to the graph's `GameTable`; the edge keeps the indices
+    of its `rows` and the number of `games`.
+    """
     if node1 is None or node2 is None or edge_data is None:
         print("Cannot add edge with missing nodes or edge data.")
         return graph
-    if node1.username not in graph:
-        graph = add_node(graph, node1)
-    if node2.username not in graph:
-        graph = add_node(graph, node2)
-    if not graph.has_edge(node1.username, node2.username):
-        weight = abs(node1.rating - node2.rating)
-        graph.add_edge(
-            node1.username,
-            node2.username,
-            weight=weight,
-            data=[asdict(edge) for edge in edge_data],
-        )
-    else:
-        edge = graph[node1.username][node2.username]
-        edge["data"].extend([asdict(edge) for edge in edge_data])
+    return add_edges_bulk(graph, [(node1, node2, edge_data)])
+
+
+def add_edges_bulk(graph: nx.Graph, edges: Iterable[Edge]) -> nx.Graph:
+    """Add many edges, and the games behind them, in one call.
+
+    Missing nodes are added once, every game is appended to the `GameTable`
+    in a single append, and new edges are inserted together.
+    """
+    edges = list(edges)
+    graph.add_nodes_from(
+        (node.username, node_attributes(node))
+        for pair in edges
+        for node in pair[:2]
+        if node.username not in graph
+    )
+    rows = game_table(graph).append(game for _, _, games in edges for game in games)
+
+    offset = 0
+    new_edges: Dict[frozenset, Tuple[str, str, dict]] = {}
+    for node1, node2, games in edges:
+        edge_rows = rows[offset : offset + len(games)]
+        offset += len(games)
+        if graph.has_edge(node1.username, node2.username):
+            edge = graph[node1.username][node2.username]
+        else:
+            key = frozenset((node1.username, node2.username))
+            if key not in new_edges:
+                weight = abs(node1.rating - node2.rating)
+                new_edges[key] = (
+                    node1.username,
+                    node2.username,
+                    {"weight": weight, "rows": []},
+                )
+            edge = new_edges[key][2]
+        edge["rows"].extend(edge_rows)
+        edge["games"] = len(edge["rows"])
+    graph.add_edges_from(new_edges.values())
     return graph
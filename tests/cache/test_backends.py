@@ -0,0 +1,92 @@
+import multiprocessing
+import time
+
+from cache.backends import (
+    InMemoryBackend,
+    JSONFileBackend,
+    SQLiteBackend,
+    TieredBackend,
+)
+
+
+def write_entries(path, worker: int, count: int) -> None:
+    """Write `count` entries from a separate process, like a gunicorn worker."""
+    backend = SQLiteBackend(path, batch_size=16)
+    for index in range(count):
+        backend.set("fetch", f"{worker}-{index}", b"x" * 100)
+    backend.close()
+
+
+def test_workers_share_one_sqlite_file(tmp_path):
+    """Test concurrent processes write to one file without losing entries."""
+    path = tmp_path / "cache.sqlite3"
+    context = multiprocessing.get_context("fork")
+    workers = [
+        context.Process(target=write_entries, args=(path, worker, 200))
+        for worker in range(4)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    backend = SQLiteBackend(path)
+    assert [worker.exitcode for worker in workers] == [0] * 4
+    assert len(list(backend.items())) == 800
+    assert backend.get("fetch", "3-199") == b"x" * 100
+    backend.close()
+
+
+def test_sqlite_evicts_oldest_entries(tmp_path):
+    """Test the SQLite backend stays under its size cap by dropping old entries."""
+    backend = SQLiteBackend(
+        tmp_path / "cache.sqlite3", batch_size=10, max_bytes=1 << 18
+    )
+    for index in range(500):
+        backend.set("fetch", f"{index:04d}", bytes(2048))
+    backend.flush()
+
+    keys = [key for _, key, _ in backend.items()]
+    assert backend.size <= 1 << 18
+    assert 0 < len(keys) < 500
+    assert keys[-1] == "0499"
+    assert backend.get("fetch", "0000") is None
+    backend.close()
+
+
+def test_tiered_backend_reads_through_remote(tmp_path):
+    """Test remote hits are copied locally and writes reach both tiers."""
+    remote = InMemoryBackend()
+    remote.set("fetch", "shared", b"remote")
+    local = SQLiteBackend(tmp_path / "cache.sqlite3")
+    backend = TieredBackend(local, remote)
+
+    assert backend.get("fetch", "shared") == b"remote"
+    assert local.get("fetch", "shared") == b"remote"
+
+    backend.set("fetch", "new", b"value")
+    assert remote.get("fetch", "new") == local.get("fetch", "new") == b"value"
+    assert backend.get("fetch", "missing") is None
+    backend.close()
+
+
+def test_purge_deletes_old_entries_of_a_namespace(tmp_path):
+    """Test entries stored before the cutoff are purged from their namespace only."""
+    for backend in (
+        JSONFileBackend(tmp_path / "json"),
+        SQLiteBackend(tmp_path / "cache.sqlite3"),
+        InMemoryBackend(),
+    ):
+        backend.set("sessions", "old", b"old")
+        backend.set("fetch", "old", b"old")
+        backend.flush()
+        time.sleep(0.02)
+        cutoff = time.time()
+        backend.set("sessions", "new", b"new")
+        backend.flush()
+
+        assert backend.purge("sessions", cutoff) == 1
+        assert backend.get("sessions", "old") is None
+        assert backend.get("sessions", "new") == b"new"
+        assert backend.get("fetch", "old") == b"old"
+        backend.close()
@@ -0,0 +1,48 @@
+import zlib
+
+import pytest
+
+from benchmarks.stand_in import StandInServer, player_name
+from cache.compression import Compressor, train_dictionary
+from cache.main import encode
+
+
+@pytest.fixture(scope="module")
+def archives():
+    """Fixture to build encoded monthly archives of synthetic players."""
+    server = StandInServer(num_players=40, fanout=6)
+    return [encode(server.games(player_name(index), 2024, 10)) for index in range(40)]
+
+
+def test_round_trip(archives):
+    """Test archives above the threshold are compressed and restored exactly."""
+    compressor = Compressor(min_bytes=1024)
+
+    for archive in archives:
+        value = compressor.compress(archive)
+        assert len(value) < len(archive) / 2
+        assert compressor.decompress(value) == archive
+
+
+def test_small_payloads_stay_uncompressed():
+    """Test payloads below the threshold are stored as is."""
+    payload = encode({"player": {"username": "player1"}})
+
+    assert Compressor(min_bytes=1024).compress(payload) == payload
+
+
+def test_retrained_dictionary_reads_old_entries(archives):
+    """Test entries compressed with an older dictionary stay readable."""
+    old = Compressor([train_dictionary(archives[:20])])
+    value = old.compress(archives[0])
+    new = Compressor([train_dictionary(archives[:20]), train_dictionary(archives[20:])])
+
+    assert new.dictionary_id != old.dictionary_id
+    assert new.decompress(value) == archives[0]
+    with pytest.raises(zlib.error):
+        Compressor().decompress(value)
+
+
+def test_trained_dictionary_fits_zlib_window(archives):
+    """Test a trained dictionary never exceeds the requested size."""
+    assert 0 < len(train_dictionary(archives, size=4096)) <= 4096
@@ -0,0 +1,172 @@
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from cache import cache, cache_stats
+from cache.backends import JSONFileBackend, SQLiteBackend
+from cache.main import BACKENDS, decode_entry, get_backend, make_key
+from cache.migrate import migrate
+from extraction.api import fetch_player_games_by_month
+
+
+@pytest.fixture
+def upstream():
+    """Fixture to create a slow upstream function that counts its calls."""
+    calls = []
+
+    def fetch(username):
+        calls.append(username)
+        time.sleep(0.05)
+        return {"username": username}
+
+    fetch.calls = calls
+    return fetch
+
+
+def test_threads_share_one_upstream_call(upstream):
+    """Test concurrent threads missing the same key call upstream once."""
+    cached = cache(upstream)
+    before = cache_stats()
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(cached, ["player1"] * 8))
+
+    assert results == [{"username": "player1"}] * 8
+    assert upstream.calls == ["player1"]
+    after = cache_stats()
+    assert after.misses - before.misses == 1
+    assert after.coalesced - before.coalesced == 7
+
+
+def test_coroutines_share_one_upstream_call(upstream):
+    """Test concurrent coroutines missing the same key call upstream once."""
+
+    @cache(name="fetch")
+    async def fetch(username):
+        return await asyncio.to_thread(upstream, username)
+
+    async def fetch_all():
+        return await asyncio.gather(*[fetch(f"player{i % 2}") for i in range(6)])
+
+    results = asyncio.run(fetch_all())
+
+    assert [result["username"] for result in results] == ["player0", "player1"] * 3
+    assert sorted(upstream.calls) == ["player0", "player1"]
+
+
+def test_errors_reach_every_waiter():
+    """Test a failing upstream call raises for coalesced callers and is not cached."""
+    started = threading.Event()
+    calls = []
+
+    @cache
+    def fail(username):
+        calls.append(username)
+        started.set()
+        time.sleep(0.05)
+        raise RuntimeError("upstream failed")
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        leader = executor.submit(fail, "player1")
+        started.wait()
+        follower = executor.submit(fail, "player1")
+        for future in (leader, follower):
+            with pytest.raises(RuntimeError):
+                future.result()
+
+    assert len(calls) == 1
+    with pytest.raises(RuntimeError):
+        fail("player1")
+
+
+def test_cancelled_leader_hands_over_to_a_follower():
+    """Test cancelling the coalescing leader does not cancel its followers."""
+    calls = []
+
+    @cache(name="slow")
+    async def slow(username):
+        calls.append(username)
+        await asyncio.sleep(0.05)
+        return {"username": username}
+
+    async def cancel_leader():
+        leader = asyncio.ensure_future(slow("player1"))
+        await asyncio.sleep(0.01)
+        follower = asyncio.ensure_future(slow("player1"))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(cancel_leader()) == {"username": "player1"}
+    assert calls == ["player1", "player1"]
+
+
+def test_key_scheme_has_no_collisions():
+    """Test arguments that joined to the same legacy file name get distinct keys."""
+    assert make_key(("a_b", 1), {}) != make_key(("a", "b_1"), {})
+    assert make_key((2024, 10), {}) == make_key(("2024", "10"), {})
+    assert make_key(("a",), {"b": 1}) != make_key(("a", 1), {})
+
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_backends_round_trip(upstream, backend, tmp_path, monkeypatch):
+    """Test each backend returns stored results without calling upstream again."""
+    monkeypatch.setattr("cache.main._backend", BACKENDS[backend](tmp_path / backend))
+    cached = cache(upstream)
+
+    assert cached("player1") == cached("player1") == {"username": "player1"}
+    assert upstream.calls == ["player1"]
+    assert [ns for ns, _, _ in get_backend().items()] == ["fetch"]
+
+
+def test_json_writes_are_atomic(tmp_path):
+    """Test JSON files are written without leftover temporary files."""
+    backend = JSONFileBackend(tmp_path / "json")
+    backend.set("fetch", "abcd", b"{}")
+
+    assert [path.name for path in backend.root.rglob("*") if path.is_file()] == [
+        "abcd.json"
+    ]
+
+
+def test_migrate_legacy_tree(tmp_path):
+    """Test a legacy data_cache tree is imported under the new keys."""
+    legacy = tmp_path / "data_cache"
+    (legacy / "get_player_games_by_month").mkdir(parents=True)
+    (legacy / "get_player_games_by_month" / "some_user_2024_10.json").write_text(
+        json.dumps({"games": []})
+    )
+    (legacy / "unknown").mkdir()
+    (legacy / "unknown" / "x.json").write_text("{}")
+
+    def get_player_games_by_month(username, year, month): ...
+
+    backend = SQLiteBackend(tmp_path / "cache.sqlite3")
+    counts = migrate(
+        legacy, backend, {"get_player_games_by_month": get_player_games_by_month}
+    )
+
+    assert counts == {"migrated": 1, "skipped": 1}
+    key = make_key(("some_user", 2024, 10), {})
+    entry = decode_entry(backend.get("get_player_games_by_month", key))
+    assert entry.data == {"games": []}
+    assert entry.stored_at > 0
+
+
+def test_migrated_archive_is_found_by_the_app(tmp_path, cache_backend):
+    """Test an archive migrated from a zero-padded month is hit by int calls."""
+    legacy = tmp_path / "data_cache" / "get_player_games_by_month"
+    legacy.mkdir(parents=True)
+    (legacy / "some_user_2024_09.json").write_text(json.dumps({"games": [1]}))
+
+    migrate(legacy.parent, cache_backend)
+
+    assert asyncio.run(fetch_player_games_by_month("some_user", 2024, 9)) == {
+        "games": [1]
+    }
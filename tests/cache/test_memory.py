@@ -0,0 +1,71 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from cache import cache, memory_stats
+from cache.memory import MemoryCache
+
+
+@pytest.fixture
+def memory():
+    """Fixture to create a small memory tier for testing."""
+    return MemoryCache(max_entries=3, max_bytes=100)
+
+
+def test_evicts_least_recently_used(memory):
+    """Test the entry count bound evicts the least recently used entry."""
+    for key in "abc":
+        memory.set("ns", key, b"1")
+    memory.get("ns", "a")
+    memory.set("ns", "d", b"1")
+
+    assert memory.get("ns", "b") is None
+    assert all(memory.get("ns", key) for key in "acd")
+    assert memory.stats.evictions == 1
+
+
+def test_evicts_by_bytes(memory):
+    """Test the byte bound evicts entries and skips oversized values."""
+    memory.set("ns", "a", b"x" * 60)
+    memory.set("ns", "b", b"x" * 60)
+    memory.set("ns", "c", b"x" * 101)
+
+    assert memory.get("ns", "a") is None
+    assert memory.get("ns", "c") is None
+    assert memory.stats.bytes == 60
+
+
+def test_thread_safety(memory):
+    """Test concurrent use keeps the bounds and the size accounting consistent."""
+
+    def work(index):
+        memory.set("ns", str(index % 7), b"x" * (index % 30))
+        memory.get("ns", str(index % 5))
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(work, range(2000)))
+
+    stats = memory.stats
+    assert stats.entries <= 3 and stats.bytes <= 100
+    assert stats.hits + stats.misses == 2000
+
+
+def test_hits_skip_backend_and_copy(cache_backend, monkeypatch):
+    """Test memory hits do not read the backend and return private copies."""
+    backend_reads = []
+    get = cache_backend.get
+    monkeypatch.setattr(
+        cache_backend, "get", lambda *args: backend_reads.append(args) or get(*args)
+    )
+
+    @cache
+    def profile(username):
+        return {"player": {"username": username}}
+
+    profile("player1")["player"]["username"] = "mutated"
+    reads_after_miss = len(backend_reads)
+    before = memory_stats().hits
+
+    assert profile("player1") == {"player": {"username": "player1"}}
+    assert len(backend_reads) == reads_after_miss
+    assert memory_stats().hits == before + 1
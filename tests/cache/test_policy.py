@@ -0,0 +1,94 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from cache import TTL, MonthlyArchive, cache, cache_stats
+from extraction.api import fetch_player_games_by_month
+from extraction.client import client
+
+
+def timestamp(*args) -> float:
+    """Build a UTC timestamp."""
+    return datetime(*args, tzinfo=timezone.utc).timestamp()
+
+
+@pytest.fixture
+def profile():
+    """Fixture to create a cached profile call that is always stale."""
+
+    @cache(name="stale_profile", policy=TTL(0))
+    async def fetch(username):
+        return {"player": await client.get_json(f"/player/{username}")}
+
+    return lambda username: client.run(fetch(username))
+
+
+def test_monthly_archive_policy():
+    """Test past months are immutable only once stored after the month ended."""
+    policy = MonthlyArchive(ttl=60, grace=3600)
+    args = ("player1", 2024, 10)
+    november = timestamp(2024, 11, 2)
+
+    assert policy.is_fresh(args, stored_at=november, now=november + 1e9)
+    assert not policy.is_fresh(args, stored_at=timestamp(2024, 10, 31), now=november)
+    assert policy.is_fresh(
+        args, timestamp(2024, 10, 31), timestamp(2024, 10, 31, 0, 0, 30)
+    )
+    assert MonthlyArchive.month_end(2024, 12) == timestamp(2025, 1, 1)
+
+
+def test_archives_called_by_keyword_share_the_entry(stand_in):
+    """Test keyword calls are keyed and classified like positional ones."""
+    games = client.run(fetch_player_games_by_month("player1", 2024, 10))
+
+    assert fetch_player_games_by_month.is_fresh("player1", year=2024, month=10)
+    assert (
+        client.run(fetch_player_games_by_month("player1", year=2024, month=10)) == games
+    )
+    assert stand_in.requests["games"] == 1
+
+
+def test_ttl_policy():
+    """Test TTL entries expire after the configured number of seconds."""
+    policy = TTL(60)
+
+    assert policy.is_fresh((), stored_at=100, now=159)
+    assert not policy.is_fresh((), stored_at=100, now=160)
+
+
+def test_stale_entry_is_revalidated(stand_in, profile):
+    """Test a stale entry is refreshed by a 304 without downloading it again."""
+    before = cache_stats()
+
+    first = profile("player1")
+    second = profile("player1")
+
+    assert first == second
+    assert stand_in.requests["profile"] == 1
+    assert stand_in.requests["304"] == 1
+    assert cache_stats().revalidated - before.revalidated == 1
+
+
+def test_throttled_revalidation_keeps_its_validators(stand_in, profile):
+    """Test the retry of a throttled conditional request is still conditional."""
+    first = profile("player1")
+    stand_in.throttle(1, retry_after="0")
+    second = profile("player1")
+
+    assert first == second
+    assert stand_in.requests["429"] == 1
+    assert stand_in.requests["profile"] == 1
+    assert stand_in.requests["304"] == 1
+
+
+def test_changed_entry_is_replaced(stand_in, profile):
+    """Test a stale entry whose upstream changed is downloaded again."""
+    first = profile("player1")
+    stand_in.revision += 1
+    second = profile("player1")
+    third = profile("player1")
+
+    assert second["player"]["last_online"] == first["player"]["last_online"] + 1
+    assert third == second
+    assert stand_in.requests["profile"] == 2
+    assert stand_in.requests["304"] == 1
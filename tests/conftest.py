@@ -0,0 +1,25 @@
+import pytest
+
+import cache.main
+from benchmarks.stand_in import StandInServer
+from cache.backends import SQLiteBackend
+from cache.memory import MemoryCache
+from extraction.client import client
+
+
+@pytest.fixture
+def stand_in(monkeypatch):
+    """Fixture to serve synthetic players and point the API client at them."""
+    with StandInServer(num_players=50, fanout=4) as server:
+        monkeypatch.setattr(client, "base_url", server.url)
+        yield server
+
+
+@pytest.fixture(autouse=True)
+def cache_backend(tmp_path, monkeypatch):
+    """Fixture to keep cached responses out of the working directory."""
+    backend = SQLiteBackend(tmp_path / "cache.sqlite3")
+    monkeypatch.setattr(cache.main, "_backend", backend)
+    monkeypatch.setattr(cache.main, "_memory", MemoryCache(1024, 1 << 24))
+    yield backend
+    backend.close()
@@ -0,0 +1,207 @@
+import random
+from dataclasses import replace
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+import pytest
+
+from dashapp.analytics import (
+    TABS,
+    AnalyticsCache,
+    _detect_probability_anomalies,
+    _detect_time_anomalies,
+    anomaly_frame,
+    create_player_stats,
+    graph_clocks,
+    player_frame,
+    table_page,
+)
+from dashapp.graph import add_opponents_with_depth, initialize_graph
+from dashapp.sessions import data_to_graph, graph_to_data
+from extraction import get_opponents_and_games_by_month, get_player_data
+from extraction.api import get_player_games_by_month
+from network import GameEdge, PlayerDetails, PlayerNode, add_edge, game_table
+
+RESULTS = [
+    ("win", "resigned"),
+    ("checkmated", "win"),
+    ("timeout", "win"),
+    ("stalemate", "stalemate"),
+    ("agreed", "agreed"),
+    ("repetition", "repetition"),
+    ("insufficient", "insufficient"),
+    ("50move", "50move"),
+    ("timevsinsufficient", "timevsinsufficient"),
+]
+DRAWS = {result for result, other in RESULTS if result == other}
+
+
+def expected_totals(games):
+    """Reference per-player score minus expected score, one game at a time."""
+    totals = {}
+    for game in games:
+        for player, opponent in ((game.white, game.black), (game.black, game.white)):
+            probability = 1 / (1 + 10 ** ((opponent.rating - player.rating) / 400))
+            score = 1 if player.result == "win" else 0.5 * (player.result in DRAWS)
+            totals[player.username] = (
+                totals.get(player.username, 0) + score - probability
+            )
+    return totals
+
+
+@pytest.fixture
+def graph_and_games():
+    """Fixture to create a random graph of players and their games."""
+    rng = random.Random(0)
+    graph, games = nx.Graph(), []
+    nodes = [
+        PlayerNode(uid=i, name="", username=f"player{i}", country="US", rating=1500)
+        for i in range(60)
+    ]
+    for _ in range(400):
+        white, black = rng.sample(nodes, 2)
+        white_result, black_result = rng.choice(RESULTS)
+        game = GameEdge(
+            uuid="",
+            time_control="600",
+            time_class="rapid",
+            rules="chess",
+            accuracies={},
+            eco_code="",
+            white=PlayerDetails(
+                uid="",
+                username=white.username,
+                rating=rng.randint(800, 2800),
+                result=white_result,
+            ),
+            black=PlayerDetails(
+                uid="",
+                username=black.username,
+                rating=rng.randint(800, 2800),
+                result=black_result,
+            ),
+            start_time=0,
+            end_time=0,
+        )
+        add_edge(graph, white, black, [game])
+        games.append(game)
+    return graph, games
+
+
+def test_probability_anomalies_match_reference(graph_and_games):
+    """Test the columnar computation flags the same players with the same values."""
+    graph, games = graph_and_games
+    totals = expected_totals(games)
+    threshold = np.percentile(list(totals.values()), 98)
+
+    anomalies = _detect_probability_anomalies(graph)
+
+    assert set(anomalies["Source"]) == {
+        player for player, total in totals.items() if total > threshold
+    }
+    for player, value in zip(anomalies["Source"], anomalies["Value"]):
+        assert value == pytest.approx(totals[player])
+
+
+def test_draws_score_half(graph_and_games):
+    """Test every drawn result scores half a point for both players."""
+    graph, games = graph_and_games
+    table = game_table(graph)
+
+    scores = table.scores("white") + table.scores("black")
+
+    assert scores.tolist() == [1.0] * len(games)
+    drawn = [game.white.result in DRAWS for game in games]
+    assert (table.scores("white") == 0.5).tolist() == drawn
+
+
+def test_analytics_cached_by_version(monkeypatch):
+    """Test a tab is computed once per graph version, within a bounded cache."""
+    calls = []
+    monkeypatch.setitem(
+        TABS, "summary-tab", (lambda graph: calls.append(graph) or graph, None)
+    )
+    cache = AnalyticsCache(max_entries=2)
+    graph = nx.path_graph(3)
+
+    assert cache.render(("session", 1), "summary-tab", graph) is graph
+    cache.render(("session", 1), "summary-tab", graph)
+    assert len(calls) == 1
+
+    cache.render(("session", 2), "summary-tab", graph)
+    cache.render(("session", 3), "summary-tab", graph)
+    cache.render(("session", 1), "summary-tab", graph)
+    assert len(calls) == 4
+    assert len(cache) == 2
+
+
+def test_player_table_sends_one_page(graph_and_games):
+    """Test the player tab sends no rows and pages are filtered and sorted."""
+    graph, _ = graph_and_games
+    players = player_frame(graph)
+    players["rating"] = range(len(players))
+
+    table = create_player_stats(players).children[-1]
+    assert table.page_count == 3
+    assert not getattr(table, "data", None)
+
+    sort_by = [{"column_id": "rating", "direction": "desc"}]
+    rows, pages = table_page(players, 1, 25, sort_by, "{rating} < 40")
+    assert pages == 2
+    assert [row["rating"] for row in rows] == list(range(14, -1, -1))
+
+    rows, pages = table_page(players, 0, 25, [], '{username} icontains "PLAYER1"')
+    assert pages == 1
+    assert {row["username"] for row in rows} == {
+        "player1",
+        *(f"player1{i}" for i in range(10)),
+    }
+
+
+def test_table_page_ignores_bad_filters():
+    """Test unparsable filter parts, or text compared to numbers, are skipped."""
+    frame = pd.DataFrame({"Source": ["a", "b", None], "Value": [1.0, 2.0, np.nan]})
+
+    rows, pages = table_page(frame, 0, 10, None, "{Value} > abc && nonsense")
+
+    assert pages == 1
+    assert rows[2] == {"Source": None, "Value": None}
+
+
+def test_clocks_follow_the_game_table(stand_in):
+    """Test clocks are read for new games only and feed the anomaly tab."""
+    graph = initialize_graph("player0", 2024, 10, depth=1)
+    clocks = graph_clocks(graph)
+    assert len(clocks) == len(game_table(graph))
+
+    add_opponents_with_depth(graph, "player1", 2024, 10, 1)
+    assert graph_clocks(graph) is clocks
+    assert len(clocks) == len(game_table(graph))
+    assert clocks.columns()["game"].max() == len(clocks) - 1
+
+    anomalies = _detect_time_anomalies(graph)
+    assert set(anomalies["Type"]) <= {"Move Time Variation", "Low-Time Accuracy"}
+    assert len(anomalies)
+
+
+def test_clocks_only_read_cached_archives(stand_in):
+    """Test clocks never download an archive, and read one once it is cached."""
+    graph = initialize_graph("player0", 2024, 10, depth=1)
+    game = get_opponents_and_games_by_month("player10", 2024, 10)["player11"][0]
+    september = stand_in.games("player10", 2024, 9)["games"][0]
+    game = replace(game, uuid=september["uuid"], end_time=september["end_time"])
+    add_edge(graph, get_player_data("player10"), get_player_data("player11"), [game])
+    requests = sum(stand_in.requests.values())
+
+    clocks = graph_clocks(graph)
+    anomaly_frame(graph)
+    assert sum(stand_in.requests.values()) == requests
+    assert graph.graph["clocks_missing"] == {len(clocks) - 1}
+
+    get_player_games_by_month("player10", 2024, 9)
+    assert graph_clocks(graph).columns()["game"].max() == len(clocks) - 1
+    assert graph.graph["clocks_missing"] == set()
+
+    stored = data_to_graph(graph_to_data(graph))
+    assert stored.graph["clocks"].to_dict() == clocks.to_dict()
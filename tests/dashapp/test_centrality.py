@@ -0,0 +1,44 @@
+import random
+
+import networkx as nx
+import pytest
+
+from dashapp.centrality import pagerank
+
+
+@pytest.fixture
+def weighted_graph():
+    """Fixture to create a clustered graph weighted like rating differences."""
+    rng = random.Random(0)
+    graph = nx.powerlaw_cluster_graph(500, 3, 0.3, seed=0)
+    for u, v in graph.edges():
+        graph[u][v]["weight"] = rng.randint(0, 400)
+    return graph
+
+
+def assert_matches_networkx(graph, scores):
+    """Assert scores are those of a full, tightly converged recomputation."""
+    expected = nx.pagerank(graph, tol=1e-12, max_iter=1000)
+    assert scores.keys() == expected.keys()
+    for node, score in expected.items():
+        assert scores[node] == pytest.approx(score, rel=1e-3)
+
+
+def test_pagerank_matches_networkx(weighted_graph):
+    """Test a first computation matches networkx."""
+    assert_matches_networkx(weighted_graph, pagerank(weighted_graph))
+
+
+def test_pagerank_follows_expansions(weighted_graph):
+    """Test updates after expansions match a full recomputation."""
+    pagerank(weighted_graph)
+    state = weighted_graph.graph["pagerank"]
+
+    weighted_graph.add_edges_from(
+        [(7, f"new{i}", {"weight": 10 * i}) for i in range(20)] + [(7, 400, {})]
+    )
+    assert_matches_networkx(weighted_graph, pagerank(weighted_graph))
+
+    weighted_graph.add_edge("new3", 0, weight=50)
+    assert_matches_networkx(weighted_graph, pagerank(weighted_graph))
+    assert weighted_graph.graph["pagerank"] is state
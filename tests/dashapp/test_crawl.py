@@ -0,0 +1,181 @@
+import asyncio
+from collections import Counter
+
+import networkx as nx
+import pytest
+from chessdotcom import ChessDotComError
+
+import dashapp.crawl
+from dashapp.crawl import crawl_opponents
+from network import GameEdge, PlayerDetails, PlayerNode
+
+# Synthetic opponent graph with cycles, so players are reachable by several paths.
+OPPONENTS = {
+    "seed": ["a", "b", "c"],
+    "a": ["seed", "b", "d"],
+    "b": ["seed", "a", "c", "d", "e"],
+    "c": ["seed", "b", "f"],
+    "d": ["a", "b", "g"],
+    "e": ["b", "g"],
+    "f": ["c"],
+    "g": ["d", "e"],
+}
+
+
+def game(player: str, opponent: str) -> GameEdge:
+    white, black = sorted((player, opponent))
+    return GameEdge(
+        uuid="",
+        time_control="600",
+        time_class="rapid",
+        rules="chess",
+        accuracies={},
+        eco_code="",
+        white=PlayerDetails(uid=0, username=white, rating=1500, result="win"),
+        black=PlayerDetails(uid=0, username=black, rating=1500, result="resigned"),
+        start_time=0,
+        end_time=0,
+    )
+
+
+@pytest.fixture
+def api_calls(monkeypatch):
+    """Fixture to replace the API with the synthetic graph and count calls."""
+    calls: Counter = Counter()
+    calls.failing = set()
+    in_flight = {"now": 0, "max": 0}
+
+    async def fetch_player_data(username):
+        calls[f"profile:{username}"] += 1
+        if username in calls.failing:
+            raise ChessDotComError(status_code=500, response_text="", headers={})
+        return PlayerNode(
+            uid=0, name=username, username=username, country="US", rating=1500
+        )
+
+    async def fetch_opponents_and_games_by_month(username, year, month):
+        calls[f"games:{username}"] += 1
+        in_flight["now"] += 1
+        in_flight["max"] = max(in_flight["max"], in_flight["now"])
+        await asyncio.sleep(0.01)
+        in_flight["now"] -= 1
+        if not OPPONENTS.get(username):
+            raise ValueError(f"No opponents found for {username}.")
+        return {
+            opponent: [game(username, opponent)] for opponent in OPPONENTS[username]
+        }
+
+    monkeypatch.setattr(dashapp.crawl, "fetch_player_data", fetch_player_data)
+    monkeypatch.setattr(
+        dashapp.crawl,
+        "fetch_opponents_and_games_by_month",
+        fetch_opponents_and_games_by_month,
+    )
+    calls.in_flight = in_flight
+    return calls
+
+
+def crawl(depth: int, **kwargs) -> nx.Graph:
+    return asyncio.run(crawl_opponents(nx.Graph(), "seed", 2024, 10, depth, **kwargs))
+
+
+def test_each_player_expanded_once(api_calls):
+    """Test players reachable by several paths are fetched once."""
+    graph = crawl(depth=4)
+
+    games_calls = {key: n for key, n in api_calls.items() if key.startswith("games:")}
+    assert games_calls == {f"games:{player}": 1 for player in OPPONENTS}
+    assert max(api_calls.values()) == 1
+    assert set(graph.nodes) == set(OPPONENTS)
+
+
+def test_depth_limits_levels(api_calls):
+    """Test depth 2 expands the seed and its direct opponents only."""
+    crawl(depth=2)
+
+    expanded = {key.split(":")[1] for key in api_calls if key.startswith("games:")}
+    assert expanded == {"seed", "a", "b", "c"}
+
+
+def test_games_are_not_duplicated(api_calls):
+    """Test a pair's games are added once although both players are expanded."""
+    graph = crawl(depth=4)
+
+    assert all(data["games"] == 1 for _, _, data in graph.edges(data=True))
+    pairs = {frozenset((p, o)) for p, opponents in OPPONENTS.items() for o in opponents}
+    assert graph.number_of_edges() == len(pairs)
+
+
+def test_edges_are_added_once_per_level(api_calls, monkeypatch):
+    """Test each level's games are added to the graph in a single batch."""
+    batches = []
+    add_edges_bulk = dashapp.crawl.add_edges_bulk
+
+    def counting_add_edges_bulk(graph, edges):
+        batches.append(len(edges))
+        return add_edges_bulk(graph, edges)
+
+    monkeypatch.setattr(dashapp.crawl, "add_edges_bulk", counting_add_edges_bulk)
+    graph = crawl(depth=3)
+
+    assert len(batches) == 3
+    assert sum(batches) == graph.number_of_edges()
+
+
+def test_concurrency_limit(api_calls):
+    """Test the frontier is fetched concurrently, within the limit."""
+    crawl(depth=3, max_concurrency=2)
+
+    assert api_calls.in_flight["max"] == 2
+
+
+def test_seed_without_opponents_raises(api_calls, monkeypatch):
+    """Test a seed without games fails the crawl."""
+    monkeypatch.setitem(OPPONENTS, "seed", [])
+
+    with pytest.raises(ValueError):
+        crawl(depth=2)
+
+
+def test_player_without_opponents_is_skipped(api_calls, monkeypatch):
+    """Test a deeper player without games does not stop the crawl."""
+    monkeypatch.setitem(OPPONENTS, "a", [])
+
+    graph = crawl(depth=3)
+
+    assert "d" in graph
+
+
+def test_opponent_whose_fetch_fails_is_skipped(api_calls):
+    """Test an opponent whose profile or stats fail is left out of the crawl."""
+    api_calls.failing.add("b")
+
+    graph = crawl(depth=3)
+
+    assert "b" not in graph
+    assert api_calls["games:b"] == 0
+    assert {"a", "c", "d", "f"} <= set(graph)
+
+
+def test_expanded_players_are_not_expanded_again(api_calls):
+    """Test a later crawl of the same graph skips players it already expanded."""
+    graph = crawl(depth=1)
+    asyncio.run(crawl_opponents(graph, "a", 2024, 10, 1))
+    asyncio.run(crawl_opponents(graph, "seed", 2024, 10, 1))
+
+    assert graph.graph["expanded"] == {("seed", 2024, 10), ("a", 2024, 10)}
+    assert api_calls["games:seed"] == 1
+    assert all(data["games"] == 1 for _, _, data in graph.edges(data=True))
+
+
+def test_another_month_adds_its_games(api_calls):
+    """Test players expanded in one month are expanded again for another."""
+    graph = crawl(depth=1)
+    asyncio.run(crawl_opponents(graph, "a", 2024, 10, 1))
+    asyncio.run(crawl_opponents(graph, "a", 2024, 11, 1))
+
+    assert ("a", 2024, 11) in graph.graph["expanded"]
+    assert api_calls["games:a"] == 2
+    # The game with the seed, expanded in October only, is added for November
+    assert graph.edges["a", "seed"]["games"] == 2
+    assert graph.edges["a", "b"]["games"] == 2
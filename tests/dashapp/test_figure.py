@@ -0,0 +1,56 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+import dashapp.graph
+from dashapp.graph import EDGE_COLOR_BINS, create_figure
+from extraction import get_player_data
+from extraction.client import client
+from extraction.ratelimit import RateLimiter
+
+
+@pytest.fixture
+def graph():
+    """Fixture to create a weighted random graph with known positions."""
+    graph = nx.relabel_nodes(nx.gnm_random_graph(100, 400, seed=1), str)
+    for u, v in graph.edges:
+        graph[u][v]["weight"] = abs(int(u) - int(v)) * 10
+    nx.set_node_attributes(graph, 1500, "rating")
+    graph.graph["positions"] = {
+        node: (float(node), float(node) ** 0.5) for node in graph
+    }
+    return graph
+
+
+def test_edges_are_batched_by_colour(graph):
+    """Test every edge is drawn once, in at most one trace per colour bin."""
+    figure = create_figure(graph)
+    *edges, nodes = figure.data
+
+    assert len(edges) <= EDGE_COLOR_BINS
+    assert len({trace.line.color for trace in edges}) == len(edges)
+    drawn = sum(np.count_nonzero(~np.isnan(trace.x)) for trace in edges)
+    assert drawn == 2 * graph.number_of_edges()
+    assert list(nodes.text) == list(graph.nodes)
+
+
+def test_large_graphs_use_webgl(graph, monkeypatch):
+    """Test traces switch to WebGL above the size threshold."""
+    assert {trace.type for trace in create_figure(graph).data} == {"scatter"}
+    monkeypatch.setattr(dashapp.graph, "WEBGL_THRESHOLD", 100)
+
+    assert {trace.type for trace in create_figure(graph).data} == {"scattergl"}
+
+
+def test_rate_limited_initialization_shows_the_error(stand_in, monkeypatch):
+    """Test a request still throttled after its retries opens the error dialog."""
+    monkeypatch.setattr(client, "rate_limiter", RateLimiter(max_retries=0))
+    get_player_data("player1")
+    stand_in.throttle(1)  # The seed's archives
+
+    figure, graph_ref, is_open, message = dashapp.graph.initialize_and_update_graph(
+        1, None, "player1", 2024, 10, 1, None
+    )
+
+    assert (figure, graph_ref, is_open) == ({}, None, True)
+    assert "Rate limited" in message
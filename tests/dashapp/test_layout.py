@@ -0,0 +1,41 @@
+import networkx as nx
+import numpy as np
+
+from dashapp.layout import LAYOUT_DENSE_MAX, full_layout, graph_layout
+
+
+def test_layout_is_deterministic():
+    """Test the same graph always gets the same positions."""
+    first = graph_layout(nx.karate_club_graph())
+    second = graph_layout(nx.karate_club_graph())
+
+    assert first == second
+
+
+def test_expansion_keeps_known_positions():
+    """Test new nodes are placed near their neighbour and old nodes stay put."""
+    graph = nx.karate_club_graph()
+    before = dict(graph_layout(graph))
+    graph.add_edges_from((0, f"new{i}") for i in range(5))
+
+    after = graph_layout(graph)
+
+    assert {node: after[node] for node in before} == before
+    spread = np.ptp(np.array(list(before.values())), axis=0).max()
+    for i in range(5):
+        assert np.linalg.norm(np.subtract(after[f"new{i}"], after[0])) < spread / 2
+
+
+def test_large_graph_layout():
+    """Test large graphs get a deterministic layout that keeps neighbours close."""
+    graph = nx.powerlaw_cluster_graph(LAYOUT_DENSE_MAX * 3, 2, 0.3, seed=0)
+
+    positions = full_layout(graph)
+
+    assert positions == full_layout(graph)
+    pos = np.array([positions[node] for node in graph])
+    edges = np.array(graph.edges())
+    edge_length = np.linalg.norm(pos[edges[:, 0]] - pos[edges[:, 1]], axis=1).mean()
+    pairs = np.random.default_rng(0).integers(0, len(pos), (1000, 2))
+    pair_distance = np.linalg.norm(pos[pairs[:, 0]] - pos[pairs[:, 1]], axis=1).mean()
+    assert edge_length < pair_distance / 2
@@ -0,0 +1,127 @@
+import time
+
+import networkx as nx
+import pytest
+
+from cache.backends import SQLiteBackend
+from dashapp.sessions import NAMESPACE, GraphSessions, copy_graph, graph_size
+from network import GameEdge, PlayerDetails, PlayerNode, add_edge
+
+
+def make_node(index: int) -> PlayerNode:
+    return PlayerNode(
+        uid=index, name="", username=f"player{index}", country="US", rating=1500
+    )
+
+
+def make_game(white: PlayerNode, black: PlayerNode) -> GameEdge:
+    return GameEdge(
+        uuid=f"{white.username}-{black.username}",
+        time_control="600",
+        time_class="rapid",
+        rules="chess",
+        accuracies={},
+        eco_code="",
+        white=PlayerDetails(uid="", username=white.username, rating=1500, result="win"),
+        black=PlayerDetails(
+            uid="", username=black.username, rating=1500, result="resigned"
+        ),
+        start_time=0,
+        end_time=600,
+    )
+
+
+def make_graph(players: int) -> nx.Graph:
+    """Build a path of `players` players with one game per edge."""
+    graph = nx.Graph()
+    nodes = [make_node(i) for i in range(players)]
+    for white, black in zip(nodes, nodes[1:]):
+        add_edge(graph, white, black, [make_game(white, black)])
+    return graph
+
+
+@pytest.fixture
+def shared(tmp_path):
+    """Fixture to share one SQLite file between two workers' session stores."""
+    backend = SQLiteBackend(tmp_path / "sessions.sqlite3")
+    yield GraphSessions(backend=backend), GraphSessions(backend=backend)
+    backend.close()
+
+
+def test_workers_share_sessions(shared):
+    """Test a session created and updated by one worker is served by another."""
+    first, second = shared
+    graph = make_graph(3)
+    graph.graph["expanded"] = {("player0", 2024, 10)}
+    ref = first.create(graph)
+
+    assert second.get(ref).edges == graph.edges
+    assert second.get(ref).graph["expanded"] == {("player0", 2024, 10)}
+    newer = second.update(ref, make_graph(5))
+
+    assert newer == {"session": ref["session"], "version": 2}
+    assert first.get(newer).number_of_nodes() == 5
+    assert first.get(newer).graph["version"] == 2
+    assert first.get({"session": "unknown", "version": 1}) is None
+
+
+def test_memory_cap_evicts_least_recently_used():
+    """Test sessions beyond the memory cap are evicted oldest-used first."""
+    sessions = GraphSessions(max_bytes=int(2.5 * graph_size(make_graph(10))))
+    refs = [sessions.create(make_graph(10)) for _ in range(3)]
+
+    assert sessions.get(refs[0]) is None
+    assert sessions.get(refs[1]) is not None
+    sessions.create(make_graph(10))
+
+    assert sessions.get(refs[1]) is not None
+    assert sessions.get(refs[2]) is None
+    assert sessions.bytes <= sessions.max_bytes
+
+
+def test_sessions_expire(shared, monkeypatch):
+    """Test a session is gone from memory and disk once its TTL has passed."""
+    first, second = shared
+    first.ttl = second.ttl = 60
+    ref = first.create(make_graph(3))
+    now = time.time()
+    monkeypatch.setattr("dashapp.sessions.time.time", lambda: now + 61)
+
+    assert first.get(ref) is None
+    assert second.get(ref) is None
+
+
+def test_abandoned_sessions_are_purged(shared, monkeypatch):
+    """Test sessions nobody reads again are deleted from the shared store."""
+    first, _ = shared
+    first.ttl = first.sweep_interval = 60
+    abandoned = first.create(make_graph(3))
+    now = time.time()
+    monkeypatch.setattr("dashapp.sessions.time.time", lambda: now + 61)
+    ref = first.create(make_graph(3))
+
+    assert first.backend.get(NAMESPACE, abandoned["session"]) is None
+    assert first.backend.get(NAMESPACE, ref["session"]) is not None
+
+
+def test_copied_graph_changes_leave_the_session_graph_alone():
+    """Test expanding a copy keeps the stored graph as its version saw it."""
+    graph = make_graph(3)
+    graph.graph["expanded"] = {("player0", 2024, 10)}
+    graph.graph["positions"] = {node: (0.0, 0.0) for node in graph}
+    copied = copy_graph(graph)
+
+    add_edge(
+        copied, make_node(0), make_node(1), [make_game(make_node(0), make_node(1))]
+    )
+    add_edge(
+        copied, make_node(2), make_node(3), [make_game(make_node(2), make_node(3))]
+    )
+    copied.graph["expanded"].add(("player2", 2024, 10))
+    copied.graph["positions"]["player3"] = (1.0, 1.0)
+
+    assert copied.edges["player0", "player1"]["games"] == 2
+    assert graph.edges["player0", "player1"]["rows"] == [0]
+    assert (graph.number_of_nodes(), len(graph.graph["games"])) == (3, 2)
+    assert graph.graph["expanded"] == {("player0", 2024, 10)}
+    assert "player3" not in graph.graph["positions"]
@@ -0,0 +1,64 @@
+"""A stand-in UCI engine scoring positions by material, for tests.
+
+Every position it searches is appended to the file named by
+`FAKE_ENGINE_LOG`, if set, as one FEN per line.
+"""
+
+import os
+import sys
+
+import chess
+
+VALUES = {chess.PAWN: 100, chess.KNIGHT: 300, chess.BISHOP: 300, chess.ROOK: 500}
+VALUES[chess.QUEEN] = 900
+
+
+def material(board: chess.Board) -> int:
+    """Material balance in centipawns, from the side to move's point of view."""
+    return sum(
+        VALUES.get(piece.piece_type, 0) * (1 if piece.color == board.turn else -1)
+        for piece in board.piece_map().values()
+    )
+
+
+def position(tokens: list) -> chess.Board:
+    """The board of a UCI `position` command."""
+    moves = tokens.index("moves") if "moves" in tokens else len(tokens)
+    if tokens[1] == "startpos":
+        board = chess.Board()
+    else:
+        board = chess.Board(" ".join(tokens[2:moves]))
+    for move in tokens[moves + 1 :]:
+        board.push_uci(move)
+    return board
+
+
+def main():
+    board = chess.Board()
+    log = os.getenv("FAKE_ENGINE_LOG")
+    for line in sys.stdin:
+        tokens = line.split()
+        if not tokens:
+            continue
+        if tokens[0] == "uci":
+            print("id name Fake")
+            print("option name Threads type spin default 1 min 1 max 8")
+            print("uciok")
+        elif tokens[0] == "isready":
+            print("readyok")
+        elif tokens[0] == "position":
+            board = position(tokens)
+        elif tokens[0] == "go":
+            if log:
+                with open(log, "a") as file:
+                    file.write(board.fen() + "\n")
+            move = next(iter(board.legal_moves), None)
+            print(f"info depth 1 score cp {material(board)}")
+            print(f"bestmove {move.uci() if move else '(none)'}")
+        elif tokens[0] == "quit":
+            break
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+from evaluation import EnginePool, aiter_evaluations, centipawn_losses
+
+FAKE_ENGINE = [sys.executable, str(Path(__file__).with_name("fake_engine.py"))]
+
+PGNS = {
+    "capture": "1. e4 d5 2. exd5 Qxd5 *",
+    "develop": "1. e4 d5 2. Nf3 Nf6 *",
+    "mate": "1. f3 e5 2. g4 Qh4# 0-1",
+}
+
+
+@pytest.fixture
+def engine_log(tmp_path, monkeypatch):
+    """Fixture to record every position the fake engines search."""
+    log = tmp_path / "engine.log"
+    log.touch()
+    monkeypatch.setenv("FAKE_ENGINE_LOG", str(log))
+    return log
+
+
+def evaluate(pgns):
+    """Evaluate games with two fake engines, by game uuid."""
+
+    async def collect():
+        async with EnginePool(FAKE_ENGINE, size=2, depth=1) as pool:
+            return {game.uuid: game async for game in aiter_evaluations(pgns, pool)}
+
+    return asyncio.run(collect())
+
+
+def test_centipawn_losses():
+    """Test losses are taken from the mover's side and clamped."""
+    evaluations = [20, -30, 40, -20, 5000, -5000]
+    assert centipawn_losses(evaluations) == [50, 70, 60, 1020, 2000]
+    assert centipawn_losses([0, 100], white_first=False) == [100]
+
+
+def test_evaluations_of_shared_positions(engine_log):
+    """Test every position is searched once and scored from White's side."""
+    games = evaluate(PGNS)
+
+    assert games["capture"].evaluations == [0, 0, 0, 100, 0]
+    assert games["capture"].losses == [0, 0, 0, 0]
+    assert games["mate"].evaluations[-1] == -10_000
+    assert games["mate"].losses[-1] == 0
+    searched = engine_log.read_text().splitlines()
+    # Start, 1. e4 and 1... d5 are shared, and the final mate needs no search
+    assert len(searched) == len(set(searched)) == 5 + 2 + 3
+
+
+def test_evaluations_are_cached(engine_log):
+    """Test positions evaluated before are served from the cache."""
+    first = evaluate(PGNS)
+    engine_log.write_text("")
+
+    assert evaluate(PGNS) == first
+    assert engine_log.read_text() == ""
@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+
+from benchmarks.stand_in import StandInServer
+from extraction import aiter_archive_games, fetch_archive_games, iter_archive_games
+from extraction.client import client
+
+MONTHS = [(2023, month) for month in range(1, 13)]
+
+
+@pytest.fixture
+def archive(monkeypatch):
+    """Fixture to serve players with a year of monthly archives."""
+    with StandInServer(num_players=10, fanout=2, months=list(MONTHS)) as server:
+        monkeypatch.setattr(client, "base_url", server.url)
+        yield server
+
+
+def test_variants_agree(archive):
+    """Test the generator, async and list variants return the same games in order."""
+    games = list(iter_archive_games("player0"))
+
+    async def collect():
+        return [
+            game async for game in aiter_archive_games("player0", max_concurrency=3)
+        ]
+
+    assert len(games) == 2 * len(MONTHS)
+    assert [game["end_time"] for game in games] == sorted(
+        game["end_time"] for game in games
+    )
+    assert asyncio.run(collect()) == games
+    assert fetch_archive_games("player0") == games
+    assert archive.requests["games"] == len(MONTHS)
+
+
+def test_new_only_fetches_new_months(archive):
+    """Test incremental mode only downloads months missing from the cache."""
+    fetch_archive_games("player0")
+    archive.months.append((2024, 1))
+
+    games = fetch_archive_games("player0", new_only=True)
+
+    assert {game["end_time"] for game in games} == {
+        game["end_time"] for game in archive.games("player0", 2024, 1)["games"]
+    }
+    assert archive.requests["games"] == len(MONTHS) + 1
+
+
+def test_early_exit_cancels_prefetched_months(archive):
+    """Test abandoning the async generator does not leave months downloading."""
+
+    async def first_game():
+        games = aiter_archive_games("player0", max_concurrency=4)
+        game = await games.__anext__()
+        await games.aclose()
+        return game
+
+    assert asyncio.run(first_game())["end_time"]
+    assert archive.requests["games"] <= 4
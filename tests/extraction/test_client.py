@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+from chessdotcom import ChessDotComError
+
+import extraction.main
+from extraction import fetch_player_data, get_player_data
+from extraction.api import fetch_player_profile, get_player_profile
+from extraction.client import AsyncClient
+
+
+def test_sync_wrapper_matches_async(stand_in):
+    """Test the synchronous API returns what the async API fetches."""
+    assert get_player_profile("player1") == asyncio.run(fetch_player_profile("player1"))
+    assert get_player_data("player1") == asyncio.run(fetch_player_data("player1"))
+
+
+def test_responses_are_cached(stand_in):
+    """Test sync and async variants share cache entries."""
+    get_player_profile("player2")
+    asyncio.run(fetch_player_profile("player2"))
+
+    assert stand_in.requests["profile"] == 1
+
+
+def test_error_status_raises(stand_in):
+    """Test non-200 responses surface as ChessDotComError."""
+    client = AsyncClient(base_url=stand_in.url)
+
+    with pytest.raises(ChessDotComError) as exc:
+        client.run(client.get_json("/player/unknown"))
+
+    assert exc.value.status_code == 404
+    client.close()
+
+
+def test_concurrent_fetches_share_client(stand_in):
+    """Test many concurrent fetches complete through one pooled client."""
+
+    async def fetch_all():
+        return await asyncio.gather(
+            *[fetch_player_data(f"player{index}") for index in range(20)]
+        )
+
+    players = asyncio.run(fetch_all())
+
+    assert [player.username for player in players] == [
+        f"player{index}" for index in range(20)
+    ]
+
+
+def test_player_without_stats_is_skipped(stand_in, monkeypatch):
+    """Test a failed or empty stats fetch yields no player instead of raising."""
+
+    async def failing_stats(username):
+        raise ChessDotComError(status_code=404, response_text="", headers={})
+
+    async def empty_stats(username):
+        return {"stats": None}
+
+    monkeypatch.setattr(extraction.main, "fetch_player_stats", failing_stats)
+    assert asyncio.run(fetch_player_data("player3")) is None
+    monkeypatch.setattr(extraction.main, "fetch_player_stats", empty_stats)
+    assert asyncio.run(fetch_player_data("player3")) is None
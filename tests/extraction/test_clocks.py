@@ -0,0 +1,93 @@
+import io
+import random
+
+import chess.pgn
+import numpy as np
+import pytest
+
+from benchmarks.stand_in import synthetic_pgn
+from extraction.clocks import (
+    ClockTable,
+    get_player_clocks_by_month,
+    iter_game_clocks,
+    parse_time_control,
+)
+
+
+@pytest.fixture
+def pgn_text():
+    """Fixture to create a multi-game PGN text with clock annotations."""
+    rng = random.Random(0)
+    return "\n".join(
+        synthetic_pgn(f"player{i % 3}", f"player{(i + 1) % 3}", rng, rng.randint(2, 40))
+        for i in range(30)
+    )
+
+
+def test_clocks_match_a_full_parse(pgn_text):
+    """Test the scanned clocks and players are those read by python-chess."""
+    games = list(iter_game_clocks([pgn_text]))
+    text = io.StringIO(pgn_text)
+
+    assert len(games) == 30
+    for clocks in games:
+        game = chess.pgn.read_game(text)
+        assert (clocks.white, clocks.black) == (
+            game.headers["White"],
+            game.headers["Black"],
+        )
+        expected = [node.clock() for node in game.mainline()]
+        np.testing.assert_allclose(clocks.clocks, expected, atol=0.01)
+
+
+@pytest.mark.parametrize("size", [3, 97])
+def test_streaming_in_any_chunks(pgn_text, size):
+    """Test clocks do not depend on where the text is cut."""
+    whole = list(iter_game_clocks([pgn_text]))
+    chunks = [pgn_text[start : start + size] for start in range(0, len(pgn_text), size)]
+
+    streamed = list(iter_game_clocks(chunks))
+
+    assert [game.white for game in streamed] == [game.white for game in whole]
+    for left, right in zip(streamed, whole):
+        np.testing.assert_array_equal(left.clocks, right.clocks)
+
+
+def test_player_features(pgn_text):
+    """Test per-player features match a direct computation over their moves."""
+    table = ClockTable()
+    table.append(iter_game_clocks([pgn_text]))
+    accuracies = np.full((len(table), 2), np.nan)
+    accuracies[:, 0] = 90.0
+
+    features = table.player_features(accuracies, low_time=0.9).set_index("player")
+
+    elapsed = {player: [] for player in features.index}
+    for game in iter_game_clocks([pgn_text]):
+        left = [game.base, game.base]
+        for ply, clock in enumerate(game.clocks):
+            player = (game.white, game.black)[ply % 2]
+            elapsed[player].append(left[ply % 2] - clock + game.increment)
+            left[ply % 2] = clock
+    for player, times in elapsed.items():
+        assert features.loc[player, "moves"] == len(times)
+        assert features.loc[player, "mean_time"] == pytest.approx(np.mean(times))
+        assert features.loc[player, "time_variance"] == pytest.approx(
+            np.var(times), rel=1e-3
+        )
+    assert set(features["low_time_accuracy"].dropna()) == {90.0}
+
+
+def test_time_controls():
+    """Test live, daily and untimed time controls."""
+    assert parse_time_control("600+5") == (600.0, 5.0)
+    assert parse_time_control("1/86400") == (86400.0, 0.0)
+    assert parse_time_control("-") == (0.0, 0.0)
+
+
+def test_player_clocks_by_month(stand_in):
+    """Test the monthly PGN endpoint is read into a clock table."""
+    table = get_player_clocks_by_month("player0", 2024, 10)
+
+    assert len(table) == len(stand_in.games("player0", 2024, 10)["games"])
+    assert len(table.columns()["clock"]) > 0
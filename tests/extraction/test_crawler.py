@@ -0,0 +1,98 @@
+import asyncio
+from collections import Counter
+
+import pytest
+
+import extraction.crawler
+from benchmarks.stand_in import StandInServer
+from extraction.client import client
+from extraction.crawler import DONE, CrawlState, crawl
+
+MONTHS = [(2024, 9), (2024, 10)]
+NEIGHBOURS = {"player0", "player1", "player2", "player48", "player49"}
+
+
+@pytest.fixture
+def archive(monkeypatch):
+    """Fixture to serve players with two monthly archives each."""
+    with StandInServer(num_players=50, fanout=4, months=list(MONTHS)) as server:
+        monkeypatch.setattr(client, "base_url", server.url)
+        yield server
+
+
+@pytest.fixture
+def state(tmp_path):
+    """Fixture to open an empty crawl state."""
+    state = CrawlState(tmp_path / "crawl.sqlite3")
+    yield state
+    state.close()
+
+
+def test_crawl_visits_each_player_once(archive, state):
+    """Test players are crawled once each and shared games stored once."""
+    asyncio.run(crawl(["player0"], state, depth=2))
+
+    assert set(state.players(DONE)) == NEIGHBOURS
+    assert archive.requests["archives"] == len(NEIGHBOURS)
+    assert archive.requests["games"] == len(NEIGHBOURS) * len(MONTHS)
+    uuids = [game["uuid"] for game in state.iter_games()]
+    assert len(uuids) == len(set(uuids)) == state.games
+    # Games between two crawled players are in both archives but stored once
+    assert state.games == 13 * len(MONTHS)
+
+
+def test_budgets_stop_the_crawl_and_resume_continues(archive, tmp_path):
+    """Test a crawl stopped by its budget resumes to the same games as one run."""
+    whole = CrawlState(tmp_path / "whole.sqlite3")
+    asyncio.run(crawl(["player0"], whole, depth=3))
+
+    state = CrawlState(tmp_path / "crawl.sqlite3")
+    asyncio.run(crawl(["player0"], state, depth=3, max_users=2, max_concurrency=1))
+    assert state.visited == 2
+    asyncio.run(crawl(["player0"], state, depth=3, max_games=state.games + 1))
+    assert state.games < whole.games
+    state.close()
+
+    resumed = CrawlState(tmp_path / "crawl.sqlite3")
+    asyncio.run(crawl([], resumed, depth=3))
+    assert resumed.visited == whole.visited
+    assert sorted(game["uuid"] for game in resumed.iter_games()) == sorted(
+        game["uuid"] for game in whole.iter_games()
+    )
+    resumed.close()
+    whole.close()
+
+
+def test_crash_resumes_from_the_last_finished_month(archive, state, monkeypatch):
+    """Test months committed before a crash are not fetched again."""
+    fetched = Counter()
+    crash_at = [5]
+    fetch = extraction.crawler.fetch_player_games_by_month
+
+    async def crashing_fetch(username, year, month):
+        if sum(fetched.values()) == crash_at[0]:
+            raise RuntimeError("Crash")
+        fetched[(username, year, month)] += 1
+        return await fetch(username, year, month)
+
+    monkeypatch.setattr(
+        extraction.crawler, "fetch_player_games_by_month", crashing_fetch
+    )
+    with pytest.raises(RuntimeError):
+        asyncio.run(crawl(["player0"], state, depth=2, max_concurrency=1))
+    assert state.visited == 2
+    committed = {
+        (username, *month)
+        for username in NEIGHBOURS
+        for month in state.finished_months(username)
+    }
+    assert len(committed) == 4
+
+    crash_at[0] = None
+    asyncio.run(crawl(["player0"], state, depth=2))
+
+    assert set(state.players(DONE)) == NEIGHBOURS
+    assert state.games == 13 * len(MONTHS)
+    for username in NEIGHBOURS:
+        assert state.finished_months(username) == set(MONTHS)
+    assert all(fetched[month] == 1 for month in committed)
@@ -0,0 +1,44 @@
+from dataclasses import replace
+
+from extraction import get_opponents_and_games_by_month, get_pgn, get_pgns
+from network import PlayerDetails
+
+
+def test_pgns_are_read_back_from_archives(stand_in):
+    """Test games fetch their PGN by uuid from their monthly archives."""
+    opponents = get_opponents_and_games_by_month("player0", 2024, 10)
+    games = [game for edges in opponents.values() for game in edges]
+    archived = {
+        game["uuid"]: game["pgn"]
+        for white in {game.white.username for game in games}
+        for game in stand_in.games(white, 2024, 10)["games"]
+    }
+
+    pgns = get_pgns(games)
+
+    assert pgns == {game.uuid: archived[game.uuid] for game in games}
+    assert get_pgn(games[0]) == archived[games[0].uuid]
+
+
+def test_pgns_are_read_from_the_cached_side(stand_in):
+    """Test games against an expanded Black player read its cached archive."""
+    opponents = get_opponents_and_games_by_month("player2", 2024, 10)
+    games = [game for edges in opponents.values() for game in edges]
+    assert {game.black.username for game in games} >= {"player2"}
+
+    pgns = get_pgns(games)
+
+    assert set(pgns) == {game.uuid for game in games}
+    assert stand_in.requests["games"] == 1
+
+
+def test_failed_archives_are_skipped(stand_in):
+    """Test a missing archive only leaves out its own games."""
+    opponents = get_opponents_and_games_by_month("player0", 2024, 10)
+    games = [game for edges in opponents.values() for game in edges]
+    ghost = PlayerDetails(username="ghost", rating=0, result="win", uid="")
+    lost = replace(games[0], uuid="lost", white=ghost, black=ghost)
+
+    pgns = get_pgns([*games, lost])
+
+    assert set(pgns) == {game.uuid for game in games}
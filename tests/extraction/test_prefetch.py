@@ -0,0 +1,43 @@
+import asyncio
+
+import networkx as nx
+
+from dashapp.crawl import crawl_opponents
+from extraction.prefetch import State, month_range, prefetch, prefetch_month
+
+
+def test_month_range_crosses_years():
+    """Test month ranges are inclusive and roll over into the next year."""
+    assert list(month_range((2023, 11), (2024, 2))) == [
+        (2023, 11),
+        (2023, 12),
+        (2024, 1),
+        (2024, 2),
+    ]
+
+
+def test_prefetch_warms_the_crawl(stand_in):
+    """Test the app's crawl is served from the cache after a prefetch."""
+    expanded = asyncio.run(prefetch_month(["player0"], 2024, 10, depth=2))
+    requests = sum(stand_in.requests.values())
+
+    graph = asyncio.run(crawl_opponents(nx.Graph(), "player0", 2024, 10, depth=2))
+
+    assert expanded == {"player0", "player1", "player2", "player48", "player49"}
+    assert set(graph.nodes) >= expanded
+    assert sum(stand_in.requests.values()) == requests
+
+
+def test_finished_months_are_skipped_on_resume(stand_in, tmp_path, capsys):
+    """Test a finished month recorded in the state file is not crawled again."""
+    state = State(tmp_path / "prefetch.json")
+    asyncio.run(prefetch(["player0"], (2024, 10), (2024, 10), 1, state=state))
+    requests = sum(stand_in.requests.values())
+
+    resumed = State(tmp_path / "prefetch.json")
+    assert resumed.is_done("player0", 2024, 10, 1)
+    assert not resumed.is_done("player0", 2024, 10, 2)
+    asyncio.run(prefetch(["player0"], (2024, 10), (2024, 10), 1, state=resumed))
+
+    assert sum(stand_in.requests.values()) == requests
+    assert "2024-10: already prefetched." in capsys.readouterr().out
@@ -0,0 +1,68 @@
+import time
+from email.utils import formatdate
+
+import pytest
+
+from extraction.client import AsyncClient
+from extraction.ratelimit import RateLimiter, RateLimitError, parse_retry_after
+
+
+@pytest.fixture
+def fast_limiter():
+    """Fixture to create a limiter with short delays for testing."""
+    return RateLimiter(rate=100, max_retries=2, base_delay=0.01, max_delay=0.05)
+
+
+def test_parse_retry_after():
+    """Test Retry-After accepts delta-seconds and HTTP-dates."""
+    now = time.time()
+
+    assert parse_retry_after("3") == 3
+    assert parse_retry_after(None) == 0
+    assert parse_retry_after(
+        formatdate(now + 30, usegmt=True), now=now
+    ) == pytest.approx(30, abs=1)
+
+
+def test_token_bucket_spaces_requests():
+    """Test requests beyond the burst are spaced at the refill rate."""
+    limiter = RateLimiter(rate=50, burst=1)
+    start = time.perf_counter()
+
+    for _ in range(6):
+        limiter.acquire()
+
+    assert time.perf_counter() - start >= 0.09
+    assert limiter.stats.queued_time > 0
+
+
+def test_throttled_request_is_retried(stand_in, fast_limiter):
+    """Test a 429 is retried after Retry-After and slows the limiter down."""
+    client = AsyncClient(base_url=stand_in.url, rate_limiter=fast_limiter)
+    stand_in.throttle(1, retry_after="0.1")
+
+    start = time.perf_counter()
+    profile = client.run(client.get_json("/player/player1"))
+
+    assert profile["username"] == "player1"
+    assert time.perf_counter() - start >= 0.1
+    stats = fast_limiter.stats
+    assert (stats.throttled, stats.retries) == (1, 1)
+    assert stats.rate < fast_limiter.max_rate
+    assert stats.throttled_time >= 0.1
+    client.close()
+
+
+def test_retries_are_capped(stand_in, fast_limiter):
+    """Test RateLimitError is raised once the retry budget is spent."""
+    client = AsyncClient(base_url=stand_in.url, rate_limiter=fast_limiter)
+    stand_in.throttle(10)
+
+    with pytest.raises(RateLimitError) as exc:
+        client.run(client.get_json("/player/player1"))
+
+    assert exc.value.status_code == 429
+    assert exc.value.attempts == 3
+    assert stand_in.requests["429"] == 3
+    assert fast_limiter.stats.exhausted == 1
+    client.close()
@@ -0,0 +1,84 @@
+import json
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from network import GameEdge, GameTable, PlayerDetails, PlayerNode, add_edge, edge_games
+
+
+def make_game(white: str, black: str, result: str, end_time: int) -> GameEdge:
+    """Build a game where white scores `result`."""
+    return GameEdge(
+        uuid=f"{white}-{black}-{end_time}",
+        time_control="600",
+        time_class="rapid",
+        rules="chess",
+        accuracies={"white": 90.5},
+        eco_code="https://www.chess.com/openings/Ruy-Lopez-Opening",
+        white=PlayerDetails(uid="w", username=white, rating=1600, result=result),
+        black=PlayerDetails(uid="b", username=black, rating=1500, result="resigned"),
+        start_time=end_time - 600,
+        end_time=end_time,
+    )
+
+
+@pytest.fixture
+def games():
+    """Fixture to create a few games between three players."""
+    return [
+        make_game("player1", "player2", "win", 1000),
+        make_game("player2", "player1", "stalemate", 2000),
+        make_game("player3", "player1", "timeout", 3000),
+    ]
+
+
+def test_rows_round_trip(games):
+    """Test every game can be rebuilt from its row."""
+    table = GameTable()
+    rows = table.append(games)
+
+    assert list(rows) == [0, 1, 2]
+    assert [table.game(row) for row in rows] == games
+    assert table.column("end_time").tolist() == [1000, 2000, 3000]
+    assert table.decode("white").tolist() == ["player1", "player2", "player3"]
+    assert table.scores("white").tolist() == [1.0, 0.5, 0.0]
+
+
+def test_table_grows_past_its_capacity(games):
+    """Test appending many batches keeps every row."""
+    table = GameTable()
+    for _ in range(100):
+        table.append(games)
+
+    assert len(table) == 300
+    assert table.column("end_time")[-1] == 3000
+    assert np.isnan(table.column("black_accuracy")).all()
+
+
+def test_serialised_table_round_trip(games):
+    """Test a table survives the JSON round trip of a dcc.Store."""
+    table = GameTable()
+    table.append(games)
+
+    restored = GameTable.from_dict(json.loads(json.dumps(table.to_dict())))
+
+    assert [restored.game(row) for row in range(3)] == games
+    restored.append(games[:1])
+    assert restored.decode("white").tolist()[-1] == "player1"
+
+
+def test_edges_reference_their_rows(games):
+    """Test edges keep row indices and a game count, not the games."""
+    graph = nx.Graph()
+    players = {
+        name: PlayerNode(uid=0, name="", username=name, country="US", rating=1500)
+        for name in ("player1", "player2", "player3")
+    }
+    add_edge(graph, players["player1"], players["player2"], games[:1])
+    add_edge(graph, players["player1"], players["player3"], games[2:])
+    add_edge(graph, players["player2"], players["player1"], games[1:2])
+
+    assert graph["player1"]["player2"]["rows"] == [0, 2]
+    assert graph["player1"]["player2"]["games"] == 2
+    assert edge_games(graph, "player2", "player1") == [games[0], games[1]]
@@ -1,7 +1,9 @@
+from dataclasses import FrozenInstanceError
+
 import networkx as nx
 import pytest
 
-from network import GameEdge, PlayerNode, add_edge, add_node
+from network import GameEdge, PlayerNode, add_edge, add_edges_bulk, add_node
 
 
 @pytest.fixture
@@ -25,7 +27,7 @@ def edge_data():
     """Fixture to create mock edge data for testing."""
     return [
         GameEdge(
-            pgn="",
+            uuid="",
             time_control="",
             time_class="",
             rules="",
@@ -90,3 +92,29 @@ def test_no_duplicate_edges(setup_graph, player_nodes, edge_data):
     graph = add_edge(graph, node1, node2, edge_data=edge_data)
 
     assert graph.number_of_edges() == initial_edge_count  # Edge count should not change
+
+
+def test_add_edges_bulk_matches_add_edge(player_nodes, edge_data):
+    """Test that a bulk insert builds the same graph as one edge at a time."""
+    node1, node2, node3 = player_nodes
+    edges = [(node1, node2, edge_data), (node2, node3, edge_data * 2)]
+    edges.append((node2, node1, edge_data))
+
+    one_by_one = nx.Graph()
+    for edge in edges:
+        add_edge(one_by_one, *edge)
+    bulk = add_edges_bulk(nx.Graph(), edges)
+
+    assert dict(bulk.nodes(data=True)) == dict(one_by_one.nodes(data=True))
+    assert list(bulk.edges(data="rows")) == list(one_by_one.edges(data="rows"))
+    assert bulk["player1"]["player2"]["games"] == 2
+    assert bulk["player2"]["player3"]["games"] == 2
+
+
+def test_dataclasses_are_slotted(player_nodes, edge_data):
+    """Test that nodes and games carry no per-instance dict and stay immutable."""
+    assert not hasattr(player_nodes[0], "__dict__")
+    assert not hasattr(edge_data[0], "__dict__")
+    assert edge_data[0].duration == 0
+    with pytest.raises(FrozenInstanceError):
+        player_nodes[0].rating = 0